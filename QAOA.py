@@ -1,16 +1,50 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
 import numpy as np
-from qiskit import QuantumCircuit
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit import Parameter
+from qiskit.circuit.library import QAOAAnsatz
 from qiskit.primitives import Sampler, Estimator
 from qiskit.quantum_info import Pauli
 from qiskit_algorithms import QAOA
 from qiskit_algorithms.optimizers import COBYLA
 from qiskit_optimization import QuadraticProgram
 from qiskit_optimization.converters import QuadraticProgramToQubo
+from scipy.optimize import minimize
+
+import metrics
+from qubo_model import (build_qubo_model, decode_start_times, dispatch_order, qubo_energy, repair_bitstring,
+                        schedule_twt, sequence_to_bitstring)
+from qubo_solvers import bit_flip_descent
+from statevector_qaoa import (MAX_QUBITS, interpolate_angles, qubo_cost_vector, run_statevector_qaoa,
+                              warm_start_angles)
 
 # -----------------------------
 # 1. Burn-in Scheduling → QUBO Formulation
 # -----------------------------
-def build_burnin_qubo(processing_times, due_dates, weights):
+def _add_variables(qp, model):
+    """Add binaries x_i (surrogate), x_j_t (job j starts at t) and s_t_b (slack)."""
+    if model.info["formulation"] == "surrogate":
+        qp.binary_var_list(len(model.linear), name="x", key_format="_{}")
+        return
+    jobs = model.var_job >= 0
+    qp.binary_var_list([f"{j}_{t}" for j, t in zip(model.var_job[jobs], model.var_start[jobs])],
+                       name="x", key_format="_{}")
+    num_slack = model.info["num_slack_variables"]
+    if num_slack:
+        bits = num_slack // model.info["horizon"]
+        qp.binary_var_list([f"{k // bits}_{k % bits}" for k in range(num_slack)],
+                           name="s", key_format="_{}")
+
+
+def build_burnin_qubo(processing_times, due_dates, weights, formulation="surrogate",
+                      return_model=False, **options):
     """
     Build a QUBO for the burn-in scheduling problem:
     Objective: Minimize Total Weighted Tardiness (TWT).
@@ -19,33 +53,428 @@ def build_burnin_qubo(processing_times, due_dates, weights):
         processing_times (list[int]): processing time of each job
         due_dates (list[int]): due date of each job
         weights (list[int]): job weights
+        formulation (str): "surrogate" (linear w_i * (p_i - d_i) * x_i) or
+            "time_indexed" (true TWT with one-hot start slots, see qubo_model)
+        return_model (bool): also return the sparse QuboModel with build stats
+        **options: formulation options (horizon, batch_capacity, penalty)
 
     Returns:
         QuadraticProgram: optimization problem
+        QuboModel: sparse coefficients and model info (if return_model)
     """
-    n = len(processing_times)
+    # Coefficients are assembled as sparse arrays, not per-term dicts
+    model = build_qubo_model(processing_times, due_dates, weights, formulation, **options)
+
     qp = QuadraticProgram()
+    _add_variables(qp, model)
+    qp.minimize(constant=model.offset, linear=model.linear, quadratic=model.quadratic)
 
-    # Binary variables: x_i = 1 if job i is selected, else 0
-    for i in range(n):
-        qp.binary_var(f"x_{i}")
+    if return_model:
+        return qp, model
+    return qp
 
-    # Objective: Σ w_i * max(0, C_i - d_i)
-    # Simplified linear penalty: sum(weights[i] * (processing_times[i] - due_dates[i]) * x_i)
-    # (For demonstration – real tardiness encoding may require auxiliary vars)
-    linear = {}
-    for i in range(n):
-        linear[f"x_{i}"] = weights[i] * (processing_times[i] - due_dates[i])
 
-    qp.minimize(linear=linear)
+# -----------------------------
+# 2. Compile cache for QUBO / Ising models
+# -----------------------------
+class CompiledQubo:
+    """
+    Everything derived from one instance + formulation: the original program,
+    the QUBO converter and converted program, the Ising operator and offset.
+    The statevector cost vector is computed on first use and kept.
+    """
 
-    return qp
+    def __init__(self, qp, model, converter, qubo, operator, offset):
+        self.qp = qp
+        self.model = model
+        self.converter = converter
+        self.qubo = qubo
+        self.operator = operator
+        self.offset = offset
+        self.evaluators = {}
+        self._cost = None
+
+    def cost_vector(self):
+        if self._cost is None:
+            self._cost = qubo_cost_vector(*qubo_coefficients(self.qubo))
+        return self._cost
+
+    def energies(self, keys):
+        """QUBO energy of measured bitstrings given as integers (bit i = variable i)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.qubo.get_num_vars() <= MAX_QUBITS:
+            return self.cost_vector()[keys]
+        linear, quadratic, offset = qubo_coefficients(self.qubo)
+        x = ((keys[:, None] >> np.arange(linear.size)) & 1).astype(float)
+        return np.einsum("ki,ij,kj->k", x, quadratic, x) + x @ linear + offset
+
+
+def instance_key(processing_times, due_dates, weights, formulation="surrogate", **options):
+    """SHA-256 over the job arrays and the formulation options."""
+    digest = hashlib.sha256()
+    for values in (processing_times, due_dates, weights):
+        array = np.ascontiguousarray(values, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps({"formulation": formulation, **options}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class QuboCompileCache:
+    """
+    Content-addressed LRU cache of CompiledQubo entries.
+
+    Args:
+        maxsize (int): number of compiled models kept in memory.
+        cache_dir (str | None): if set, entries are also pickled to
+            <cache_dir>/<key>.pkl and loaded from there on a memory miss.
+            Unpickling runs arbitrary code, so the directory must be trusted
+            (never shared with or writable by other users). A file whose
+            stored key does not match its name is ignored and rebuilt.
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def compile(self, processing_times, due_dates, weights, formulation="surrogate", **options):
+        key = instance_key(processing_times, due_dates, weights, formulation, **options)
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.pkl") if self.cache_dir else None
+        compiled = self._load(path, key) if path else None
+        if compiled is not None:
+            self.disk_hits += 1
+        else:
+            compiled = compile_burnin_qubo(processing_times, due_dates, weights, formulation, **options)
+            self.misses += 1
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path, "wb") as f:
+                    pickle.dump((key, compiled), f)
+
+        entries[key] = compiled
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return compiled
+
+    @staticmethod
+    def _load(path, key):
+        """The entry stored under `key` at `path`, or None if missing or not that instance."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+        if not (isinstance(entry, tuple) and len(entry) == 2 and entry[0] == key
+                and isinstance(entry[1], CompiledQubo)):
+            return None
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "size": len(self._entries)}
+
+
+@metrics.timed("qubo_conversion")
+def compile_burnin_qubo(processing_times, due_dates, weights, formulation="surrogate", **options):
+    """Build the program, convert it to a QUBO and map it to an Ising operator (uncached)."""
+    qp, model = build_burnin_qubo(processing_times, due_dates, weights, formulation,
+                                  return_model=True, **options)
+    converter = QuadraticProgramToQubo()
+    qubo = converter.convert(qp)
+    operator, offset = qubo.to_ising()
+    return CompiledQubo(qp, model, converter, qubo, operator, offset)
+
+
+# Shared by every simulate_burnin_qaoa call unless another cache is passed
+compile_cache = QuboCompileCache()
 
 
 # -----------------------------
-# 2. Solve with QAOA
+# 3. Batched evaluation of a compiled ansatz
 # -----------------------------
-def simulate_burnin_qaoa(processing_times, due_dates, weights, p=1, shots=1024):
+class BatchedQAOAEvaluator:
+    """
+    QAOA ansatz built and transpiled once, then evaluated for many parameter
+    vectors per Sampler call.
+
+    Parameter vectors use the [betas, gammas] order of the ansatz.
+
+    Args:
+        compiled (CompiledQubo): instance to evaluate.
+        p (int): QAOA depth.
+        thetas (array | None): warm-start angles (see warm_start_circuits).
+        sampler (BaseSampler | None): primitive to run on; defaults to Sampler().
+    """
+
+    def __init__(self, compiled, p, thetas=None, sampler=None):
+        options = {}
+        if thetas is not None:
+            options["initial_state"], options["mixer_operator"] = warm_start_circuits(thetas)
+        ansatz = QAOAAnsatz(compiled.operator, reps=p, **options)
+        ansatz.measure_all()
+        self.circuit = transpile(ansatz, optimization_level=1)
+        self.compiled = compiled
+        self.p = p
+        self.sampler = sampler if sampler is not None else Sampler()
+        self.primitive_calls = 0
+        self.circuit_evaluations = 0
+
+    def distributions(self, parameter_sets):
+        """Measured quasi-distributions for a (k, 2p) stack of parameter vectors."""
+        params = np.atleast_2d(np.asarray(parameter_sets, dtype=float))
+        with metrics.timer("sampler"):
+            job = self.sampler.run([self.circuit] * len(params), params.tolist())
+            dists = job.result().quasi_dists
+        self.primitive_calls += 1
+        self.circuit_evaluations += len(params)
+        metrics.count("sampler_calls")
+        metrics.count("circuit_executions", len(params))
+        return dists
+
+    def expectations(self, parameter_sets):
+        """Expected QUBO energy for every parameter vector, in one primitive call."""
+        values = []
+        for dist in self.distributions(parameter_sets):
+            keys = np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))
+            probs = np.fromiter(dist.values(), dtype=float, count=len(dist))
+            values.append(float(probs @ self.compiled.energies(keys)))
+        return np.array(values)
+
+    def expectation(self, params):
+        return float(self.expectations(params)[0])
+
+    def grid_search(self, num=8, gamma_max=None):
+        """
+        Evaluate a num x num (beta, gamma) grid in one call, with every layer
+        sharing the same angles, and return the best point.
+        """
+        if gamma_max is None:
+            gamma_max = np.pi / _cost_scale(self.compiled)
+        betas, gammas = np.meshgrid(np.linspace(0, np.pi / 2, num), np.linspace(0, gamma_max, num + 1)[1:])
+        grid = np.column_stack([np.repeat(betas.ravel()[:, None], self.p, axis=1),
+                                np.repeat(gammas.ravel()[:, None], self.p, axis=1)])
+        values = self.expectations(grid)
+        best = int(np.argmin(values))
+        return grid[best], float(values[best])
+
+    def gradient(self, params, eps=1e-2):
+        """Central finite-difference gradient; all 4p shifted circuits run in one call."""
+        params = np.asarray(params, dtype=float)
+        shifts = np.eye(params.size) * eps
+        values = self.expectations(np.vstack([params + shifts, params - shifts]))
+        return (values[:params.size] - values[params.size:]) / (2 * eps)
+
+
+def batched_evaluator(compiled, p, thetas=None):
+    """Return the evaluator cached on the compiled instance for this depth/warm start."""
+    key = (p, None if thetas is None else np.asarray(thetas).tobytes())
+    if key not in compiled.evaluators:
+        compiled.evaluators[key] = BatchedQAOAEvaluator(compiled, p, thetas)
+    return compiled.evaluators[key]
+
+
+# -----------------------------
+# 4. Decoding measured samples
+# -----------------------------
+class DecodedSamples(NamedTuple):
+    """Outcome of :func:`decode_samples`.
+
+    `best_*` is the lowest objective over the decoded, repaired and polished
+    candidates; `max_probability_*` is the plain argmax readout it replaces.
+    """
+    best_schedule: list
+    best_objective: float
+    feasible: bool
+    max_probability_schedule: list
+    max_probability_objective: float
+    candidates: int
+    covered_mass: float
+    repaired: int
+    polish_gain: float
+
+
+def _top_samples(distribution, top_k, mass):
+    """Most probable (keys, probabilities), by top_k and/or cumulative mass."""
+    if isinstance(distribution, dict):
+        keys = np.fromiter(distribution.keys(), dtype=np.int64, count=len(distribution))
+        probs = np.fromiter(distribution.values(), dtype=float, count=len(distribution))
+    else:
+        probs = np.asarray(distribution, dtype=float)
+        keys = np.arange(probs.size, dtype=np.int64)
+    # Quasi-probabilities from mitigated samplers can dip below zero
+    probs = np.clip(probs, 0.0, None)
+    total = probs.sum()
+    if top_k is not None and top_k < probs.size:
+        # Partial selection first, so a 2^n statevector is never fully sorted
+        keep = np.argpartition(-probs, top_k - 1)[:top_k]
+        keys, probs = keys[keep], probs[keep]
+    order = np.argsort(-probs, kind="stable")
+    keys, probs = keys[order], probs[order]
+    if mass is not None:
+        count = int(np.searchsorted(np.cumsum(probs), mass * total)) + 1
+        keys, probs = keys[:count], probs[:count]
+    return keys, probs, total
+
+
+def _max_probability_key(distribution):
+    if isinstance(distribution, dict):
+        return max(distribution, key=distribution.get)
+    return int(np.argmax(distribution))
+
+
+def _interpret(compiled, keys):
+    """Measured integers (bit i = qubit i) to bit-vectors over the original program."""
+    bits = (np.asarray(keys, dtype=np.int64)[:, None] >> np.arange(compiled.qubo.get_num_vars())) & 1
+    return np.array([compiled.converter.interpret(row) for row in bits]).astype(int)
+
+
+def _repair_all(model, x):
+    repaired = [repair_bitstring(model, row) for row in x]
+    return np.array([bits for bits, _ in repaired]), np.array([ok for _, ok in repaired])
+
+
+@metrics.timed("qaoa_decoding")
+def decode_samples(compiled, distribution, top_k=32, mass=None, polish=4):
+    """
+    Decode a measured distribution into the best schedule it contains.
+
+    The most probable samples (top_k of them and/or as many as cover `mass`
+    of the probability) are repaired to feasible bit-vectors
+    (qubo_model.repair_bitstring), scored together in one sparse energy
+    evaluation, and the best `polish` of them are refined by bit-flip
+    descent (qubo_solvers.bit_flip_descent) and repaired again.
+
+    Args:
+        compiled (CompiledQubo): instance the samples were measured on.
+        distribution (dict | array): {measured integer: probability}, or a
+            probability vector indexed by basis state (statevector backend).
+        top_k (int | None): most probable samples to decode.
+        mass (float | None): decode the most probable samples until they
+            cover this share of the probability; with top_k, whichever
+            limit is reached first applies.
+        polish (int): number of best candidates to polish; 0 skips it.
+
+    Returns:
+        DecodedSamples
+    """
+    if top_k is None and mass is None:
+        raise ValueError("set top_k, mass or both")
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    model, qp = compiled.model, compiled.qp
+
+    keys, probs, total = _top_samples(distribution, top_k, mass)
+    sampled = _interpret(compiled, keys)
+    x, feasible = _repair_all(model, sampled)
+    energies = qubo_energy(model, x)
+    repaired = int(np.any(x != sampled, axis=1).sum())
+    metrics.count("decoded_samples", len(keys))
+
+    gain = 0.0
+    if polish:
+        # Feasible candidates first, lowest energy first
+        seeds = np.lexsort((energies, ~feasible))[:polish]
+        polished, polished_ok = _repair_all(model, bit_flip_descent(model, x[seeds]).samples)
+        polished_energies = qubo_energy(model, polished)
+        before = energies[seeds][polished_ok].min(initial=np.inf)
+        after = polished_energies[polished_ok].min(initial=np.inf)
+        if after < before:
+            gain = float(before - after)
+        x = np.vstack([x, polished])
+        feasible = np.r_[feasible, polished_ok]
+        energies = np.r_[energies, polished_energies]
+
+    best = int(np.lexsort((energies, ~feasible))[0])
+    best_schedule = [int(b) for b in x[best]]
+    max_probability_schedule = [int(b) for b in _interpret(compiled, [_max_probability_key(distribution)])[0]]
+    return DecodedSamples(
+        best_schedule=best_schedule,
+        best_objective=qp.objective.evaluate(best_schedule),
+        feasible=bool(feasible[best]),
+        max_probability_schedule=max_probability_schedule,
+        max_probability_objective=qp.objective.evaluate(max_probability_schedule),
+        candidates=len(keys),
+        covered_mass=float(probs.sum() / total) if total > 0 else 0.0,
+        repaired=repaired,
+        polish_gain=gain,
+    )
+
+
+# -----------------------------
+# 5. Solve with QAOA
+# -----------------------------
+def qubo_coefficients(qubo):
+    """
+    Extract (linear, quadratic, offset) arrays from a converted QUBO.
+
+    Args:
+        qubo (QuadraticProgram): unconstrained binary program.
+
+    Returns:
+        tuple: linear vector, quadratic matrix (x^T Q x), constant offset.
+    """
+    objective = qubo.objective
+    sign = 1 if objective.sense == objective.sense.MINIMIZE else -1
+    linear = sign * objective.linear.to_array()
+    quadratic = sign * objective.quadratic.to_array()
+    return linear, quadratic, sign * objective.constant
+
+
+def warm_start_circuits(thetas):
+    """
+    Initial-state and mixer circuits for warm-start QAOA on the Qiskit path.
+
+    The initial state is RY(theta_i)|0> on each qubit. The mixer
+    RY(theta_i) RZ(2*beta) RY(-theta_i) has that state as its eigenstate.
+    """
+    n = len(thetas)
+    initial_state = QuantumCircuit(n)
+    mixer = QuantumCircuit(n)
+    beta = Parameter("β")
+    for i, theta in enumerate(thetas):
+        initial_state.ry(theta, i)
+        mixer.ry(-theta, i)
+        mixer.rz(2 * beta, i)
+        mixer.ry(theta, i)
+    return initial_state, mixer
+
+
+def warm_start_bitstring(compiled, warm_start, processing_times, due_dates, weights):
+    """Resolve a warm start ("edd", "wspt" or explicit bits) to QUBO variable bits."""
+    if isinstance(warm_start, str):
+        order = dispatch_order(processing_times, due_dates, weights, warm_start)
+        return sequence_to_bitstring(compiled.model, order)
+    return np.asarray(warm_start, dtype=int)
+
+
+# Optimized angles by (formulation, p), with gammas stored in units of the
+# cost standard deviation so they transfer between similar instances
+angle_bank = {}
+
+
+def _cost_scale(compiled):
+    if compiled.qubo.get_num_vars() > MAX_QUBITS:
+        return 1.0
+    return float(compiled.cost_vector().std()) or 1.0
+
+
+@metrics.timed()
+def simulate_burnin_qaoa(processing_times, due_dates, weights, p=1, shots=1024, backend="qiskit",
+                         formulation="surrogate", cache=compile_cache, warm_start=None,
+                         warm_epsilon=0.25, initial_point=None, return_details=False,
+                         grid_points=8, top_k=32, mass=None, polish=4, **formulation_options):
     """
     Solve the burn-in scheduling problem using QAOA.
 
@@ -54,38 +483,200 @@ def simulate_burnin_qaoa(processing_times, due_dates, weights, p=1, shots=1024):
         due_dates (list[int])
         weights (list[int])
         p (int): QAOA depth (number of alternating layers)
-        shots (int): number of measurement shots
+        shots (int): kept for compatibility and unused: every backend works
+            on exact probabilities (the reference Sampler and the statevector
+            simulation have no shot noise)
+        backend (str): "qiskit" (Sampler primitive), "qiskit_batched" (ansatz
+            transpiled once per instance, parameter sets batched per Sampler
+            call) or "statevector" (NumPy simulation with a precomputed
+            diagonal cost vector)
+        formulation (str): QUBO formulation passed to build_burnin_qubo
+        cache (QuboCompileCache | None): compile cache; None rebuilds every call
+        warm_start (str | array | None): "edd" / "wspt" (time-indexed only) or
+            a bitstring over the QUBO variables; biases the initial state and
+            mixer towards that classical solution
+        warm_epsilon (float): how far warm-start bits are pulled towards 1/2
+        initial_point (array | str | None): starting angles [betas, gammas];
+            "transfer" reuses the angles last stored in angle_bank for this
+            formulation and depth
+        return_details (bool): also return a dict with the optimized angles
+            and the number of cost-function evaluations
+        grid_points (int): "qiskit_batched" only: without an initial point,
+            scan a grid_points x grid_points (beta, gamma) grid in one Sampler
+            call before COBYLA starts
+        top_k, mass, polish: decoding of the final distribution (see
+            decode_samples); top_k=1, polish=0 keeps the max-probability sample
+        **formulation_options: horizon, batch_capacity, penalty
 
     Returns:
         best_schedule (list[int]): best binary schedule found
         best_obj (float): objective value (TWT approx)
+        details (dict): only if return_details; includes the DecodedSamples
+            with the max-probability objective for comparison
     """
-    # 1. Build QUBO
-    qp = build_burnin_qubo(processing_times, due_dates, weights)
+    # 1-2. Build the QUBO, convert it and map it to an Ising operator (cached)
+    misses = None
+    if cache is not None:
+        misses = cache.misses
+        compiled = cache.compile(processing_times, due_dates, weights, formulation, **formulation_options)
+    else:
+        compiled = compile_burnin_qubo(processing_times, due_dates, weights, formulation, **formulation_options)
+    model = compiled.model
+    source = "cached" if misses is not None and cache.misses == misses else \
+        f"built in {model.info['build_seconds'] * 1e3:.1f} ms"
+    print(f"QUBO model ({model.info['formulation']}): {model.info['num_variables']} variables, {source}")
 
-    # 2. Convert to QUBO form
-    conv = QuadraticProgramToQubo()
-    qubo = conv.convert(qp)
+    bits = thetas = None
+    if warm_start is not None:
+        bits = warm_start_bitstring(compiled, warm_start, processing_times, due_dates, weights)
+        thetas = warm_start_angles(bits, warm_epsilon)
 
-    # 3. Setup QAOA with COBYLA optimizer
-    optimizer = COBYLA(maxiter=200)
-    qaoa = QAOA(optimizer=optimizer, reps=p, sampler=Sampler())
+    if isinstance(initial_point, str):
+        if initial_point != "transfer":
+            raise ValueError(f"Unknown initial_point {initial_point!r}")
+        stored = angle_bank.get((formulation, p))
+        initial_point = None
+        if stored is not None:
+            initial_point = np.r_[stored[:p], stored[p:] / _cost_scale(compiled)]
 
-    # 4. Solve with QAOA
-    result = qaoa.compute_minimum_eigenvalue(qubo.to_ising()[0])
-    
-    # 5. Extract solution
-    samples = result.samples
-    best_sample = max(samples, key=lambda s: s.probability)
-    best_schedule = [int(b) for b in best_sample.x]
-    best_obj = qp.objective.evaluate(best_schedule)
+    start = time.perf_counter()
+    if backend == "statevector":
+        # 3-4. Exact NumPy statevector QAOA with COBYLA
+        cost = compiled.cost_vector()
+        result = run_statevector_qaoa(None, None, p=p, maxiter=200, initial_point=initial_point,
+                                      cost=cost, warm_start=bits,
+                                      epsilon=warm_epsilon)
+        distribution = result.probabilities
+        optimal_point, nfev = result.optimal_point, result.nfev
+    elif backend == "qiskit":
+        # 3. Setup QAOA with COBYLA optimizer
+        optimizer = COBYLA(maxiter=200)
+        qaoa_options = {}
+        if thetas is not None:
+            qaoa_options["initial_state"], qaoa_options["mixer"] = warm_start_circuits(thetas)
+        qaoa = QAOA(optimizer=optimizer, reps=p, sampler=Sampler(), initial_point=initial_point,
+                    **qaoa_options)
+
+        # 4. Solve with QAOA
+        result = qaoa.compute_minimum_eigenvalue(compiled.operator)
+        distribution = dict(result.eigenstate)
+        optimal_point, nfev = np.asarray(result.optimal_point), result.cost_function_evals
+        # One Sampler call per cost evaluation inside qiskit_algorithms' QAOA
+        metrics.count("sampler_calls", nfev)
+        metrics.count("circuit_executions", nfev)
+    elif backend == "qiskit_batched":
+        # 3. Transpiled ansatz reused across calls; coarse grid in one primitive call
+        evaluator = batched_evaluator(compiled, p, thetas)
+        evaluations = evaluator.circuit_evaluations
+        if initial_point is None:
+            initial_point, _ = evaluator.grid_search(grid_points)
+
+        # 4. COBYLA on the same compiled circuit
+        result = minimize(evaluator.expectation, initial_point, method="COBYLA",
+                          options={"maxiter": 200, "disp": False})
+        distribution = dict(evaluator.distributions(result.x)[0])
+        optimal_point, nfev = result.x, evaluator.circuit_evaluations - evaluations
+    else:
+        raise ValueError(f"Unknown backend {backend!r}; expected 'qiskit', 'qiskit_batched' or 'statevector'")
+    metrics.record(f"qaoa_{backend}", time.perf_counter() - start)
+    metrics.count("objective_evaluations", nfev)
+
+    # Keep the optimized angles for transfer to similar instances
+    angle_bank[(formulation, p)] = np.r_[optimal_point[:p], optimal_point[p:] * _cost_scale(compiled)]
+
+    # 5. Extract solution: the best of the top samples, repaired and polished
+    decoded = decode_samples(compiled, distribution, top_k, mass, polish)
+    best_schedule, best_obj = decoded.best_schedule, decoded.best_objective
 
     print("Best schedule found (QAOA):", best_schedule)
     print("Approximate minimum TWT:", best_obj)
+    print(f"Decoded {decoded.candidates} samples ({decoded.covered_mass:.1%} of the probability); "
+          f"max-probability sample objective: {decoded.max_probability_objective}")
+    if formulation == "time_indexed":
+        starts, feasible = decode_start_times(model, best_schedule)
+        if feasible:
+            print("Start times:", starts.tolist(), "TWT:", schedule_twt(model, starts))
+        else:
+            print("Best decoded bitstring violates the one-hot/overlap constraints")
 
+    if return_details:
+        return best_schedule, best_obj, {"optimal_point": optimal_point, "nfev": nfev, "decoded": decoded}
     return best_schedule, best_obj
 
 
+def qaoa_depth_sweep(processing_times, due_dates, weights, max_p=3, backend="statevector",
+                     warm_start=None, compare_cold=True, **options):
+    """
+    Run QAOA at depths 1..max_p, starting each depth from the INTERP transfer
+    of the previous optimum, and report the optimizer evaluations saved
+    against cold starts from default angles.
+
+    Args:
+        max_p (int): deepest circuit to run.
+        backend (str): "statevector" or "qiskit".
+        warm_start (str | array | None): warm-start bitstring for every depth.
+        compare_cold (bool): also run each depth from default angles without
+            a warm start to measure the savings.
+        **options: forwarded to simulate_burnin_qaoa.
+
+    Returns:
+        list[dict]: per-depth objective and evaluation counts.
+    """
+    report = []
+    point = None
+    for p in range(1, max_p + 1):
+        initial = interpolate_angles(point, p - 1) if point is not None else None
+        _, obj, details = simulate_burnin_qaoa(processing_times, due_dates, weights, p=p, backend=backend,
+                                               warm_start=warm_start, initial_point=initial,
+                                               return_details=True, **options)
+        point = details["optimal_point"]
+        row = {"p": p, "objective": obj, "nfev": details["nfev"]}
+        if compare_cold:
+            _, cold_obj, cold = simulate_burnin_qaoa(processing_times, due_dates, weights, p=p,
+                                                     backend=backend, return_details=True, **options)
+            row.update(cold_objective=cold_obj, cold_nfev=cold["nfev"],
+                       nfev_saved=cold["nfev"] - details["nfev"])
+        report.append(row)
+
+    for row in report:
+        line = f"p={row['p']}: objective {row['objective']}, {row['nfev']} evaluations"
+        if compare_cold:
+            line += f" (cold start: {row['cold_objective']}, {row['cold_nfev']} evaluations)"
+        print(line)
+    return report
+
+
+def compare_qaoa_backends(processing_times, due_dates, weights, p=1):
+    """
+    Time the Qiskit and statevector backends on the same instance.
+
+    The QUBO is compiled once into a private cache before either backend is
+    timed, so both runs start warm and neither pays (or skips) the compile
+    depending on the order they run in.
+
+    Returns:
+        dict: compile time, wall time and objective per backend, and the
+        speedup of the statevector backend over the Qiskit path.
+    """
+    cache = QuboCompileCache(maxsize=1)
+    start = time.perf_counter()
+    cache.compile(processing_times, due_dates, weights)
+    report = {"compile_seconds": time.perf_counter() - start}
+    for backend in ("qiskit", "statevector"):
+        start = time.perf_counter()
+        _, best_obj = simulate_burnin_qaoa(processing_times, due_dates, weights,
+                                           p=p, backend=backend, cache=cache)
+        report[backend] = {"seconds": time.perf_counter() - start, "objective": best_obj}
+    report["speedup"] = report["qiskit"]["seconds"] / report["statevector"]["seconds"]
+
+    print(f"QUBO compile: {report['compile_seconds']:.3f}s (shared, not timed below)")
+    print(f"{'backend':<12}{'time [s]':>10}{'objective':>12}")
+    for backend in ("qiskit", "statevector"):
+        print(f"{backend:<12}{report[backend]['seconds']:>10.3f}{report[backend]['objective']:>12g}")
+    print(f"speedup: {report['speedup']:.1f}x")
+    return report
+
+
 # -----------------------------
 # Example Run
 # -----------------------------
@@ -96,3 +687,6 @@ if __name__ == "__main__":
     weights = [2, 1, 3, 2]
 
     best_schedule, best_obj = simulate_burnin_qaoa(processing_times, due_dates, weights, p=1)
+
+    # Same instance on the NumPy statevector backend, with timings
+    compare_qaoa_backends(processing_times, due_dates, weights, p=1)
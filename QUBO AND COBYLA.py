@@ -1,6 +1,13 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+
 import numpy as np
 from scipy.optimize import minimize
 
+import metrics
+
 # -----------------------------
 # Burn-in Scheduling: Total Weighted Tardiness (TWT)
 # -----------------------------
@@ -27,55 +34,252 @@ def total_weighted_tardiness(schedule, processing_times, due_dates, weights):
     return twt
 
 
+# -----------------------------
+# Evaluation Cache
+# -----------------------------
+class TWTCache:
+    """
+    LRU memo of total_weighted_tardiness for one job set.
+
+    COBYLA moves through continuous space, but the objective only depends on
+    which coordinates are >= 0.5, so most evaluations repeat a bit pattern
+    that has already been scored. Entries are keyed on the packed bit pattern.
+
+    Args:
+        processing_times, due_dates, weights (array): job data the cache is bound to.
+        maxsize (int): maximum number of local entries before LRU eviction.
+        shared (MutableMapping | None): optional cross-process store, e.g. a
+            multiprocessing.Manager().dict(), consulted on local misses.
+    """
+
+    def __init__(self, processing_times, due_dates, weights, maxsize=65536, shared=None):
+        self.args = (processing_times, due_dates, weights)
+        self.maxsize = maxsize
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __call__(self, schedule):
+        key = np.packbits(np.asarray(schedule) >= 0.5).tobytes()
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+
+        value = self.shared.get(key) if self.shared is not None else None
+        if value is not None:
+            self.shared_hits += 1
+        else:
+            value = total_weighted_tardiness(schedule, *self.args)
+            self.misses += 1
+            if self.shared is not None and len(self.shared) < self.maxsize:
+                self.shared[key] = value
+
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return value
+
+    def matches(self, processing_times, due_dates, weights):
+        """True if the cache is bound to this job data."""
+        return all(mine is theirs or np.array_equal(mine, theirs)
+                   for mine, theirs in zip(self.args, (processing_times, due_dates, weights)))
+
+    def stats(self):
+        """Return hit/miss counters and the local cache size."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+# Per-process cache used by pool workers (set by _init_worker_cache)
+_worker_cache = None
+
+
+def _init_worker_cache(processing_times, due_dates, weights, maxsize, shared):
+    global _worker_cache
+    _worker_cache = TWTCache(processing_times, due_dates, weights, maxsize=maxsize, shared=shared)
+
+
+def _run_cached_restart(run, seed, processing_times, due_dates, weights):
+    return run_restart(run, seed, processing_times, due_dates, weights, cache=_worker_cache)
+
+
+# -----------------------------
+# Single COBYLA Restart
+# -----------------------------
+def run_restart(run, seed, processing_times, due_dates, weights, maxiter=500, cache=None):
+    """
+    Run one COBYLA restart from a random binary starting point.
+
+    Module-level so it can be shipped to worker processes.
+
+    Args:
+        run (int): restart index.
+        seed (np.random.SeedSequence | int): seed for this restart's start point.
+        processing_times, due_dates, weights (array): job data.
+        maxiter (int): COBYLA iteration limit.
+        cache (TWTCache | None): evaluation cache bound to the same job data.
+
+    Returns:
+        dict: restart statistics ('run', 'twt', 'x', 'nfev', 'success', 'elapsed',
+        plus 'cache_hits' and 'cache_misses' for this restart when cached).
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    # Random initialization (binary 0/1, converted to float for COBYLA)
+    init_schedule = rng.integers(0, 2, size=len(processing_times)).astype(float)
+
+    if cache is not None:
+        if not cache.matches(processing_times, due_dates, weights):
+            raise ValueError("cache is bound to different job data than this restart")
+        hits, misses = cache.hits + cache.shared_hits, cache.misses
+        objective, args = cache, ()
+    else:
+        objective, args = total_weighted_tardiness, (processing_times, due_dates, weights)
+
+    result = minimize(
+        objective,
+        init_schedule,
+        args=args,
+        method="COBYLA",
+        options={"maxiter": maxiter, "disp": False}
+    )
+
+    stats = {
+        'run': run,
+        'twt': float(result.fun),
+        'x': result.x,
+        'nfev': int(result.nfev),
+        'success': bool(result.success),
+        'elapsed': time.perf_counter() - start,
+    }
+    if cache is not None:
+        stats['cache_hits'] = cache.hits + cache.shared_hits - hits
+        stats['cache_misses'] = cache.misses - misses
+    return stats
+
+
 # -----------------------------
 # Simulation with Multiple Runs
 # -----------------------------
-def simulate_burnin(processing_times, due_dates, weights, num_runs=100, random_seed=None):
+@metrics.timed()
+def simulate_burnin(processing_times, due_dates, weights, num_runs=100, random_seed=None,
+                    n_workers=None, target_twt=None, return_stats=False,
+                    cache=None, cache_size=65536, share_cache=False):
     """
     Optimize burn-in scheduling using COBYLA with multiple random restarts.
 
+    Every restart draws its starting point from its own SeedSequence spawned
+    from `random_seed`, so serial and parallel runs with the same seed pick
+    the same best restart (ties go to the lowest restart index).
+
     Args:
         processing_times (array): processing time for each job.
         due_dates (array): due date for each job.
         weights (array): weight for each job.
         num_runs (int): number of optimization runs.
         random_seed (int | None): seed for reproducibility.
+        n_workers (int | None): worker processes; None or 1 runs serially.
+        target_twt (float | None): stop launching restarts once a restart
+            reaches this TWT. In parallel runs only the restarts still queued
+            are cancelled; those already running in a worker cannot be
+            interrupted, so they are waited for and their results kept. The
+            set of completed restarts may therefore differ between serial and
+            parallel runs.
+        return_stats (bool): also return the per-restart statistics.
+        cache (bool | TWTCache | None): memoize objective evaluations. True
+            builds a cache shared by all restarts (one per worker process);
+            a TWTCache instance is reused as-is, in serial mode only, and
+            must be bound to the same job data.
+        cache_size (int): LRU bound for caches built here.
+        share_cache (bool): with n_workers > 1, also share evaluations
+            between workers through a Manager dict (pays off only when a
+            single evaluation costs more than an IPC round trip).
 
     Returns:
         best_schedule (array): best binary schedule found.
         best_twt (float): minimum total weighted tardiness.
+        stats (list[dict]): per-restart statistics ordered by restart index,
+            only when `return_stats` is True.
     """
-    rng = np.random.default_rng(seed=random_seed)
-    n = len(processing_times)
-
-    best_twt = np.inf
-    best_schedule = None
-
-    for run in range(num_runs):
-        # 1. Random initialization (binary 0/1, converted to float for COBYLA)
-        init_schedule = rng.integers(0, 2, size=n).astype(float)
-
-        # 2. COBYLA optimization
-        result = minimize(
-            total_weighted_tardiness,
-            init_schedule,
-            args=(processing_times, due_dates, weights),
-            method="COBYLA",
-            options={"maxiter": 500, "disp": False}
-        )
-
-        # 3. Update best solution
-        if result.fun < best_twt:
-            best_twt = result.fun
-            best_schedule = result.x
-
-    # 4. Convert floating-point schedule → binary
-    best_schedule_binary = np.round(best_schedule).astype(int)
-
-    # 5. Output
+    seeds = np.random.SeedSequence(random_seed).spawn(num_runs)
+    args = (processing_times, due_dates, weights)
+    stats = []
+    parallel = n_workers is not None and n_workers > 1
+    if parallel and isinstance(cache, TWTCache):
+        raise ValueError("a TWTCache instance cannot be shared with worker processes; "
+                         "pass cache=True to build one per worker")
+
+    if not parallel:
+        if cache is True:
+            cache = TWTCache(*args, maxsize=cache_size)
+        for run, seed in enumerate(seeds):
+            stats.append(run_restart(run, seed, *args, cache=cache or None))
+            if target_twt is not None and stats[-1]['twt'] <= target_twt:
+                break
+    else:
+        pool_options = {}
+        restart = run_restart
+        # Started before the pool and shut down even when a restart raises
+        manager = Manager() if cache and share_cache else None
+        try:
+            if cache:
+                pool_options = {
+                    'initializer': _init_worker_cache,
+                    'initargs': (*args, cache_size, manager.dict() if manager is not None else None),
+                }
+                restart = _run_cached_restart
+            with ProcessPoolExecutor(max_workers=n_workers, **pool_options) as executor:
+                pending = {executor.submit(restart, run, seed, *args)
+                           for run, seed in enumerate(seeds)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    stats.extend(future.result() for future in done)
+                    if target_twt is not None and any(s['twt'] <= target_twt for s in stats):
+                        # Queued restarts are dropped; running ones finish and are kept
+                        for future in pending:
+                            future.cancel()
+                        stats.extend(future.result() for future in pending if not future.cancelled())
+                        break
+        finally:
+            if manager is not None:
+                manager.shutdown()
+        stats.sort(key=lambda s: s['run'])
+
+    # Restart timings come back in the stats, so worker processes are counted too
+    metrics.count("restarts", len(stats))
+    for s in stats:
+        metrics.record("cobyla_restart", s['elapsed'])
+        metrics.count("objective_evaluations", s['nfev'])
+
+    # Best restart: lowest TWT, earliest restart on ties
+    best = min(stats, key=lambda s: (s['twt'], s['run']))
+    best_twt = best['twt']
+
+    # Convert floating-point schedule → binary
+    best_schedule_binary = np.round(best['x']).astype(int)
+
+    # Output
     print("Optimal schedule:", best_schedule_binary)
     print("Minimum TWT found:", best_twt)
+    if cache:
+        hits = sum(s['cache_hits'] for s in stats)
+        misses = sum(s['cache_misses'] for s in stats)
+        print(f"Objective cache: {hits} hits, {misses} misses "
+              f"({hits / max(hits + misses, 1):.1%} hit rate)")
 
+    if return_stats:
+        return best_schedule_binary, best_twt, stats
     return best_schedule_binary, best_twt
 
 
@@ -91,5 +295,6 @@ if __name__ == "__main__":
     best_schedule, best_twt = simulate_burnin(
         processing_times, due_dates, weights,
         num_runs=100,
-        random_seed=42
+        random_seed=42,
+        cache=True
     )
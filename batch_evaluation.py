@@ -0,0 +1,222 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# -----------------------------
+# Array-based batch schedule evaluation
+# -----------------------------
+# Completion models:
+#   "sequential": jobs inside a batch run one after another, each starting at
+#                 max(previous completion, release time); every batch starts
+#                 from time 0 (create_batch_table in edd+spt+wspt.py).
+#   "batch":      a batch starts at the minimum release time of its jobs, runs
+#                 for the maximum processing time, is due at the minimum due
+#                 date and is weighted by the sum of job weights
+#                 (create_batch_table in edd+advanced schedulingfinal.py).
+#   "serial":     one oven processes the batches in batch-index order; a batch
+#                 starts once the oven is free and all of its jobs are
+#                 released, runs for its maximum processing time, and every
+#                 job is tardy against its own due date.
+MODELS = ("sequential", "batch", "serial")
+
+
+class BatchEvaluation(NamedTuple):
+    """Result of :func:`evaluate_batches`.
+
+    Per-batch arrays have shape (num_batches,) for a single assignment vector
+    and (num_candidates, num_batches) for a 2-D stack. Empty batches have a
+    NaN completion time and zero tardiness.
+    """
+    completion_time: np.ndarray
+    tardiness: np.ndarray
+    weighted_tardiness: np.ndarray
+    total_weighted_tardiness: np.ndarray
+    job_completion_time: np.ndarray
+    frame: Optional[pd.DataFrame] = None
+
+
+def batches_to_columns(batches, weight_key="weight"):
+    """
+    Flatten a list of job batches into job columns plus a batch assignment vector.
+
+    Jobs keep the order in which they appear in the batches, so the result can
+    be passed straight to :func:`evaluate_batches`.
+
+    Args:
+        batches (list[list[dict]]): batches as returned by the scheduling heuristics.
+        weight_key (str): job key holding the weight ('weight' or 'size').
+
+    Returns:
+        dict: 'id', 'release_time', 'processing_time', 'due_date', 'weight'
+        columns and the 'assignment' vector (0-based batch index per job).
+    """
+    flat = [job for batch in batches for job in batch]
+    lengths = [len(batch) for batch in batches]
+    return {
+        'id': np.array([job['id'] for job in flat], dtype=object),
+        'release_time': np.array([job['release_time'] for job in flat]),
+        'processing_time': np.array([job['processing_time'] for job in flat]),
+        'due_date': np.array([job['due_date'] for job in flat]),
+        'weight': np.array([job[weight_key] for job in flat]),
+        'assignment': np.repeat(np.arange(len(batches)), lengths),
+    }
+
+
+def _segmented_cummax(values, segment):
+    """Running maximum of `values` that restarts whenever `segment` changes.
+
+    `segment` must be non-decreasing. Integer inputs are shifted by a
+    per-segment offset so a single accumulate pass is exact; other inputs are
+    replaced by their ranks first.
+    """
+    if values.size == 0:
+        return values
+    if np.issubdtype(values.dtype, np.integer):
+        low, high = int(values.min()), int(values.max())
+        span = high - low + 1
+        if span * (int(segment[-1]) + 1) < np.iinfo(np.int64).max:
+            keys = (values.astype(np.int64) - low) + segment.astype(np.int64) * span
+            return (np.maximum.accumulate(keys) - segment * span + low).astype(values.dtype)
+    order = np.argsort(values, kind="stable")
+    ranks = np.empty(values.size, dtype=np.int64)
+    ranks[order] = np.arange(values.size)
+    keys = ranks + segment.astype(np.int64) * values.size
+    return values[order[np.maximum.accumulate(keys) - segment * values.size]]
+
+
+@metrics.timed("twt_evaluation")
+def evaluate_batches(release_times, processing_times, due_dates, weights, assignment,
+                     model="sequential", num_batches=None, as_frame=False, job_ids=None):
+    """
+    Score one or many batch assignments with NumPy array operations.
+
+    Within a batch, jobs are processed in the order of the job columns.
+
+    Args:
+        release_times, processing_times, due_dates, weights (array): job columns of length n.
+        assignment (array): batch index per job, shape (n,) or (k, n) for k candidates.
+        model (str): "sequential", "batch" or "serial" (see MODELS).
+        num_batches (int | None): number of batches; defaults to max(assignment) + 1.
+        as_frame (bool): also build the per-job DataFrame (single assignment only).
+        job_ids (array | None): job labels for the DataFrame.
+
+    Returns:
+        BatchEvaluation: per-batch completion times, tardiness and weighted
+        tardiness, total weighted tardiness (scalar or shape (k,)) and per-job
+        completion times.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+
+    r = np.asarray(release_times)
+    p = np.asarray(processing_times)
+    d = np.asarray(due_dates)
+    w = np.asarray(weights)
+    assignment = np.asarray(assignment)
+    single = assignment.ndim == 1
+    stack = np.atleast_2d(assignment)
+    k, n = stack.shape
+    if n != r.size:
+        raise ValueError(f"assignment has {n} jobs, job columns have {r.size}")
+    if as_frame and not single:
+        raise ValueError("as_frame is only supported for a single assignment vector")
+    if n == 0:
+        raise ValueError("cannot evaluate an empty job set")
+    if num_batches is None:
+        num_batches = int(stack.max()) + 1
+    metrics.count("twt_evaluations", k)
+
+    dtype = np.result_type(r, p, d, w)
+    groups = (np.arange(k)[:, None] * num_batches + stack).ravel()
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    jobs = order % n
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], sorted_groups.size] - 1
+    present = sorted_groups[starts]
+    segment = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, sorted_groups.size]))
+
+    r_s, p_s, d_s, w_s = r[jobs], p[jobs], d[jobs], w[jobs]
+
+    if model == "sequential":
+        # C_j = S_j + max(0, max_{i<=j}(r_i - S_{i-1})) with S the in-batch prefix sum of p
+        cumulative = np.cumsum(p_s, dtype=dtype)
+        offsets = np.r_[np.zeros(1, dtype=dtype), cumulative[:-1]][starts]
+        local = cumulative - offsets[segment]
+        slack = np.maximum(r_s - (local - p_s), 0).astype(dtype)
+        job_completion = local + _segmented_cummax(slack, segment)
+        job_tardiness = np.maximum(job_completion - d_s, 0)
+        job_weighted = job_tardiness * w_s
+        batch_completion = job_completion[ends]
+        batch_tardiness = np.add.reduceat(job_tardiness, starts)
+        batch_weighted = np.add.reduceat(job_weighted, starts)
+    elif model == "batch":
+        batch_completion = (np.minimum.reduceat(r_s, starts)
+                            + np.maximum.reduceat(p_s, starts)).astype(dtype)
+        batch_tardiness = np.maximum(batch_completion - np.minimum.reduceat(d_s, starts), 0)
+        batch_weighted = batch_tardiness * np.add.reduceat(w_s, starts)
+        job_completion = batch_completion[segment]
+        job_tardiness = batch_tardiness[segment]
+        job_weighted = batch_weighted[segment]
+    else:
+        # Same max-plus recurrence as "sequential", one level up: batches of a
+        # candidate run back to back, each with its latest release and longest job
+        ready = np.maximum.reduceat(r_s, starts).astype(dtype)
+        length = np.maximum.reduceat(p_s, starts).astype(dtype)
+        row = present // num_batches
+        row_starts = np.flatnonzero(np.r_[True, row[1:] != row[:-1]])
+        cumulative = np.cumsum(length)
+        offsets = np.r_[np.zeros(1, dtype=dtype), cumulative[:-1]][row_starts]
+        local = cumulative - offsets[row]
+        slack = np.maximum(ready - (local - length), 0).astype(dtype)
+        batch_completion = local + _segmented_cummax(slack, row)
+        job_completion = batch_completion[segment]
+        job_tardiness = np.maximum(job_completion - d_s, 0)
+        job_weighted = job_tardiness * w_s
+        batch_tardiness = np.add.reduceat(job_tardiness, starts)
+        batch_weighted = np.add.reduceat(job_weighted, starts)
+
+    def scatter(values, fill):
+        out = np.full(k * num_batches, fill, dtype=np.result_type(values, type(fill)))
+        out[present] = values
+        out = out.reshape(k, num_batches)
+        return out[0] if single else out
+
+    completion = scatter(batch_completion, np.nan)
+    tardiness = scatter(batch_tardiness, 0)
+    weighted = scatter(batch_weighted, 0)
+    twt = weighted.sum(axis=-1)
+
+    job_completion_time = np.empty(k * n, dtype=job_completion.dtype)
+    job_completion_time[order] = job_completion
+    job_completion_time = job_completion_time.reshape(k, n)
+    if single:
+        job_completion_time = job_completion_time[0]
+
+    frame = None
+    if as_frame:
+        labels = job_ids if job_ids is not None else np.arange(1, n + 1)
+        if model != "batch":
+            time_cols = ['Completion Time', 'Tardiness']
+        else:
+            time_cols = ['Batch Completion Time', 'Batch Tardiness']
+        tard = np.empty(n, dtype=job_tardiness.dtype)
+        tard[order] = job_tardiness
+        wtard = np.empty(n, dtype=job_weighted.dtype)
+        wtard[order] = job_weighted
+        frame = pd.DataFrame({
+            'Batch ID': [f"B{b + 1}" for b in stack[0]],
+            'Job ID': labels,
+            'Size': w,
+            'Due Date': d,
+            'Processing Time': p,
+            'Release Time': r,
+            time_cols[0]: job_completion_time,
+            time_cols[1]: tard,
+            'Weighted Tardiness': wtard,
+        })
+
+    return BatchEvaluation(completion, tardiness, weighted, twt, job_completion_time, frame)
@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+import metrics
+from batch_evaluation import batches_to_columns, evaluate_batches
+from job_table import JobRecord, JobTable, as_job_array, job_records
+from script_loader import load_script
+
+
+# -----------------------------
+# 1. Seeded instance generator
+# -----------------------------
+def generate_instance(n, seed=0, tightness=0.5, due_range=0.6, batch_size=4, release_factor=0.5,
+                      processing_range=(1, 10), size_range=(4, 10), weight_range=(1, 10), energy_range=(1, 25)):
+    """
+    Random burn-in instance with all JOB_FIELDS, reproducible from `seed`.
+
+    Due dates follow the tardiness-factor / due-date-range scheme of Potts
+    and Van Wassenhove, scaled for batching: with P = sum(p) / batch_size as
+    a makespan estimate, releases are U(0, release_factor * P) and
+    d_j = r_j + p_j + U(P(1 - T - R/2), P(1 - T + R/2)), clipped at 0, for
+    tightness T and due-date range R. Larger T gives more tardy jobs.
+    Integer ranges are inclusive.
+
+    Returns:
+        np.ndarray: structured job array (see job_table.as_job_array).
+    """
+    rng = np.random.default_rng(seed)
+    p = rng.integers(processing_range[0], processing_range[1] + 1, n)
+    horizon = max(1.0, p.sum() / batch_size)
+    r = rng.integers(0, int(release_factor * horizon) + 1, n)
+    low = max(0.0, 1 - tightness - due_range / 2) * horizon
+    high = max(low, (1 - tightness + due_range / 2) * horizon)
+    slack = np.rint(rng.uniform(low, high, n)).astype(np.int64)
+    return as_job_array(JobTable({
+        'id': np.array([f"J{i}" for i in range(1, n + 1)]),
+        'size': rng.integers(size_range[0], size_range[1] + 1, n),
+        'weight': rng.integers(weight_range[0], weight_range[1] + 1, n),
+        'processing_time': p,
+        'release_time': r,
+        'due_date': r + p + slack,
+        'energy_consumption': rng.integers(energy_range[0], energy_range[1] + 1, n),
+    }))
+
+
+# -----------------------------
+# 2. Scheduler registry
+# -----------------------------
+def _script_heuristic(filename, function):
+    def run(jobs, seed):
+        return getattr(load_script(filename), function)(jobs)
+    return run
+
+
+def _capacity_edd(jobs, seed):
+    by_id = {job['id']: job for job in job_records(jobs)}
+    return [[by_id[job_id] for job_id in batch]
+            for batch in load_script("classical approach.py").schedule_jobs(jobs=jobs)]
+
+
+def _capacity_best_fit(jobs, seed):
+    by_id = {job['id']: job for job in job_records(jobs)}
+    return [[by_id[job_id] for job_id in batch]
+            for batch in load_script("classical approach.py").schedule_jobs(jobs=jobs, packing="best_fit")]
+
+
+def _release_capacity(jobs, seed):
+    return load_script("bo research1.py").allocate_batches(jobs)
+
+
+def _online(jobs, seed):
+    from online_dispatcher import dispatch_stream
+    stream = job_records(jobs, np.argsort(jobs['release_time'], kind='stable'))
+    return [batch.jobs for batch in dispatch_stream(stream, load_script("bo research1.py").BATCH_CAPACITY)]
+
+
+def _local_search(jobs, seed):
+    from local_search import improve_batches
+    batches = load_script("edd+advanced schedulingfinal.py").edd_scheduling(jobs)
+    # Descent with a move budget rather than a time budget keeps the TWT reproducible
+    return improve_batches(batches, model="serial", time_limit=float("inf"), max_moves=2000,
+                           seed=seed, temperature=0)[0]
+
+
+def _decomposed(jobs, seed):
+    from decomposition import solve_decomposed
+    return solve_decomposed(jobs, seed=seed).batches
+
+
+def _portfolio(jobs, seed):
+    from portfolio import portfolio_scheduling
+    return portfolio_scheduling(jobs).batches
+
+
+def _exact(jobs, seed):
+    from exact_solver import solve_exact
+    return solve_exact(job_records(jobs), max_batch_size=4, node_limit=20000).batches
+
+
+def _cobyla(jobs, seed):
+    module = load_script("QUBO AND COBYLA.py")
+    return module.simulate_burnin(jobs['processing_time'], jobs['due_date'], jobs['weight'],
+                                  num_runs=20, random_seed=seed)[1]
+
+
+def _qaoa(jobs, seed):
+    module = load_script("QAOA.py")
+    return module.simulate_burnin_qaoa(jobs['processing_time'].tolist(), jobs['due_date'].tolist(),
+                                       jobs['weight'].tolist(), p=1, backend="statevector")[1]
+
+
+# name -> (runner(jobs, seed), largest n to run it at (None: any), what it
+# returns, script to import before timing). "batches" results are scored with
+# the serial oven model; "objective" results report the solver's own objective.
+SCHEDULERS = {
+    "edd": (_script_heuristic("edd+spt+wspt.py", "edd_scheduling"), None, "batches", "edd+spt+wspt.py"),
+    "spt": (_script_heuristic("edd+spt+wspt.py", "spt_scheduling"), None, "batches", "edd+spt+wspt.py"),
+    "wspt": (_script_heuristic("edd+spt+wspt.py", "wspt_scheduling"), None, "batches", "edd+spt+wspt.py"),
+    "hybrid": (_script_heuristic("edd+spt+wspt.py", "hybrid_scheduling"), None, "batches", "edd+spt+wspt.py"),
+    "advanced_edd": (_script_heuristic("edd+advanced schedulingfinal.py", "edd_scheduling"), None, "batches",
+                     "edd+advanced schedulingfinal.py"),
+    "advanced_hybrid": (_script_heuristic("edd+advanced schedulingfinal.py", "advanced_hybrid_scheduling"),
+                        None, "batches", "edd+advanced schedulingfinal.py"),
+    "capacity_edd": (_capacity_edd, None, "batches", "classical approach.py"),
+    "capacity_best_fit": (_capacity_best_fit, None, "batches", "classical approach.py"),
+    "release_capacity": (_release_capacity, None, "batches", "bo research1.py"),
+    "online": (_online, None, "batches", "bo research1.py"),
+    "local_search": (_local_search, 20_000, "batches", "edd+advanced schedulingfinal.py"),
+    "decomposed": (_decomposed, 5_000, "batches", None),
+    "portfolio": (_portfolio, None, "batches", None),
+    "exact": (_exact, 12, "batches", None),
+    "cobyla": (_cobyla, 20, "objective", "QUBO AND COBYLA.py"),
+    "qaoa": (_qaoa, 10, "objective", "QAOA.py"),
+}
+
+
+def serial_twt(jobs, batches):
+    """Total weighted tardiness of a batch list on one oven (batch_evaluation "serial" model)."""
+    flat = [job for batch in batches for job in batch]
+    if flat and all(isinstance(job, JobRecord) and job.jobs is jobs for job in flat):
+        # Records viewing the instance array: gather the columns by index
+        index = np.fromiter((job.index for job in flat), dtype=np.intp, count=len(flat))
+        assignment = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+        columns = {name: jobs[name][index] for name in ('release_time', 'processing_time', 'due_date', 'weight')}
+    else:
+        columns = batches_to_columns(batches)
+        assignment = columns['assignment']
+    return evaluate_batches(columns['release_time'], columns['processing_time'], columns['due_date'],
+                            columns['weight'], assignment, model="serial").total_weighted_tardiness.item()
+
+
+# -----------------------------
+# 3. Benchmark runner
+# -----------------------------
+def run_benchmark(sizes, schedulers=None, seed=0, repeats=1, memory=True, **instance_options):
+    """
+    Run schedulers over generated instances of each size.
+
+    Wall time is the best of `repeats` untraced runs, after the scheduler's
+    script has been imported; peak memory comes from one extra run under
+    tracemalloc (NumPy buffers included) when `memory` is set. Console output
+    of the schedulers is suppressed. Schedulers whose size limit is below n
+    are skipped.
+
+    Returns:
+        list[dict]: one record per (scheduler, n) with wall_time, peak_memory_mb,
+        twt, kind, batches and status.
+    """
+    names = schedulers or list(SCHEDULERS)
+    unknown = [name for name in names if name not in SCHEDULERS]
+    if unknown:
+        raise ValueError(f"Unknown schedulers {unknown}; expected any of {list(SCHEDULERS)}")
+    for name in names:
+        if SCHEDULERS[name][3] is not None:
+            load_script(SCHEDULERS[name][3])
+    results = []
+    for n in sizes:
+        jobs = generate_instance(n, seed, **instance_options)
+        for name in names:
+            runner, max_n, kind, _ = SCHEDULERS[name]
+            if max_n is not None and n > max_n:
+                continue
+            record = {"scheduler": name, "n": n, "seed": seed, "kind": kind}
+            try:
+                times = []
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        output = runner(jobs, seed)
+                        times.append(time.perf_counter() - start)
+                    record["wall_time"] = min(times)
+                    if memory:
+                        tracemalloc.start()
+                        runner(jobs, seed)
+                        record["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                        tracemalloc.stop()
+                if kind == "batches":
+                    record["twt"] = serial_twt(jobs, output)
+                    record["batches"] = len(output)
+                else:
+                    record["twt"] = float(output)
+                record["status"] = "ok"
+            except Exception as e:  # keep benchmarking the other schedulers
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                record["status"] = f"error: {type(e).__name__}: {e}"
+            results.append(record)
+    return results
+
+
+def compare_to_baseline(results, baseline, time_tolerance=0.25, min_seconds=0.01):
+    """
+    Match results to a baseline run by (scheduler, n).
+
+    A row is a regression when its wall time exceeds the baseline by more
+    than `time_tolerance` (relative) and `min_seconds` (absolute, to ignore
+    timer noise on tiny runs), or its TWT is worse for the same seed.
+
+    Returns:
+        list[dict]: scheduler, n, time_ratio, twt_delta and regression flags.
+    """
+    reference = {(row["scheduler"], row["n"]): row for row in baseline if row.get("status") == "ok"}
+    rows = []
+    for row in results:
+        base = reference.get((row["scheduler"], row["n"]))
+        if base is None or row.get("status") != "ok":
+            continue
+        time_ratio = row["wall_time"] / base["wall_time"] if base["wall_time"] > 0 else float("inf")
+        twt_delta = row["twt"] - base["twt"] if row["seed"] == base["seed"] else None
+        rows.append({
+            "scheduler": row["scheduler"],
+            "n": row["n"],
+            "time_ratio": time_ratio,
+            "twt_delta": twt_delta,
+            "slower": time_ratio > 1 + time_tolerance and row["wall_time"] - base["wall_time"] > min_seconds,
+            "worse": twt_delta is not None and twt_delta > 1e-9,
+        })
+    return rows
+
+
+def _print_table(results, comparison):
+    # "objective" rows hold the solver's own objective (QUBO energy, can be
+    # negative) in record["twt"]; it gets its own column so it is never read as TWT
+    ratios = {(row["scheduler"], row["n"]): row for row in comparison}
+    print(f"{'scheduler':<18}{'n':>9}{'time [s]':>11}{'peak [MB]':>11}{'TWT':>16}{'objective':>16}  vs baseline")
+    for row in results:
+        if row["status"] != "ok":
+            print(f"{row['scheduler']:<18}{row['n']:>9}  {row['status']}")
+            continue
+        peak = row.get("peak_memory_mb")
+        change = ratios.get((row["scheduler"], row["n"]))
+        objective = row.get("kind") == "objective"
+        note = ""
+        if change is not None:
+            note = f"x{change['time_ratio']:.2f} time"
+            if change["twt_delta"]:
+                note += f", {'objective' if objective else 'TWT'} {change['twt_delta']:+g}"
+            if change["slower"] or change["worse"]:
+                note += "  REGRESSION"
+        twt, value = ("", format(row['twt'], 'g')) if objective else (format(row['twt'], 'g'), "")
+        print(f"{row['scheduler']:<18}{row['n']:>9}{row['wall_time']:>11.4f}"
+              f"{'' if peak is None else format(peak, '.1f'):>11}{twt:>16}{value:>16}  {note}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the burn-in schedulers on seeded instances.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--schedulers", nargs="+", choices=list(SCHEDULERS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--tightness", type=float, default=0.5)
+    parser.add_argument("--due-range", type=float, default=0.6)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier output file to compare against")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--metrics", help="also write stage timers and counters (see metrics.py) to this "
+                                          "JSON file; timings then include the instrumentation")
+    args = parser.parse_args(argv)
+
+    with metrics.collect(args.metrics) if args.metrics else contextlib.nullcontext():
+        results = run_benchmark(args.sizes, args.schedulers, args.seed, args.repeats, not args.no_memory,
+                                tightness=args.tightness, due_range=args.due_range)
+    comparison = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            comparison = compare_to_baseline(results, json.load(handle)["results"], args.time_tolerance)
+
+    report = {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "tightness": args.tightness,
+            "due_range": args.due_range,
+            "baseline": args.baseline,
+        },
+        "results": results,
+        "comparison": comparison,
+    }
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    _print_table(results, comparison)
+    print(f"\nResults written to {args.output}")
+
+    regressions = [row for row in comparison if row["slower"] or row["worse"]]
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+import math
+from bisect import bisect_left, insort
+
+import numpy as np
+
+import metrics
+from job_table import job_columns, job_records
+
+# Packing rules. Every rule sees the jobs of one due-date window at a time;
+# batches never mix windows.
+#   "next_fit":            close the open batch as soon as a job does not fit
+#                          (the rule classical approach.py and bo research1.py use)
+#   "first_fit":           lowest-numbered batch with room, in job order
+#   "best_fit":            batch with the least room left that still fits
+#   "first_fit_decreasing" / "best_fit_decreasing": the same on the window's
+#                          jobs sorted by size, largest first
+MODES = ("next_fit", "first_fit", "best_fit", "first_fit_decreasing", "best_fit_decreasing")
+
+
+# -----------------------------
+# Open-batch indexes
+# -----------------------------
+def _first_fit(sizes, capacity, max_batch_size):
+    """
+    First fit with a max segment tree over batch slots.
+
+    Leaves hold the room left in each batch; unopened slots hold the full
+    capacity, so the leftmost leaf that fits is either an open batch or the
+    next batch to open. Closed batches (max_batch_size reached) hold -inf.
+    """
+    leaves = 1 << max(len(sizes) - 1, 0).bit_length()
+    tree = [capacity] * (2 * leaves)
+    counts = []
+    assignment = []
+    closed = float("-inf")
+    for size in sizes:
+        node = 1
+        while node < leaves:
+            node <<= 1
+            if tree[node] < size:
+                node += 1
+        batch = node - leaves
+        if batch == len(counts):
+            counts.append(0)
+        counts[batch] += 1
+        assignment.append(batch)
+        room = tree[node] - size
+        tree[node] = closed if max_batch_size and counts[batch] >= max_batch_size else room
+        # Room only shrinks, so stop at the first ancestor whose maximum is unchanged
+        while node > 1:
+            sibling = tree[node ^ 1]
+            best = tree[node] if tree[node] > sibling else sibling
+            node >>= 1
+            if tree[node] == best:
+                break
+            tree[node] = best
+    return assignment, len(counts)
+
+
+class _SortedRooms:
+    """
+    Sorted multiset of (room, batch) pairs split into blocks of bounded length.
+
+    The block maxima are kept in a separate sorted list, so finding the
+    smallest pair >= a key is two bisections and an insert or removal moves
+    at most one block, O(log n + load) per operation.
+    """
+
+    def __init__(self, load=256):
+        self.load = load
+        self.blocks = []
+        self.maxes = []
+
+    def add(self, item):
+        blocks, maxes = self.blocks, self.maxes
+        if not blocks:
+            blocks.append([item])
+            maxes.append(item)
+            return
+        i = bisect_left(maxes, item)
+        if i == len(blocks):
+            i -= 1
+            blocks[i].append(item)
+            maxes[i] = item
+        else:
+            insort(blocks[i], item)
+        block = blocks[i]
+        if len(block) > 2 * self.load:
+            blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            maxes[i:i + 1] = [block[self.load - 1], block[-1]]
+
+    def pop_ceiling(self, key):
+        """Remove and return the smallest pair >= key, or None."""
+        maxes = self.maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            return None
+        block = self.blocks[i]
+        j = bisect_left(block, key)
+        item = block.pop(j)
+        if not block:
+            del self.blocks[i], maxes[i]
+        elif j == len(block):
+            maxes[i] = block[-1]
+        return item
+
+
+def _best_fit(sizes, capacity, max_batch_size):
+    rooms = _SortedRooms()
+    counts = []
+    assignment = []
+    for size in sizes:
+        # (size, -1) sorts before every (room >= size, batch) pair
+        found = rooms.pop_ceiling((size, -1))
+        if found is None:
+            room, batch = capacity, len(counts)
+            counts.append(0)
+        else:
+            room, batch = found
+        counts[batch] += 1
+        assignment.append(batch)
+        if not max_batch_size or counts[batch] < max_batch_size:
+            rooms.add((room - size, batch))
+    return assignment, len(counts)
+
+
+def _next_fit(sizes, capacity, max_batch_size):
+    assignment = []
+    batch, load, count = -1, capacity, 0
+    for size in sizes:
+        if batch < 0 or load + size > capacity or (max_batch_size and count >= max_batch_size):
+            batch, load, count = batch + 1, 0, 0
+        load += size
+        count += 1
+        assignment.append(batch)
+    return assignment, batch + 1
+
+
+_PACKERS = {
+    "next_fit": _next_fit,
+    "first_fit": _first_fit,
+    "best_fit": _best_fit,
+    "first_fit_decreasing": _first_fit,
+    "best_fit_decreasing": _best_fit,
+}
+
+
+# -----------------------------
+# Packing
+# -----------------------------
+def due_date_windows(due_dates, window):
+    """
+    Window label per job for due dates in non-decreasing order.
+
+    A window opens at the first unassigned due date and takes every job due
+    at most `window` later, as edd_scheduling groups its batches (same edge
+    rule as window_starts in edd+spt+wspt.py). Each window costs one binary
+    search, O(w log n) for w windows.
+    """
+    if window < 0:
+        raise ValueError(f"window must be non-negative, got {window}")
+    due_dates = np.asarray(due_dates)
+    n = due_dates.size
+    labels = np.empty(n, dtype=np.int64)
+    start, label = 0, 0
+    while start < n:
+        anchor = due_dates[start]
+        end = int(np.searchsorted(due_dates, anchor + window, side="right"))
+        # anchor + window is rounded for float keys; settle the edge on
+        # due - anchor <= window, the distance the batching rule compares
+        while end < n and due_dates[end] - anchor <= window:
+            end += 1
+        while due_dates[end - 1] - anchor > window:
+            end -= 1
+        labels[start:end] = label
+        start, label = end, label + 1
+    return labels
+
+
+@metrics.timed("bin_packing")
+def pack_sizes(sizes, capacity, mode="first_fit", windows=None, max_batch_size=None):
+    """
+    Pack items into capacity-limited batches.
+
+    First fit uses a segment tree and best fit a blocked sorted list over the
+    open batches, so both run in O(n log n) rather than scanning every open
+    batch per item.
+
+    Args:
+        sizes (array): item sizes in processing order.
+        capacity (float): batch capacity.
+        mode (str): one of MODES.
+        windows (array | None): non-decreasing window label per item; items
+            of different windows never share a batch. None packs all items
+            as one window.
+        max_batch_size (int | None): optional limit on items per batch.
+
+    Returns:
+        np.ndarray: batch index per item; batches are numbered window by
+        window in the order they were opened.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+    sizes = np.asarray(sizes)
+    if sizes.size and sizes.max() > capacity:
+        raise ValueError(f"an item of size {sizes.max()} exceeds capacity {capacity}")
+    packer = _PACKERS[mode]
+    decreasing = mode.endswith("_decreasing")
+
+    if windows is None:
+        bounds = [0, sizes.size]
+    else:
+        windows = np.asarray(windows)
+        bounds = [0, *np.flatnonzero(windows[1:] != windows[:-1]) + 1, sizes.size]
+
+    assignment = np.empty(sizes.size, dtype=np.int64)
+    opened = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+        window = sizes[start:end]
+        order = np.argsort(-window, kind="stable") if decreasing else slice(None)
+        local, count = packer(window[order].tolist(), capacity, max_batch_size)
+        assignment[np.arange(start, end)[order]] = np.asarray(local, dtype=np.int64) + opened
+        opened += count
+    metrics.count("batches_formed", opened)
+    return assignment
+
+
+def pack_jobs(jobs, capacity, mode="first_fit", window=None, max_batch_size=None,
+              size_key='size', order_key='due_date'):
+    """
+    Capacity-aware batches of jobs, packed within due-date windows.
+
+    Jobs are taken in `order_key` order (ties in input order). With `window`
+    set and order_key 'due_date', jobs whose due dates lie more than `window`
+    apart are never batched together.
+
+    Args:
+        jobs (list[dict] | JobTable | array): job set.
+        capacity (float): oven capacity in `size_key` units.
+        mode (str): one of MODES.
+        window (float | None): due-date window width; None packs freely.
+        max_batch_size (int | None): optional limit on jobs per batch.
+        size_key (str): job key holding the size.
+        order_key (str): job key the jobs are sorted by before packing.
+
+    Returns:
+        list[list[JobRecord]]: batches in opening order; within a batch jobs
+        keep the packing order.
+    """
+    jobs = job_columns(jobs)
+    with metrics.timer("sort"):
+        order = np.argsort(jobs[order_key], kind="stable")
+    windows = None
+    if window is not None:
+        if order_key != 'due_date':
+            raise ValueError("due-date windows need the jobs in due-date order (order_key='due_date')")
+        windows = due_date_windows(jobs['due_date'][order], window)
+    assignment = pack_sizes(jobs[size_key][order], capacity, mode, windows, max_batch_size)
+    # Group the sorted jobs by batch, keeping the packing order inside each batch
+    grouped = np.argsort(assignment, kind="stable")
+    bounds = np.flatnonzero(np.diff(assignment[grouped])) + 1
+    return [job_records(jobs, rows) for rows in np.split(order[grouped], bounds)]
+
+
+# -----------------------------
+# Utilization
+# -----------------------------
+def batch_loads(assignment, sizes):
+    """Summed size per batch for a batch index vector."""
+    return np.bincount(np.asarray(assignment), weights=np.asarray(sizes, dtype=float))
+
+
+def utilization_report(loads, capacity):
+    """
+    Capacity usage of a batching.
+
+    Args:
+        loads (array): summed job size of each batch (see batch_loads).
+        capacity (float): oven capacity.
+
+    Returns:
+        dict: batch count, the size lower bound ceil(total / capacity) and
+        the batches above it, mean/min utilization and total unused capacity.
+    """
+    loads = np.asarray(loads, dtype=float)
+    total = loads.sum()
+    lower_bound = math.ceil(total / capacity - 1e-9) if loads.size else 0
+    return {
+        'batches': int(loads.size),
+        'lower_bound': int(lower_bound),
+        'excess_batches': int(loads.size - lower_bound),
+        'mean_utilization': float(loads.mean() / capacity) if loads.size else 0.0,
+        'min_utilization': float(loads.min() / capacity) if loads.size else 0.0,
+        'unused_capacity': float(loads.size * capacity - total),
+    }
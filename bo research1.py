@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
 
+from bin_packing import pack_sizes
+from job_table import job_columns, job_records
+from online_dispatcher import dispatch_stream
+
 # Define the job data
 jobs = [
     {'id': 'J1', 'size': 4, 'processing_time': 5, 'release_time': 10, 'due_date': 21, 'weight': 4},
@@ -17,54 +22,82 @@ jobs = [
 # Machine capacity
 BATCH_CAPACITY = 20
 
-# Sort jobs by release time first, then by due date
-jobs = sorted(jobs, key=lambda x: (x['release_time'], x['due_date']))
+# Form batches with the event-driven online dispatcher instead of sorting the
+# whole job list up front
+ONLINE_MODE = False
+
+# Bin-packing rule for the offline batches (see bin_packing.MODES)
+PACKING_MODE = "next_fit"
+
+def allocate_batches(jobs, capacity=BATCH_CAPACITY, online=ONLINE_MODE, packing=PACKING_MODE):
+    """Fill batches up to `capacity` in release-time order (ties by due date)."""
+    # Sort jobs by release time first, then by due date
+    source, jobs = jobs, job_columns(jobs)
+    jobs = job_records(jobs, np.lexsort((jobs['due_date'], jobs['release_time'])), source)
+
+    if online:
+        return [batch.jobs for batch in dispatch_stream(jobs, capacity)]
 
-# Allocate jobs to batches
-batches = []
-current_batch = []
-current_capacity = 0
+    if packing != "next_fit":
+        assignment = pack_sizes([job['size'] for job in jobs], capacity, packing).tolist()
+        packed = [[] for _ in range(max(assignment, default=-1) + 1)]
+        for job, batch in zip(jobs, assignment):
+            packed[batch].append(job)
+        return packed
 
-for job in jobs:
-    if current_capacity + job['size'] <= BATCH_CAPACITY:
-        current_batch.append(job)
-        current_capacity += job['size']
-    else:
+    # Allocate jobs to batches
+    batches = []
+    current_batch = []
+    current_capacity = 0
+
+    for job in jobs:
+        if current_capacity + job['size'] <= capacity:
+            current_batch.append(job)
+            current_capacity += job['size']
+        else:
+            batches.append(current_batch)
+            current_batch = [job]
+            current_capacity = job['size']
+
+    # Add the last batch
+    if current_batch:
         batches.append(current_batch)
-        current_batch = [job]
-        current_capacity = job['size']
-
-# Add the last batch
-if current_batch:
-    batches.append(current_batch)
-
-# Calculate batch-wise information
-batch_info = []
-for batch_id, batch in enumerate(batches, start=1):
-    release_time = max(job['release_time'] for job in batch)
-    processing_time = max(job['processing_time'] for job in batch)
-    completion_time = release_time + processing_time
-    utilization = sum(job['size'] for job in batch)
-    tardiness = sum(
-        max(0, completion_time - job['due_date']) for job in batch
-    )
-    weighted_tardiness = sum(
-        max(0, completion_time - job['due_date']) * job['weight'] for job in batch
-    )
-    batch_info.append({
-        'Batch ID': batch_id,
-        'Jobs': ', '.join(job['id'] for job in batch),
-        'Processing Time': processing_time,
-        'Release Time': release_time,
-        'Completion Time': completion_time,
-        'Utilization': utilization,
-        'Tardiness': tardiness,
-        'Weighted Tardiness': weighted_tardiness,
-    })
-
-# Create a pandas DataFrame
-df = pd.DataFrame(batch_info)
-
-# Display the table
-print("\nBatch-wise Optimal Solution:")
-print(df.to_string(index=False))
+
+    return batches
+
+
+def batch_table(batches):
+    """Batch-wise release, completion, utilization and (weighted) tardiness."""
+    batch_info = []
+    for batch_id, batch in enumerate(batches, start=1):
+        release_time = max(job['release_time'] for job in batch)
+        processing_time = max(job['processing_time'] for job in batch)
+        completion_time = release_time + processing_time
+        utilization = sum(job['size'] for job in batch)
+        tardiness = sum(
+            max(0, completion_time - job['due_date']) for job in batch
+        )
+        weighted_tardiness = sum(
+            max(0, completion_time - job['due_date']) * job['weight'] for job in batch
+        )
+        batch_info.append({
+            'Batch ID': batch_id,
+            'Jobs': ', '.join(job['id'] for job in batch),
+            'Processing Time': processing_time,
+            'Release Time': release_time,
+            'Completion Time': completion_time,
+            'Utilization': utilization,
+            'Tardiness': tardiness,
+            'Weighted Tardiness': weighted_tardiness,
+        })
+
+    # Create a pandas DataFrame
+    return pd.DataFrame(batch_info)
+
+
+if __name__ == "__main__":
+    df = batch_table(allocate_batches(jobs))
+
+    # Display the table
+    print("\nBatch-wise Optimal Solution:")
+    print(df.to_string(index=False))
@@ -1,5 +1,12 @@
 import random
 import math
+
+import numpy as np
+
+from bin_packing import pack_sizes
+from job_table import JobTable, job_columns, job_records
+from online_dispatcher import dispatch_stream
+
 # Step 1: Problem Initialization
 num_jobs = 25  # Number of jobs (Example for N=25)
 batch_capacity = 50  # Example batch capacity
@@ -9,22 +16,52 @@ due_dates = [release_times[i] + processing_times[i] + random.randint(1, 30) for
 job_sizes = [random.randint(4, 10) for _ in range(num_jobs)]
 
 # Step 2: Heuristic Scheduling
-def schedule_jobs():
-    """Schedules jobs using a simple dispatching heuristic (EDD)."""
-    jobs = list(range(num_jobs))
-    sorted_jobs = sorted(jobs, key=lambda x: due_dates[x])  # Earliest Due Date (EDD) heuristic
+def schedule_jobs(online=False, jobs=None, packing="next_fit"):
+    """Schedules jobs using a simple dispatching heuristic (EDD).
+
+    With online=True the jobs are fed to the event-driven dispatcher in release
+    order instead, and each batch only holds jobs released by its start time.
+
+    `jobs` (a JobTable or a list of job dicts with id, size, release_time,
+    processing_time and due_date) replaces the random instance above; the
+    batches then hold job ids rather than indices.
+
+    `packing` picks the bin-packing rule applied to the EDD order (see
+    bin_packing.MODES); the default next fit closes a batch as soon as one
+    job does not fit.
+    """
+    if jobs is None:
+        jobs = JobTable({'id': np.arange(num_jobs), 'size': job_sizes, 'weight': job_sizes,
+                         'release_time': release_times, 'processing_time': processing_times,
+                         'due_date': due_dates})
+    jobs = job_columns(jobs)
+
+    if online:
+        stream = job_records(jobs, np.argsort(jobs['release_time'], kind='stable'))
+        return [[job['id'] for job in batch.jobs] for batch in dispatch_stream(stream, batch_capacity)]
+
+    order = np.argsort(jobs['due_date'], kind='stable')  # Earliest Due Date (EDD) heuristic
+    sorted_ids = jobs['id'][order].tolist()
+    sorted_sizes = jobs['size'][order].tolist()
+    if packing != "next_fit":
+        assignment = pack_sizes(sorted_sizes, batch_capacity, packing).tolist()
+        schedule = [[] for _ in range(max(assignment, default=-1) + 1)]
+        for job, batch in zip(sorted_ids, assignment):
+            schedule[batch].append(job)
+        return schedule
+
     schedule = []
     current_batch = []
     current_capacity = 0
 
-    for job in sorted_jobs:
-        if current_capacity + job_sizes[job] <= batch_capacity:
+    for job, size in zip(sorted_ids, sorted_sizes):
+        if current_capacity + size <= batch_capacity:
             current_batch.append(job)
-            current_capacity += job_sizes[job]
+            current_capacity += size
         else:
             schedule.append(current_batch)
             current_batch = [job]
-            current_capacity = job_sizes[job]
+            current_capacity = size
 
     if current_batch:
         schedule.append(current_batch)
@@ -42,8 +79,9 @@ def calculate_twt(schedule):
             total_twt += job_sizes[job] * tardiness
     return total_twt
 
-# Run the scheduler and display results
-schedule = schedule_jobs()
-twt = calculate_twt(schedule)
-print("Job Schedule (Batch-wise):", schedule)
-print("Total Weighted Tardiness (TWT):", twt)
+if __name__ == "__main__":
+    # Run the scheduler and display results
+    schedule = schedule_jobs()
+    twt = calculate_twt(schedule)
+    print("Job Schedule (Batch-wise):", schedule)
+    print("Total Weighted Tardiness (TWT):", twt)
@@ -0,0 +1,540 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+import metrics
+from batch_evaluation import evaluate_batches
+from exact_solver import _fill_batches, _serial_twt, solve_exact
+from job_table import job_columns, job_fields, job_records
+from qubo_model import decode_start_times, dispatch_order, sequence_to_bitstring, time_indexed_qubo
+from qubo_solvers import solve_qubo
+from statevector_qaoa import qubo_cost_vector, run_statevector_qaoa
+
+# Sub-solvers a window can be routed to. "auto" tries them in the order
+# qaoa (when the window's time-indexed QUBO fits in qaoa_qubits), exact
+# (windows of at most exact_limit jobs), qubo (simulated annealing on the
+# same QUBO, up to qubo_variables variables) and falls back to heuristic.
+# A k-job window needs at least k * k QUBO variables (plus slack bits when
+# max_batch_size < k), so qaoa_qubits=16 admits windows of at most 4 jobs:
+# with the default window_size=8, "auto" does not reach QAOA.
+SOLVERS = ("auto", "qaoa", "exact", "qubo", "heuristic")
+WINDOW_KEYS = ("due_date", "release_time")
+
+
+class WindowResult(NamedTuple):
+    """Outcome of one window.
+
+    `batches` hold window-local job indices. `accepted` is False when the
+    routed solver failed (e.g. an infeasible QUBO sample) or did worse than
+    the dispatch-rule heuristic or, for a seam window, the batches it would
+    replace; those were kept instead. `kept` names the solver whose batches
+    the window kept: `solver` when accepted, else "heuristic" or "incumbent".
+    """
+    index: int
+    solver: str
+    accepted: bool
+    batches: list
+    twt: float
+    elapsed: float
+    kept: str
+
+
+class DecompositionResult(NamedTuple):
+    """Outcome of :func:`solve_decomposed`.
+
+    `stitched_twt` is the serial TWT of the concatenated first-pass window
+    solutions, `total_weighted_tardiness` the TWT after the seam pass and
+    boundary repair. `windows` lists both passes, and `solvers` the
+    sub-solver whose batches each of those windows kept (WindowResult.kept).
+    """
+    batches: list
+    total_weighted_tardiness: float
+    stitched_twt: float
+    windows: list
+    elapsed: float
+    solvers: list
+
+
+# -----------------------------
+# Windows
+# -----------------------------
+def make_windows(n, window_size):
+    """Consecutive (start, end) job ranges of at most `window_size` jobs."""
+    if window_size < 1:
+        raise ValueError(f"window_size must be at least 1, got {window_size}")
+    return [(start, min(start + window_size, n)) for start in range(0, n, window_size)]
+
+
+def seam_windows(batches, seams, window_size):
+    """
+    Batch ranges straddling the seams, for the second, staggered pass.
+
+    Each range starts as the two batches meeting at a seam and grows one
+    batch at a time, alternating sides, while it holds at most
+    `window_size` jobs. Ranges never overlap each other, so they can be
+    re-solved concurrently, but each overlaps the two windows it joins.
+
+    Returns:
+        list[tuple]: inclusive (first batch, last batch) per seam.
+    """
+    sizes = [len(members) for members in batches]
+    ranges = []
+    limit = 0
+    for seam in seams:
+        lo, hi = seam - 1, seam
+        if lo < limit or hi >= len(batches) or sizes[lo] + sizes[hi] > window_size:
+            continue
+        jobs = sizes[lo] + sizes[hi]
+        grown = True
+        while grown:
+            grown = False
+            if lo - 1 >= limit and jobs + sizes[lo - 1] <= window_size:
+                lo -= 1
+                jobs += sizes[lo]
+                grown = True
+            if hi + 1 < len(batches) and jobs + sizes[hi + 1] <= window_size:
+                hi += 1
+                jobs += sizes[hi]
+                grown = True
+        ranges.append((lo, hi))
+        limit = hi + 1
+    return ranges
+
+
+def _schedule_context(batches, r, p, d, w):
+    """
+    Oven-free time before every batch of a serial schedule and the cost rate of delay from it on.
+
+    `free[b]` is the completion of batch b - 1 (0 before the first batch).
+    `rate[b]` is the weight of the tardy jobs from batch b up to the next
+    idle gap: what one extra time unit spent before batch b costs
+    downstream (0 past the end or when the oven idles before batch b).
+    """
+    count = len(batches)
+    free = np.zeros(count + 1)
+    idle = np.ones(count + 1, dtype=bool)
+    tardy_weight = np.zeros(count + 1)
+    for b, members in enumerate(batches):
+        ready = r[members].max()
+        idle[b] = ready > free[b]
+        free[b + 1] = max(free[b], ready) + p[members].max()
+        tardy_weight[b] = w[members][d[members] < free[b + 1]].sum()
+    # Delay propagates through back-to-back batches until the oven idles
+    rate = np.zeros(count + 1)
+    for b in range(count - 1, -1, -1):
+        rate[b] = tardy_weight[b] + (0 if idle[b + 1] else rate[b + 1])
+    rate[idle] = 0
+    return free, rate
+
+
+# -----------------------------
+# Sub-solvers (window-local indices, times relative to the window)
+# -----------------------------
+def _fits(sizes, capacity):
+    if capacity is None:
+        return lambda members: True
+    return lambda members: sizes[members].sum() <= capacity
+
+
+def _heuristic(r, p, d, w, sizes, max_batch_size, capacity):
+    """Best of EDD, WSPT and release order cut into full batches."""
+    fits = _fits(sizes, capacity)
+    orders = [dispatch_order(p, d, w, "edd"), dispatch_order(p, d, w, "wspt"), np.lexsort((d, r))]
+    candidates = [_fill_batches(order.tolist(), max_batch_size, fits) for order in orders]
+    return min(candidates, key=lambda batches: _serial_twt(batches, r, p, d, w))
+
+
+def _exact(r, p, d, w, sizes, max_batch_size, capacity, node_limit):
+    jobs = [{'index': j, 'release_time': r[j], 'processing_time': p[j], 'due_date': d[j],
+             'weight': w[j], 'size': sizes[j]} for j in range(p.size)]
+    result = solve_exact(jobs, max_batch_size, capacity, node_limit=node_limit)
+    return [[job['index'] for job in batch] for batch in result.batches]
+
+
+def _estimated_variables(p, max_batch_size):
+    horizon = int(p.sum())
+    slack = int(max_batch_size).bit_length() * horizon if max_batch_size < p.size else 0
+    return int(np.sum(horizon - p + 1)) + slack
+
+
+def _time_indexed(p, d, w, max_batch_size, max_variables):
+    """
+    Time-indexed QUBO of the window with at most `max_variables` variables.
+
+    Times are coarsened by the smallest power-of-two unit (up to the longest
+    job) that brings the variable count under the limit. Returns None when
+    even unit-length jobs need more.
+    """
+    unit, longest = 1, math.ceil(p.max())
+    while True:
+        scaled = np.ceil(p / unit).astype(np.int64)
+        if _estimated_variables(scaled, max_batch_size) <= max_variables:
+            return time_indexed_qubo(scaled, d / unit, w, batch_capacity=max_batch_size)
+        if unit >= longest:
+            return None
+        unit = min(unit * 2, longest)
+
+
+def _decode(model, bits):
+    starts, feasible = decode_start_times(model, bits)
+    if not feasible:
+        return None
+    return [np.flatnonzero(starts == t).tolist() for t in np.unique(starts)]
+
+
+def _qaoa(model, depth, edd):
+    cost = qubo_cost_vector(model.linear, model.quadratic, model.offset)
+    result = run_statevector_qaoa(None, None, p=depth, cost=cost,
+                                  warm_start=sequence_to_bitstring(model, edd))
+    return _decode(model, result.best_bitstring)
+
+
+def _qubo(model, seed):
+    solution = solve_qubo(model, "anneal", num_replicas=64, sweeps=200, seed=seed)
+    return _decode(model, solution.best_sample)
+
+
+def _route(solver, p, max_batch_size, options):
+    if solver != "auto":
+        return solver
+    n = p.size
+    if _time_indexed_fits(p, max_batch_size, options['qaoa_qubits']):
+        return "qaoa"
+    if n <= options['exact_limit']:
+        return "exact"
+    if _estimated_variables(np.ones(n, dtype=np.int64), max_batch_size) <= options['qubo_variables']:
+        return "qubo"
+    return "heuristic"
+
+
+def _time_indexed_fits(p, max_batch_size, max_variables):
+    # Unit-length jobs give the smallest model time coarsening can reach
+    return _estimated_variables(np.ones(p.size, dtype=np.int64), max_batch_size) <= max_variables
+
+
+def _solve_window(task):
+    """Solve one window; module-level so it can run in worker processes."""
+    index, columns, solver, options, seed = task
+    start = time.perf_counter()
+    r, p, d, w, sizes = (columns[name] for name in ('release_time', 'processing_time', 'due_date',
+                                                    'weight', 'size'))
+    # No batch starts before the estimated oven-free time; shift the window so
+    # that its earliest start is time 0 (tardiness is shift invariant)
+    r = np.maximum(r, columns['oven_free'])
+    origin = r.min()
+    r, d = r - origin, d - origin
+    U = min(options['max_batch_size'] or p.size, p.size)
+    capacity = options['capacity']
+
+    # Compare on window TWT plus the downstream cost of the window's makespan
+    def value(candidate):
+        return _serial_twt(candidate, r, p, d, w) + columns['delay_rate'] * _serial_completion(candidate, r, p)
+
+    fallback, fallback_name = _heuristic(r, p, d, w, sizes, U, capacity), "heuristic"
+    if columns.get('incumbent') is not None and value(columns['incumbent']) < value(fallback):
+        fallback, fallback_name = columns['incumbent'], "incumbent"
+    routed = _route(solver, p, U, options)
+    batches = None
+    if routed == "heuristic":
+        batches = fallback
+    elif routed == "exact":
+        batches = _exact(r, p, d, w, sizes, U, capacity, options['node_limit'])
+    elif routed in ("qaoa", "qubo"):
+        limit = options['qaoa_qubits'] if routed == "qaoa" else options['qubo_variables']
+        model = _time_indexed(p, d, w, U, limit)
+        if model is not None:
+            if routed == "qaoa":
+                batches = _qaoa(model, options['qaoa_depth'], dispatch_order(p, d, w, "edd"))
+            else:
+                batches = _qubo(model, seed)
+    else:
+        raise ValueError(f"Unknown solver {routed!r}; expected one of {SOLVERS}")
+
+    fits = _fits(sizes, capacity)
+    accepted = batches is not None and all(fits(members) for members in batches)
+    if accepted and value(batches) > value(fallback):
+        accepted = False
+    if not accepted:
+        batches = fallback
+    return WindowResult(index, routed, accepted, batches, float(_serial_twt(batches, r, p, d, w)),
+                        time.perf_counter() - start, routed if accepted else fallback_name)
+
+
+# -----------------------------
+# Boundary repair
+# -----------------------------
+def _tail_cost(r, p, d, w, batches):
+    """
+    Weighted tardiness of a fixed batch sequence as a function of the time T
+    (>= 0) at which the oven frees up before it.
+
+    Serial completions are max-plus linear in T: C_j(T) = max(C_j(0),
+    T + L_j), with L_j the summed batch lengths up to job j's batch. Each
+    job's cost is therefore w_j * (c_j + max(0, T - s_j)) for constants
+    c_j, s_j, and the whole tail is a convex piecewise-linear function of T
+    that costs one binary search to evaluate.
+
+    Returns:
+        callable: T (array) -> tail TWT (array).
+    """
+    if not batches:
+        return lambda T: np.zeros(np.shape(T))
+    jobs = np.concatenate([np.asarray(members) for members in batches])
+    labels = np.repeat(np.arange(len(batches)), [len(members) for members in batches])
+    lengths = np.array([p[members].max() for members in batches])
+    base = evaluate_batches(r[jobs], p[jobs], d[jobs], w[jobs], labels, model="serial").job_completion_time
+    due, weight = d[jobs], w[jobs]
+    late = np.maximum(base - due, 0)
+    breaks = due - np.cumsum(lengths)[labels] + late
+    order = np.argsort(breaks)
+    breaks, weight_sorted = breaks[order], weight[order]
+    cum_w = np.r_[0, np.cumsum(weight_sorted)]
+    cum_ws = np.r_[0, np.cumsum(weight_sorted * breaks)]
+    fixed = float(weight @ late)
+
+    def cost(T):
+        T = np.asarray(T, dtype=float)
+        k = np.searchsorted(breaks, T)
+        return fixed + cum_w[k] * T - cum_ws[k]
+    return cost
+
+
+def _apply(labels, move, position):
+    kind, a, b, i, j = move
+    labels = labels.copy()
+    if kind == "swap":
+        in_a = labels == a
+        labels[labels == b] = a
+        labels[in_a] = b
+    else:
+        labels[position[i]] = b
+        if kind == "exchange":
+            labels[position[j]] = a
+    return labels
+
+
+def _seam_moves(batches, lo, hi, max_batch_size, fits):
+    """Adjacent-interchange moves between consecutive batches lo..hi."""
+    moves = []
+    for a in range(lo, hi):
+        b = a + 1
+        first, second = batches[a], batches[b]
+        if not first or not second:
+            continue
+        moves.append(("swap", a, b, None, None))
+        for source, target, x, y in ((first, second, a, b), (second, first, b, a)):
+            if len(target) < max_batch_size:
+                moves.extend(("move", x, y, j, None) for j in source if fits(target + [j]))
+        for i in first:
+            for j in second:
+                rest_a = [k for k in first if k != i] + [j]
+                rest_b = [k for k in second if k != j] + [i]
+                if fits(rest_a) and fits(rest_b):
+                    moves.append(("exchange", a, b, i, j))
+    return moves
+
+
+def repair_seams(batches, r, p, d, w, seams, max_batch_size, sizes=None, capacity=None,
+                 radius=2, max_rounds=20):
+    """
+    Improve a stitched batch sequence around the window boundaries.
+
+    At each seam, every batch swap, single-job move and job exchange between
+    consecutive batches within `radius` of the seam is scored at once (serial
+    model) and the best improving move is applied, until none is left or
+    `max_rounds` is reached. Moves only touch the seam region: the region is
+    scored as a stack of assignment vectors behind the oven-free time of the
+    prefix, and the untouched tail through its closed-form cost in the
+    region's completion time (see _tail_cost), so a candidate costs
+    O(region) instead of O(n).
+
+    Args:
+        batches (list[list[int]]): batches of job indices in sequence order.
+        r, p, d, w (array): job columns.
+        seams (list[int]): batch positions where a window starts.
+        max_batch_size (int): maximum jobs per batch.
+        sizes (array | None), capacity (float | None): optional size limit.
+        radius (int): batches on each side of a seam that may change.
+        max_rounds (int): improving moves applied per seam at most.
+
+    Returns:
+        tuple: (repaired batches without empty ones, TWT)
+    """
+    batches = [list(members) for members in batches]
+    fits = _fits(np.asarray(sizes), capacity) if sizes is not None else _fits(None, None)
+    r, p, d, w = (np.asarray(column, dtype=float) for column in (r, p, d, w))
+
+    for seam in seams:
+        lo, hi = max(seam - radius, 0), min(seam + radius, len(batches)) - 1
+        prefix = [members for members in batches[:lo] if members]
+        free = float(_serial_completion(prefix, r, p)) if prefix else 0.0
+        tail = _tail_cost(r, p, d, w, [members for members in batches[hi + 1:] if members])
+        for _ in range(max_rounds):
+            moves = _seam_moves(batches, lo, hi, max_batch_size, fits)
+            if not moves:
+                break
+            # Region jobs behind a zero-length job released when the prefix frees the oven
+            region = [j for members in batches[lo:hi + 1] for j in members]
+            position = {j: k + 1 for k, j in enumerate(region)}
+            labels = np.r_[lo - 1, np.repeat(np.arange(lo, hi + 1), [len(m) for m in batches[lo:hi + 1]])]
+            stack = np.stack([labels] + [_apply(labels, move, position) for move in moves]) - (lo - 1)
+            index = np.asarray(region, dtype=np.int64)
+            result = evaluate_batches(np.r_[free, r[index]], np.r_[0.0, p[index]], np.r_[np.inf, d[index]],
+                                      np.r_[0.0, w[index]], stack, model="serial", num_batches=hi - lo + 2)
+            values = result.total_weighted_tardiness + tail(np.nanmax(result.completion_time, axis=1))
+            best = int(np.argmin(values[1:])) + 1
+            if values[best] >= values[0] - 1e-9:
+                break
+            kind, a, b, i, j = moves[best - 1]
+            if kind == "swap":
+                batches[a], batches[b] = batches[b], batches[a]
+            else:
+                batches[a] = [k for k in batches[a] if k != i] + ([j] if kind == "exchange" else [])
+                batches[b] = [k for k in batches[b] if k != j] + [i]
+            metrics.count("repair_moves")
+    batches = [members for members in batches if members]
+    return batches, float(_serial_twt(batches, r, p, d, w))
+
+
+def _serial_completion(batches, r, p):
+    free = 0
+    for members in batches:
+        free = max(free, r[members].max()) + p[members].max()
+    return free
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def _run_windows(tasks, n_workers):
+    if n_workers is None or n_workers <= 1:
+        results = [_solve_window(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            chunksize = max(1, len(tasks) // (4 * n_workers))
+            results = list(executor.map(_solve_window, tasks, chunksize=chunksize))
+    metrics.count("windows", len(results))
+    for result in results:
+        metrics.record(f"window_{result.solver}", result.elapsed)
+    return results
+
+
+def solve_decomposed(jobs, window_size=8, key="due_date", solver="auto", max_batch_size=4,
+                     capacity=None, size_key='size', weight_key='weight', n_workers=None, seed=None,
+                     resolve_seams=True, exact_limit=10, qaoa_qubits=16, qaoa_depth=1,
+                     qubo_variables=400, node_limit=20000, repair_radius=2):
+    """
+    Rolling-horizon decomposition of a large instance into small sub-problems.
+
+    Jobs are ordered by `key` (due-date or release-time windows) and cut into
+    windows of at most `window_size` jobs. Two passes of windows are solved,
+    each pass concurrently when `n_workers` > 1:
+
+      1. the disjoint windows, each by the sub-solver `solver` picks (see
+         SOLVERS), with the dispatch-rule heuristic as fallback so a failed
+         quantum sample never costs more than the heuristic;
+      2. with `resolve_seams`, staggered windows of whole batches straddling
+         every seam of pass 1 (see seam_windows), re-solved the same way and
+         kept only when they beat the batches they replace.
+
+    Windows only see their own jobs. A single serial pass over the current
+    schedule (EDD-style full batches before pass 1, the stitched schedule
+    before pass 2) tells each window when the oven frees up and how much a
+    longer window makespan costs the jobs behind it; windows are compared on
+    their TWT plus that delay cost. Finally repair_seams applies improving
+    adjacent-batch interchanges around every seam. The objective throughout
+    is serial-oven TWT (batch_evaluation "serial" model).
+
+    Args:
+        jobs (list[dict] | JobTable | array): job set.
+        window_size (int): jobs per window (k).
+        key (str): "due_date" or "release_time" window order.
+        solver (str): one of SOLVERS.
+        max_batch_size (int): maximum jobs per batch.
+        capacity (float | None): maximum summed job size per batch.
+        size_key, weight_key (str): job keys for size and weight.
+        n_workers (int | None): worker processes; None or 1 runs serially.
+        seed (int | None): seed for the annealing sub-solver.
+        resolve_seams (bool): run the staggered second pass.
+        exact_limit (int): largest window routed to the exact solver by "auto".
+        qaoa_qubits (int): largest QUBO routed to statevector QAOA. The
+            default 16 fits windows of at most 4 jobs, so "auto" only reaches
+            QAOA with window_size <= 4 (about 0.1 s per window) or on short
+            seam and tail windows; see DecompositionResult.solvers.
+        qaoa_depth (int): QAOA depth p.
+        qubo_variables (int): largest QUBO routed to annealing by "auto".
+        node_limit (int): node budget of the exact solver per window.
+        repair_radius (int): batches on each side of a seam open to repair.
+
+    Returns:
+        DecompositionResult: batches of JobRecords in sequence order.
+    """
+    start = time.perf_counter()
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {SOLVERS}")
+    if key not in WINDOW_KEYS:
+        raise ValueError(f"Unknown window key {key!r}; expected one of {WINDOW_KEYS}")
+    jobs = job_columns(jobs)
+    n = len(jobs)
+    if n == 0:
+        return DecompositionResult([], 0, 0, [], 0.0, [])
+    other = 'release_time' if key == 'due_date' else 'due_date'
+    order = np.lexsort((jobs[other], jobs[key]))
+    r = jobs['release_time'][order].astype(float)
+    p = jobs['processing_time'][order].astype(float)
+    d = jobs['due_date'][order].astype(float)
+    w = jobs[weight_key][order].astype(float)
+    sizes = (jobs[size_key][order] if size_key in job_fields(jobs) else np.ones(n)).astype(float)
+    U = max_batch_size or n
+    options = {'max_batch_size': max_batch_size, 'capacity': capacity, 'exact_limit': exact_limit,
+               'qaoa_qubits': qaoa_qubits, 'qaoa_depth': qaoa_depth, 'qubo_variables': qubo_variables,
+               'node_limit': node_limit}
+    seeds = iter(np.random.SeedSequence(seed).generate_state(2 * (n // window_size + 1)).tolist())
+
+    def task(index, members, free, rate, incumbent=None):
+        members = np.asarray(members)
+        columns = {'release_time': r[members], 'processing_time': p[members], 'due_date': d[members],
+                   'weight': w[members], 'size': sizes[members], 'oven_free': free, 'delay_rate': rate,
+                   'incumbent': incumbent}
+        return index, columns, solver, options, next(seeds)
+
+    # Pass 1: disjoint windows, timed against full batches in window order
+    windows = make_windows(n, window_size)
+    baseline = _fill_batches(list(range(n)), U, _fits(sizes, capacity))
+    free, rate = _schedule_context(baseline, r, p, d, w)
+    batch_of = np.repeat(np.arange(len(baseline)), [len(members) for members in baseline])
+    results = _run_windows([task(i, range(s, e), free[batch_of[s]], rate[batch_of[e - 1] + 1])
+                            for i, (s, e) in enumerate(windows)], n_workers)
+    batches, seams = [], []
+    for (s, _), result in zip(windows, results):
+        seams.append(len(batches))
+        batches.extend([s + j for j in members] for members in result.batches)
+    seams = seams[1:]
+    stitched = float(_serial_twt(batches, r, p, d, w))
+
+    # Pass 2: staggered windows over the seams, timed against the stitched schedule
+    if resolve_seams and seams:
+        ranges = seam_windows(batches, seams, window_size)
+        free, rate = _schedule_context(batches, r, p, d, w)
+        tasks = []
+        for lo, hi in ranges:
+            members = [j for batch in batches[lo:hi + 1] for j in batch]
+            local = {j: k for k, j in enumerate(members)}
+            incumbent = [[local[j] for j in batch] for batch in batches[lo:hi + 1]]
+            tasks.append(task(len(results) + len(tasks), members, free[lo], rate[hi + 1], incumbent))
+        seam_results = _run_windows(tasks, n_workers)
+        # Splice from the back so earlier batch positions stay valid
+        for (lo, hi), result in reversed(list(zip(ranges, seam_results))):
+            members = [j for batch in batches[lo:hi + 1] for j in batch]
+            batches[lo:hi + 1] = [[members[k] for k in batch] for batch in result.batches]
+            shift = len(result.batches) - (hi - lo + 1)
+            seams = [seam + shift if seam > hi else seam for seam in seams]
+        results = results + seam_results
+
+    with metrics.timer("seam_repair"):
+        batches, twt = repair_seams(batches, r, p, d, w, seams, U, sizes, capacity, radius=repair_radius)
+    return DecompositionResult([job_records(jobs, order[members]) for members in batches], twt, stitched,
+                               results, time.perf_counter() - start, [result.kept for result in results])
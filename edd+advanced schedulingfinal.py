@@ -3,6 +3,11 @@ import pandas as pd
 import os
 from typing import List, Dict, Any
 
+import metrics
+from batch_evaluation import batches_to_columns, evaluate_batches
+from job_table import job_columns, job_records
+from result_writer import print_summary, write_results
+
 # Define job data
 jobs = [
     {'id': 'J1', 'weight': 1, 'due_date': 50, 'processing_time': 16, 'release_time': 30, 'energy_consumption': 6},
@@ -17,61 +22,148 @@ jobs = [
     {'id': 'J10', 'weight': 3, 'due_date': 10, 'processing_time': 20, 'release_time': 22, 'energy_consumption': 15}
 ]
 
+# Job Priority Index weights: 'slack' multiplies the raw slack time
+# (due - release - processing), the others the min-max normalized column
+JPI_COEFFICIENTS = {
+    'slack': -2,  # Slack time penalty
+    'energy_consumption': 5,  # Energy efficiency
+    'processing_time': 3,  # Processing efficiency
+    'weight': 4,  # Job importance
+    'due_date': 2,  # Time criticality
+}
+
 def create_batch_table(jobs, batches, approach_name):
-    data = []
-    twt = 0
-    for batch_id, batch in enumerate(batches, start=1):
-        # Batch-level metrics
-        batch_release_time = min(job['release_time'] for job in batch)
-        batch_processing_time = max(job['processing_time'] for job in batch)
-        batch_due_date = min(job['due_date'] for job in batch)
-        
-        # Calculate completion time and tardiness at batch level
-        completion_time = batch_release_time + batch_processing_time
-        tardiness = max(0, completion_time - batch_due_date)
-        
-        # Calculate batch-level weighted tardiness
-        batch_weight = sum(job['weight'] for job in batch)
-        weighted_tardiness = tardiness * batch_weight
-
-        twt += weighted_tardiness
-
-        # Add job details to data
-        for job in batch:
-            data.append([
-                f"B{batch_id}", job['id'], job['weight'], job['due_date'], 
-                job['processing_time'], job['release_time'], 
-                completion_time, tardiness, weighted_tardiness
-            ])
-
-    # Create DataFrame
-    df = pd.DataFrame(data, columns=[
-        'Batch ID', 'Job ID', 'Size', 'Due Date', 
-        'Processing Time', 'Release Time', 
-        'Batch Completion Time', 'Batch Tardiness', 'Weighted Tardiness'
-    ])
+    # Score the batches with the array evaluator (batch-level completion)
+    columns = batches_to_columns(batches)
+    result = evaluate_batches(
+        columns['release_time'], columns['processing_time'], columns['due_date'],
+        columns['weight'], columns['assignment'],
+        model="batch", as_frame=True, job_ids=columns['id']
+    )
+    df = result.frame
+    twt = result.total_weighted_tardiness.item()
     
-    # Add total row
-    total_row = pd.DataFrame([['Total', '', '', '', '', '', '', '', twt]], 
-                              columns=df.columns)
-    df = pd.concat([df, total_row], ignore_index=True)
+    # Summary metrics travel with the frame and end up in the results sidecar,
+    # so the per-job columns keep their numeric dtypes
+    df.attrs.update(approach=approach_name, batches=len(batches), total_weighted_tardiness=twt)
 
-    print(f"\n{approach_name} Approach TWT: {twt}\n")
-    print(df)
+    print_summary(df, approach_name, twt)
     return df
 
-def create_batches(jobs, max_batch_size: int = 4, min_batch_size: int = 2):
+def _batch_costs(jobs, max_batch_size, capacity=None, size_key='size'):
+    """
+    Batch-level weighted tardiness of every batch of consecutive jobs with up
+    to max_batch_size jobs, using the create_batch_table model (min release +
+    max processing time vs. min due date, weighted by the summed weight).
+
+    Returns:
+        np.ndarray: cost[s - 1, j] for the batch of size s ending at job j;
+        inf where the window starts before job 0 or exceeds `capacity`.
+    """
+    n = len(jobs)
+    r = np.array([job['release_time'] for job in jobs], dtype=float)
+    p = np.array([job['processing_time'] for job in jobs], dtype=float)
+    d = np.array([job['due_date'] for job in jobs], dtype=float)
+    weight_prefix = np.r_[0.0, np.cumsum([job['weight'] for job in jobs])]
+    if capacity is not None:
+        size_prefix = np.r_[0.0, np.cumsum([job.get(size_key, 1) for job in jobs])]
+
+    cost = np.full((max_batch_size, n), np.inf)
+    min_r, max_p, min_d = r.copy(), p.copy(), d.copy()
+    end = np.arange(n)
+    # Windows longer than the sequence stay inf
+    for size in range(1, min(max_batch_size, n) + 1):
+        if size > 1:
+            # Extend every window one job to the left
+            min_r[size - 1:] = np.minimum(min_r[size - 1:], r[:n - size + 1])
+            max_p[size - 1:] = np.maximum(max_p[size - 1:], p[:n - size + 1])
+            min_d[size - 1:] = np.minimum(min_d[size - 1:], d[:n - size + 1])
+        valid = end >= size - 1
+        start = np.where(valid, end - size + 1, 0)
+        batch_weight = weight_prefix[end + 1] - weight_prefix[start]
+        tardiness = np.maximum(0, min_r + max_p - min_d)
+        row = np.where(valid, tardiness * batch_weight, np.inf)
+        if capacity is not None:
+            row[size_prefix[end + 1] - size_prefix[start] > capacity] = np.inf
+        cost[size - 1] = row
+    return cost
+
+
+def optimal_batch_boundaries(jobs, max_batch_size: int = 4, min_batch_size: int = 2,
+                             capacity=None, size_key='size'):
+    """
+    Exact partition of a fixed job sequence into consecutive batches.
+
+    f[j] = min over sizes s in [min_batch_size, max_batch_size] of
+    f[j - s] + cost(batch of jobs j-s .. j-1), computed in O(n * max_batch_size).
+
+    min_batch_size is relaxed to 1 when no partition can satisfy it, i.e.
+    when ceil(n / max_batch_size) batches of at least min_batch_size jobs
+    would need more than n jobs (e.g. n=5, sizes 4..4). The relaxation is
+    silent; callers that need the minimum must check the result.
+
+    Returns:
+        list[int]: batch end positions (exclusive), last one equal to len(jobs).
+    """
+    n = len(jobs)
+    # Keep the minimum size only if ceil(n / max) batches can each hold at least min jobs
+    if -(-n // max_batch_size) * min_batch_size > n:
+        min_batch_size = 1
+    cost = _batch_costs(jobs, max_batch_size, capacity, size_key).tolist()
+
+    inf = float('inf')
+    best = [0.0] + [inf] * n
+    choice = [0] * (n + 1)
+    sizes = range(min_batch_size, max_batch_size + 1)
+    for j in range(1, n + 1):
+        best_j, size_j = inf, 0
+        for size in sizes:
+            if size > j:
+                break
+            value = best[j - size] + cost[size - 1][j - 1]
+            if value < best_j:
+                best_j, size_j = value, size
+        best[j], choice[j] = best_j, size_j
+
+    if best[n] == inf:
+        raise ValueError("no batching satisfies the size and capacity limits")
+
+    ends = []
+    j = n
+    while j > 0:
+        ends.append(j)
+        j -= choice[j]
+    return ends[::-1]
+
+
+@metrics.timed("batch_formation")
+def create_batches(jobs, max_batch_size: int = 4, min_batch_size: int = 2,
+                   mode: str = "greedy", capacity=None, size_key: str = 'size'):
     """
     Generic batch formation function that can work with different sorting criteria
     
     Args:
         jobs (List[Dict]): List of jobs to be batched
         max_batch_size (int): Maximum number of jobs in a batch
-        min_batch_size (int): Minimum number of jobs in a batch
+        min_batch_size (int): Minimum number of jobs in a batch; a target,
+            not a guarantee: "greedy" may leave a smaller last batch and "dp"
+            drops the minimum to 1 when no partition can meet it (see
+            optimal_batch_boundaries)
+        mode (str): "greedy" (fixed-size chunks plus merge/split pass) or "dp"
+            (boundaries that minimize batch-level weighted tardiness)
+        capacity (float | None): "dp" only: maximum summed job size per batch
+        size_key (str): job key holding the size used with `capacity`
     
     Returns:
         List[List[Dict]]: Batches of jobs
     """
+    if mode == "dp":
+        ends = optimal_batch_boundaries(jobs, max_batch_size, min_batch_size, capacity, size_key)
+        metrics.count("batches_formed", len(ends))
+        return [jobs[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    if mode != "greedy":
+        raise ValueError(f"Unknown mode {mode!r}; expected 'greedy' or 'dp'")
+
     # Batch formation
     batches = []
     current_batch = []
@@ -113,90 +205,115 @@ def create_batches(jobs, max_batch_size: int = 4, min_batch_size: int = 2):
     if current_merge_batch:
         final_batches.append(current_merge_batch)
     
+    metrics.count("batches_formed", len(final_batches))
     return final_batches
 
 def edd_scheduling(jobs):
+    source, jobs = jobs, job_columns(jobs)
     # Classical Earliest Due Date (EDD) scheduling
     # First, sort by due date
-    sorted_jobs = sorted(jobs, key=lambda x: x['due_date'])
+    with metrics.timer("sort"):
+        sorted_jobs = job_records(jobs, np.argsort(jobs['due_date'], kind='stable'), source)
     
     # Then create batches
     return create_batches(sorted_jobs)
 
-def advanced_hybrid_scheduling(jobs, max_batch_size: int = 4, min_batch_size: int = 2):
-    # Normalize job parameters
-    params = ['energy_consumption', 'processing_time', 'weight', 'due_date']
-    
-    for param in params:
-        values = [job[param] for job in jobs]
-        min_val, max_val = min(values), max(values)
-        
-        # Avoid division by zero
+def job_priority_index(jobs, coefficients=None):
+    """
+    Job Priority Index of every job, computed column-wise.
+
+    Each normalized column is (x - min) / (max - min); a constant column
+    carries no ranking information and normalizes to 0. Nothing is written
+    back to `jobs`.
+
+    Args:
+        jobs (list[dict] | JobTable | array): job set.
+        coefficients (dict | None): weights by JPI_COEFFICIENTS key; keys
+            left out keep their default.
+
+    Returns:
+        np.ndarray: float JPI per job, in input order.
+    """
+    jobs = job_columns(jobs)
+    if coefficients is None:
+        coefficients = JPI_COEFFICIENTS
+    else:
+        unknown = set(coefficients) - set(JPI_COEFFICIENTS)
+        if unknown:
+            raise ValueError(f"Unknown JPI coefficients {sorted(unknown)}; expected keys of {list(JPI_COEFFICIENTS)}")
+        coefficients = {**JPI_COEFFICIENTS, **coefficients}
+
+    # Each term is coefficient * (x - min) / (max - min), added left to right
+    # as in the original formula, so equal JPIs stay equal and the stable
+    # sort breaks ties the same way; the arithmetic runs in place on one
+    # float buffer per column
+    jpi = jobs['due_date'].astype(float)
+    jpi -= jobs['release_time']
+    jpi -= jobs['processing_time']
+    jpi *= coefficients['slack']
+
+    for param in ('energy_consumption', 'processing_time', 'weight', 'due_date'):
+        coefficient = coefficients[param]
+        if coefficient == 0 or len(jobs) == 0:
+            continue
+        values = jobs[param].astype(float)
+        min_val, max_val = values.min(), values.max()
         if min_val == max_val:
             continue
-        
-        for job in jobs:
-            job[f'normalized_{param}'] = (job[param] - min_val) / (max_val - min_val)
-    
-    # Calculate Job Priority Index (JPI)
-    def calculate_jpi(job):
-        # Slack time calculation
-        slack_time = job['due_date'] - job['release_time'] - job['processing_time']
-        
-        # Advanced JPI calculation with batch-level considerations
-        jpi = (
-            -2 * slack_time +  # Slack time penalty
-            5 * job['normalized_energy_consumption'] +  # Energy efficiency
-            3 * job['normalized_processing_time'] +  # Processing efficiency
-            4 * job['normalized_weight'] +  # Job importance
-            2 * job['normalized_due_date']  # Time criticality
-        )
-        
-        return jpi
-    
-    # Calculate JPI for each job
-    for job in jobs:
-        job['jpi'] = calculate_jpi(job)
+        values -= min_val
+        values /= max_val - min_val
+        values *= coefficient
+        jpi += values
+    return jpi
+
+
+def advanced_hybrid_scheduling(jobs, max_batch_size: int = 4, min_batch_size: int = 2,
+                               coefficients=None):
+    source, jobs = jobs, job_columns(jobs)
+    # Job Priority Index per job (the job array is left untouched)
+    jpi = job_priority_index(jobs, coefficients)
     
     # Sort jobs by JPI
-    sorted_jobs = sorted(jobs, key=lambda x: x['jpi'])
+    with metrics.timer("sort"):
+        sorted_jobs = job_records(jobs, np.argsort(jpi, kind='stable'), source)
     
     # Create batches
     return create_batches(sorted_jobs, max_batch_size, min_batch_size)
 
-# Ensure output directory exists
-output_dir = 'scheduling_optimization'
-os.makedirs(output_dir, exist_ok=True)
-
-# Execute and compare scheduling approaches
-edd_results = edd_scheduling(jobs)
-edd_df = create_batch_table(jobs, edd_results, "EDD Batch Scheduling")
-
-hybrid_results = advanced_hybrid_scheduling(jobs)
-hybrid_df = create_batch_table(jobs, hybrid_results, "Advanced Hybrid Scheduling")
-
-# Save results to CSV
-try:
-    edd_df.to_csv(os.path.join(output_dir, 'edd_batch_results.csv'), index=False)
-    hybrid_df.to_csv(os.path.join(output_dir, 'advanced_hybrid_results.csv'), index=False)
-    print("Results saved to CSV in 'scheduling_optimization' directory.")
-except Exception as e:
-    print(f"An error occurred while saving CSV files: {e}")
-
-# Print batch details
-print("\nEDD Batch Composition:")
-for i, batch in enumerate(edd_results, 1):
-    print(f"Batch {i}: {[job['id'] for job in batch]} (Size: {len(batch)})")
-    print(f"  Batch Release Time: {min(job['release_time'] for job in batch)}")
-    print(f"  Batch Processing Time: {max(job['processing_time'] for job in batch)}")
-    print(f"  Batch Due Date: {min(job['due_date'] for job in batch)}")
-
-print("\nAdvanced Hybrid Batch Composition:")
-for i, batch in enumerate(hybrid_results, 1):
-    print(f"Batch {i}: {[job['id'] for job in batch]} (Size: {len(batch)})")
-    print(f"  Batch Release Time: {min(job['release_time'] for job in batch)}")
-    print(f"  Batch Processing Time: {max(job['processing_time'] for job in batch)}")
-    print(f"  Batch Due Date: {min(job['due_date'] for job in batch)}")
+if __name__ == "__main__":
+    # Ensure output directory exists
+    output_dir = 'scheduling_optimization'
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Execute and compare scheduling approaches
+    edd_results = edd_scheduling(jobs)
+    edd_df = create_batch_table(jobs, edd_results, "EDD Batch Scheduling")
+
+    hybrid_results = advanced_hybrid_scheduling(jobs)
+    hybrid_df = create_batch_table(jobs, hybrid_results, "Advanced Hybrid Scheduling")
+
+    # Save results to CSV
+    try:
+        write_results(os.path.join(output_dir, 'edd_batch_results.csv'), edd_df)
+        write_results(os.path.join(output_dir, 'advanced_hybrid_results.csv'), hybrid_df)
+        print("Results saved to CSV in 'scheduling_optimization' directory.")
+    except Exception as e:
+        print(f"An error occurred while saving CSV files: {e}")
+
+    # Print batch details
+    print("\nEDD Batch Composition:")
+    for i, batch in enumerate(edd_results, 1):
+        print(f"Batch {i}: {[job['id'] for job in batch]} (Size: {len(batch)})")
+        print(f"  Batch Release Time: {min(job['release_time'] for job in batch)}")
+        print(f"  Batch Processing Time: {max(job['processing_time'] for job in batch)}")
+        print(f"  Batch Due Date: {min(job['due_date'] for job in batch)}")
+
+    print("\nAdvanced Hybrid Batch Composition:")
+    for i, batch in enumerate(hybrid_results, 1):
+        print(f"Batch {i}: {[job['id'] for job in batch]} (Size: {len(batch)})")
+        print(f"  Batch Release Time: {min(job['release_time'] for job in batch)}")
+        print(f"  Batch Processing Time: {max(job['processing_time'] for job in batch)}")
+        print(f"  Batch Due Date: {min(job['due_date'] for job in batch)}")
 
 
 
@@ -1,6 +1,12 @@
 import numpy as np
 import pandas as pd
 import os
+from bisect import bisect_right
+
+import metrics
+from batch_evaluation import batches_to_columns, evaluate_batches
+from job_table import job_columns, job_records
+from result_writer import print_summary, write_results
 
 # Define job data (same as original)
 jobs = [
@@ -17,176 +23,161 @@ jobs = [
 ]
 
 def create_batch_table(jobs, batches, approach_name):
-    data = []
-    twt = 0
-    for batch_id, batch in enumerate(batches, start=1):
-        completion_time = 0
-        for job in batch:
-            job_id = job['id']
-            size = job['weight']
-            due_date = job['due_date']
-            processing_time = job['processing_time']
-            release_time = job['release_time']
-
-            # Calculate completion time and tardiness
-            completion_time = max(completion_time, release_time) + processing_time
-            tardiness = max(0, completion_time - due_date)
-            weighted_tardiness = tardiness * size
-
-            # Update TWT
-            twt += weighted_tardiness
-
-            # Append to data
-            data.append([
-                f"B{batch_id}", job_id, size, due_date, processing_time, release_time, completion_time, tardiness, weighted_tardiness
-            ])
-
-    # Create DataFrame
-    df = pd.DataFrame(data, columns=[
-        'Batch ID', 'Job ID', 'Size', 'Due Date', 'Processing Time', 'Release Time', 'Completion Time', 'Tardiness', 'Weighted Tardiness'
-    ])
+    # Score the batches with the array evaluator (sequential per-job completion)
+    columns = batches_to_columns(batches)
+    result = evaluate_batches(
+        columns['release_time'], columns['processing_time'], columns['due_date'],
+        columns['weight'], columns['assignment'],
+        model="sequential", as_frame=True, job_ids=columns['id']
+    )
+    df = result.frame
+    twt = result.total_weighted_tardiness.item()
     
-    # Add total row
-    total_row = pd.DataFrame([['Total', '', '', '', '', '', '', '', twt]], 
-                              columns=df.columns)
-    df = pd.concat([df, total_row], ignore_index=True)
+    # Summary metrics travel with the frame and end up in the results sidecar,
+    # so the per-job columns keep their numeric dtypes
+    df.attrs.update(approach=approach_name, batches=len(batches), total_weighted_tardiness=twt)
 
-    print(f"\n{approach_name} Approach TWT: {twt}\n")
-    print(df)
+    print_summary(df, approach_name, twt)
     return df
 
+def window_starts(keys, window, max_batch_size=None):
+    """
+    Batch start positions for jobs whose keys are in non-decreasing order.
+
+    A batch opens at the first job not yet batched and takes every following
+    job whose key lies at most `window` above the opening key (and at most
+    `max_batch_size` jobs). Each batch costs one binary search, O(b log n)
+    for b batches, instead of a comparison per job.
+
+    Args:
+        keys (array): sort key of each job, non-decreasing.
+        window (float): largest key distance within a batch (>= 0).
+        max_batch_size (int | None): optional limit on jobs per batch.
+
+    Returns:
+        list[int]: position of the first job of every batch.
+    """
+    if window < 0:
+        raise ValueError(f"window must be non-negative, got {window}")
+    keys = np.asarray(keys).tolist()
+    n = len(keys)
+    starts = []
+    start = 0
+    while start < n:
+        anchor = keys[start]
+        end = bisect_right(keys, anchor + window, start)
+        # anchor + window is rounded for float keys; settle the edge on
+        # key - anchor <= window, the distance the batching rule compares
+        while end < n and keys[end] - anchor <= window:
+            end += 1
+        while keys[end - 1] - anchor > window:
+            end -= 1
+        if max_batch_size and end - start > max_batch_size:
+            end = start + max_batch_size
+        starts.append(start)
+        start = end
+    return starts
+
+
+def _split_batches(sorted_jobs, starts):
+    ends = starts[1:] + [len(sorted_jobs)]
+    batches = [sorted_jobs[start:end] for start, end in zip(starts, ends)]
+    metrics.count("batches_formed", len(batches))
+    return batches
+
 # EDD Scheduling (Earliest Due Date)
-def edd_scheduling(jobs):
+@metrics.timed()
+def edd_scheduling(jobs, window=15):
+    source, jobs = jobs, job_columns(jobs)
     # Sort jobs by due date
-    sorted_jobs = sorted(jobs, key=lambda x: x['due_date'])
+    with metrics.timer("sort"):
+        order = np.argsort(jobs['due_date'], kind='stable')
+    sorted_jobs = job_records(jobs, order, source)
     
     # Create batches with jobs close in due dates
-    batches = []
-    current_batch = []
-    current_due_date = sorted_jobs[0]['due_date']
-
-    for job in sorted_jobs:
-        if abs(job['due_date'] - current_due_date) <= 15:
-            current_batch.append(job)
-        else:
-            batches.append(current_batch)
-            current_batch = [job]
-            current_due_date = job['due_date']
-
-    if current_batch:
-        batches.append(current_batch)
-
-    return batches
+    return _split_batches(sorted_jobs, window_starts(jobs['due_date'][order], window))
 
 # SPT Scheduling (Shortest Processing Time)
-def spt_scheduling(jobs):
+@metrics.timed()
+def spt_scheduling(jobs, window=5):
+    source, jobs = jobs, job_columns(jobs)
     # Sort jobs by processing time
-    sorted_jobs = sorted(jobs, key=lambda x: x['processing_time'])
+    with metrics.timer("sort"):
+        order = np.argsort(jobs['processing_time'], kind='stable')
+    sorted_jobs = job_records(jobs, order, source)
     
     # Create batches with jobs close in processing times
-    batches = []
-    current_batch = []
-    current_processing_time = sorted_jobs[0]['processing_time']
-
-    for job in sorted_jobs:
-        if abs(job['processing_time'] - current_processing_time) <= 5:
-            current_batch.append(job)
-        else:
-            batches.append(current_batch)
-            current_batch = [job]
-            current_processing_time = job['processing_time']
-
-    if current_batch:
-        batches.append(current_batch)
-
-    return batches
+    return _split_batches(sorted_jobs, window_starts(jobs['processing_time'][order], window))
 
 # WSPT Scheduling (Weighted Shortest Processing Time)
-def wspt_scheduling(jobs):
-    # Sort jobs by weight/processing time ratio
-    sorted_jobs = sorted(jobs, key=lambda x: x['weight'] / x['processing_time'], reverse=True)
+@metrics.timed()
+def wspt_scheduling(jobs, window=1):
+    source, jobs = jobs, job_columns(jobs)
+    # Sort jobs by weight/processing time ratio (descending, ties in input order)
+    ratios = jobs['weight'] / jobs['processing_time']
+    with metrics.timer("sort"):
+        order = np.argsort(-ratios, kind='stable')
+    sorted_jobs = job_records(jobs, order, source)
     
-    # Create batches with jobs close in WSPT ratios
-    batches = []
-    current_batch = []
-    current_wspt_ratio = sorted_jobs[0]['weight'] / sorted_jobs[0]['processing_time']
-
-    for job in sorted_jobs:
-        wspt_ratio = job['weight'] / job['processing_time']
-        if abs(wspt_ratio - current_wspt_ratio) <= 1:
-            current_batch.append(job)
-        else:
-            batches.append(current_batch)
-            current_batch = [job]
-            current_wspt_ratio = wspt_ratio
-
-    if current_batch:
-        batches.append(current_batch)
-
-    return batches
+    # Create batches with jobs close in WSPT ratios (negated so the keys ascend)
+    return _split_batches(sorted_jobs, window_starts(-ratios[order], window))
+
+def hybrid_order(jobs):
+    """
+    Job sequence the hybrid heuristic batches.
+
+    Returns:
+        tuple: (sorted_jobs, rows) - the jobs in sequence order (the caller's
+        dicts, or JobRecords for array and table input) and their row indices in `jobs`.
+    """
+    source, jobs = jobs, job_columns(jobs)
+    rows = _hybrid_rows(jobs)
+    return job_records(jobs, rows, source), rows
+
+def _hybrid_rows(jobs):
+    # Every job once, sorted by a composite of the EDD, WSPT and SPT keys
+    # (lexsort takes the last key as primary; ties stay in input order)
+    with metrics.timer("sort"):
+        return np.lexsort((
+            jobs['processing_time'],                   # Tertiary: Processing time
+            jobs['weight'] / jobs['processing_time'],  # Secondary: WSPT ratio
+            jobs['due_date'],                          # Primary: Due date
+        ))
 
 # Hybrid Scheduling Approach
-def hybrid_scheduling(jobs):
-    # Combine multiple scheduling strategies
+@metrics.timed()
+def hybrid_scheduling(jobs, window=20, max_batch_size=4):
+    source, jobs = jobs, job_columns(jobs)
+    rows = _hybrid_rows(jobs)
+    sorted_jobs = job_records(jobs, rows, source)
+    
+    # Create new batches with optimized sorting: close due dates, limited batch size
+    return _split_batches(sorted_jobs, window_starts(jobs['due_date'][rows], window, max_batch_size))
+
+if __name__ == "__main__":
+    # Ensure output directory exists
+    output_dir = 'scheduler_results'
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Execute and compare different scheduling approaches
     edd_batches = edd_scheduling(jobs)
+    edd_df = create_batch_table(jobs, edd_batches, "EDD Scheduling")
+
     spt_batches = spt_scheduling(jobs)
+    spt_df = create_batch_table(jobs, spt_batches, "SPT Scheduling")
+
     wspt_batches = wspt_scheduling(jobs)
-    
-    # Merge and optimize batches
-    hybrid_batches = []
-    
-    # Combine all batches
-    all_jobs = [job for batch in (edd_batches + spt_batches + wspt_batches) for job in batch]
-    
-    # Sort combined jobs by a composite score
-    sorted_jobs = sorted(all_jobs, key=lambda x: (
-        x['due_date'],                 # Primary: Due date
-        x['weight'] / x['processing_time'],  # Secondary: WSPT ratio
-        x['processing_time']            # Tertiary: Processing time
-    ))
-    
-    # Create new batches with optimized sorting
-    current_batch = []
-    current_due_date = sorted_jobs[0]['due_date']
-
-    for job in sorted_jobs:
-        if (not current_batch or 
-            (abs(job['due_date'] - current_due_date) <= 20 and 
-             len(current_batch) < 4)):  # Limit batch size
-            current_batch.append(job)
-        else:
-            hybrid_batches.append(current_batch)
-            current_batch = [job]
-            current_due_date = job['due_date']
-
-    if current_batch:
-        hybrid_batches.append(current_batch)
-
-    return hybrid_batches
-
-# Ensure output directory exists
-output_dir = 'scheduler_results'
-os.makedirs(output_dir, exist_ok=True)
-
-# Execute and compare different scheduling approaches
-edd_batches = edd_scheduling(jobs)
-edd_df = create_batch_table(jobs, edd_batches, "EDD Scheduling")
-
-spt_batches = spt_scheduling(jobs)
-spt_df = create_batch_table(jobs, spt_batches, "SPT Scheduling")
-
-wspt_batches = wspt_scheduling(jobs)
-wspt_df = create_batch_table(jobs, wspt_batches, "WSPT Scheduling")
-
-hybrid_batches = hybrid_scheduling(jobs)
-hybrid_df = create_batch_table(jobs, hybrid_batches, "Hybrid Scheduling")
-
-# Save results to CSV with unique filenames
-try:
-    edd_df.to_csv(os.path.join(output_dir, 'scheduler_edd_results.csv'), index=False)
-    spt_df.to_csv(os.path.join(output_dir, 'scheduler_spt_results.csv'), index=False)
-    wspt_df.to_csv(os.path.join(output_dir, 'scheduler_wspt_results.csv'), index=False)
-    hybrid_df.to_csv(os.path.join(output_dir, 'scheduler_hybrid_results.csv'), index=False)
-    print("Results saved to CSV in 'scheduler_results' directory.")
-except Exception as e:
-    print(f"An error occurred while saving CSV files: {e}")
\ No newline at end of file
+    wspt_df = create_batch_table(jobs, wspt_batches, "WSPT Scheduling")
+
+    hybrid_batches = hybrid_scheduling(jobs)
+    hybrid_df = create_batch_table(jobs, hybrid_batches, "Hybrid Scheduling")
+
+    # Save results to CSV with unique filenames
+    try:
+        write_results(os.path.join(output_dir, 'scheduler_edd_results.csv'), edd_df)
+        write_results(os.path.join(output_dir, 'scheduler_spt_results.csv'), spt_df)
+        write_results(os.path.join(output_dir, 'scheduler_wspt_results.csv'), wspt_df)
+        write_results(os.path.join(output_dir, 'scheduler_hybrid_results.csv'), hybrid_df)
+        print("Results saved to CSV in 'scheduler_results' directory.")
+    except Exception as e:
+        print(f"An error occurred while saving CSV files: {e}")
\ No newline at end of file
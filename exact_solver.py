@@ -0,0 +1,298 @@
+import heapq
+import itertools
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from batch_evaluation import batches_to_columns, evaluate_batches
+
+# Above this many jobs lower_bound(method="auto") skips the O(n^3) assignment
+# bound and returns the O(n) single-job bound instead.
+ASSIGNMENT_BOUND_LIMIT = 500
+
+
+class ExactResult(NamedTuple):
+    """Outcome of :func:`solve_exact`.
+
+    `optimal` is True when the search space was exhausted. Otherwise
+    `batches` is the best schedule found and `lower_bound` the best proven
+    bound when the node or time limit was hit. `gap_history` holds
+    (elapsed seconds, incumbent TWT, lower bound) whenever either changes.
+    """
+    batches: list
+    twt: float
+    lower_bound: float
+    optimal: bool
+    nodes: int
+    elapsed: float
+    nodes_per_second: float
+    gap_history: list
+
+
+def relative_gap(upper, lower):
+    """(upper - lower) / upper, or 0 when the upper bound is 0."""
+    return 0.0 if upper <= 0 else max(0.0, (upper - lower) / upper)
+
+
+# -----------------------------
+# TWT lower bounds (serial oven model)
+# -----------------------------
+def _single_job_bound(r, p, d, w, start):
+    """Every job completes no earlier than max(start, r_j) + p_j."""
+    return w * np.maximum(np.maximum(start, r) + p - d, 0)
+
+
+def _assignment_bound(r, p, d, w, start, max_batch_size):
+    """
+    Position-based bound solved as an assignment problem.
+
+    The k-th batch holds at most `max_batch_size` jobs and cannot complete
+    before min(r) + the k smallest processing times (k batches, each at least
+    as long as one of its own jobs). Charging each job the later of that slot
+    time and its own earliest completion, and assigning jobs to slot copies
+    with the Hungarian method, bounds the TWT of every batch sequence.
+    Because costs never decrease with the slot index, the first n copies
+    are enough.
+    """
+    n = r.size
+    slot_times = max(start, r.min()) + np.cumsum(np.sort(p))
+    slots = np.repeat(slot_times, max_batch_size)[:n]
+    earliest = np.maximum(start, r) + p
+    completion = np.maximum(slots[None, :], earliest[:, None])
+    cost = w[:, None] * np.maximum(completion - d[:, None], 0)
+    rows, cols = linear_sum_assignment(cost)
+    return cost[rows, cols].sum()
+
+
+def lower_bound(jobs, max_batch_size=None, start_time=0, weight_key='weight', method="auto"):
+    """
+    Lower bound on the total weighted tardiness of any serial-oven batch schedule.
+
+    Args:
+        jobs (list[dict]): jobs with release_time, processing_time and due_date.
+        max_batch_size (int | None): maximum jobs per batch; None means unlimited.
+        start_time (float): time the oven becomes free.
+        weight_key (str): job key holding the weight.
+        method (str): "assignment" (position bound, O(n^3)), "single"
+            (each job alone on the oven, O(n)) or "auto" (assignment up to
+            ASSIGNMENT_BOUND_LIMIT jobs).
+
+    Returns:
+        float: the bound.
+    """
+    if not jobs:
+        return 0.0
+    r = np.array([job['release_time'] for job in jobs], dtype=float)
+    p = np.array([job['processing_time'] for job in jobs], dtype=float)
+    d = np.array([job['due_date'] for job in jobs], dtype=float)
+    w = np.array([job[weight_key] for job in jobs], dtype=float)
+    if method == "auto":
+        method = "assignment" if len(jobs) <= ASSIGNMENT_BOUND_LIMIT else "single"
+    if method == "single":
+        return float(_single_job_bound(r, p, d, w, start_time).sum())
+    if method == "assignment":
+        return float(_assignment_bound(r, p, d, w, start_time, max_batch_size or len(jobs)))
+    raise ValueError(f"Unknown bound method {method!r}")
+
+
+def optimality_gap(batches, max_batch_size=None, weight_key='weight', method="auto"):
+    """
+    Serial-model TWT of a heuristic schedule against the lower bound.
+
+    Returns:
+        tuple: (twt, lower bound, relative gap).
+    """
+    columns = batches_to_columns(batches, weight_key)
+    twt = float(evaluate_batches(columns['release_time'], columns['processing_time'], columns['due_date'],
+                                 columns['weight'], columns['assignment'], model="serial").total_weighted_tardiness)
+    jobs = [job for batch in batches for job in batch]
+    bound = min(twt, lower_bound(jobs, max_batch_size, weight_key=weight_key, method=method))
+    return twt, bound, relative_gap(twt, bound)
+
+
+# -----------------------------
+# Branch and bound over batch sequences
+# -----------------------------
+def _serial_twt(batches, r, p, d, w):
+    twt, free = 0, 0
+    for members in batches:
+        free = max(free, max(r[j] for j in members)) + max(p[j] for j in members)
+        twt += sum(w[j] * max(0, free - d[j]) for j in members)
+    return twt
+
+
+def _fill_batches(order, max_batch_size, fits):
+    """Cut a job order into consecutive batches, closing a batch when the next job does not fit."""
+    batches, current = [], []
+    for j in order:
+        if current and (len(current) >= max_batch_size or not fits(current + [j])):
+            batches.append(current)
+            current = []
+        current.append(j)
+    if current:
+        batches.append(current)
+    return batches
+
+
+@lru_cache(maxsize=None)
+def _combinations(m, size):
+    """All `size`-subsets of range(m) as an index array, shape (C(m, size), size)."""
+    return np.array(list(itertools.combinations(range(m), size)), dtype=np.intp).reshape(-1, size)
+
+
+def solve_exact(jobs, max_batch_size=4, capacity=None, size_key='size', weight_key='weight',
+                node_limit=200000, time_limit=None):
+    """
+    Minimum total weighted tardiness batch schedule on one oven (serial model).
+
+    Best-first branch and bound: a node is a set of scheduled jobs, the time
+    the oven frees up and the TWT so far; a child appends one more batch.
+    All candidate batches of a node are scored at once as NumPy index
+    arrays. Pruning uses
+      * the incumbent, seeded with the better of EDD and WSPT orders cut
+        into full batches;
+      * a cheap single-job bound on generation and the assignment bound
+        (see lower_bound) when a node is first popped;
+      * Pareto dominance on (oven free time, TWT) per scheduled-job set, so
+        for tiny instances the search degrades gracefully into a DP over
+        subsets;
+      * batch maximality: a batch that could also take a waiting job
+        already released by its start and no longer than its longest job is
+        never better than the batch that takes it.
+
+    Args:
+        jobs (list[dict]): jobs with release_time, processing_time, due_date
+            and the weight key.
+        max_batch_size (int | None): maximum jobs per batch.
+        capacity (float | None): maximum summed job size per batch.
+        size_key, weight_key (str): job keys for size and weight.
+        node_limit (int | None): maximum number of expanded nodes.
+        time_limit (float | None): wall-clock budget in seconds.
+
+    Returns:
+        ExactResult
+    """
+    start = time.perf_counter()
+    n = len(jobs)
+    if n == 0:
+        return ExactResult([], 0, 0, True, 0, 0.0, 0.0, [])
+    if n > 62:
+        raise ValueError(f"{n} jobs is far beyond exact search; use lower_bound for a gap estimate")
+    U = min(max_batch_size or n, n)
+    r = np.array([job['release_time'] for job in jobs], dtype=float)
+    p = np.array([job['processing_time'] for job in jobs], dtype=float)
+    d = np.array([job['due_date'] for job in jobs], dtype=float)
+    w = np.array([job[weight_key] for job in jobs], dtype=float)
+    sizes = np.array([job.get(size_key, 1) for job in jobs], dtype=float)
+    bits = np.left_shift(1, np.arange(n, dtype=np.int64))
+
+    def fits(members):
+        return capacity is None or sizes[members].sum() <= capacity
+
+    best_batches, best_twt = None, float("inf")
+    for key in (d, np.where(w > 0, p / np.where(w > 0, w, 1), np.inf)):
+        batches = _fill_batches(np.argsort(key, kind="stable").tolist(), U, fits)
+        twt = _serial_twt(batches, r, p, d, w)
+        if twt < best_twt:
+            best_batches, best_twt = batches, float(twt)
+
+    root_bound = float(_assignment_bound(r, p, d, w, 0, U))
+    proven = min(root_bound, best_twt)
+    history = [(time.perf_counter() - start, best_twt, proven)]
+    full = (1 << n) - 1
+    counter = itertools.count()
+    # (bound, tie-breaker, scheduled mask, oven free time, TWT so far, path, strong bound?)
+    heap = [(root_bound, next(counter), 0, 0.0, 0.0, None, True)]
+    labels = {}  # scheduled mask -> non-dominated (free time, TWT) pairs
+    nodes = 0
+    hit_limit = False
+
+    while heap:
+        node_bound, _, mask, free, cost, path, strong = heapq.heappop(heap)
+        if node_bound >= best_twt:
+            heap = []
+            break
+        if (node_limit is not None and nodes >= node_limit) or \
+                (time_limit is not None and time.perf_counter() - start >= time_limit):
+            heapq.heappush(heap, (node_bound, 0, mask, free, cost, path, strong))
+            hit_limit = True
+            break
+        if mask and (free, cost) not in labels.get(mask, ()):
+            continue  # dominated after it was queued
+        remaining = np.array([j for j in range(n) if not mask >> j & 1])
+        R, P, D, W, S = r[remaining], p[remaining], d[remaining], w[remaining], sizes[remaining]
+        if not strong:
+            tight = cost + _assignment_bound(R, P, D, W, free, U)
+            if tight > node_bound:
+                heapq.heappush(heap, (tight, next(counter), mask, free, cost, path, True))
+                continue
+        if node_bound > proven:
+            proven = node_bound
+            history.append((time.perf_counter() - start, best_twt, proven))
+        nodes += 1
+
+        m = remaining.size
+        for size in range(1, min(U, m) + 1):
+            batch = _combinations(m, size)
+            rows = np.arange(batch.shape[0])[:, None]
+            member = np.zeros((batch.shape[0], m), dtype=bool)
+            member[rows, batch] = True
+            batch_start = np.maximum(free, R[batch].max(axis=1))
+            longest = P[batch].max(axis=1)
+            completion = batch_start + longest
+            ok = np.ones(batch.shape[0], dtype=bool)
+            load = S[batch].sum(axis=1)
+            if capacity is not None:
+                ok &= load <= capacity
+            if size < U:
+                joinable = ~member & (R <= batch_start[:, None]) & (P <= longest[:, None])
+                if capacity is not None:
+                    joinable &= load[:, None] + S <= capacity
+                ok &= ~joinable.any(axis=1)
+            child_cost = cost + (W[batch] * np.maximum(completion[:, None] - D[batch], 0)).sum(axis=1)
+            later = np.maximum(np.maximum(completion[:, None], R) + P - D, 0) * W
+            quick = child_cost + np.where(member, 0, later).sum(axis=1)
+            ok &= quick < best_twt
+            child_masks = mask + bits[remaining][batch].sum(axis=1)
+
+            for c in np.flatnonzero(ok):
+                c_cost, c_time, child_mask = float(child_cost[c]), float(completion[c]), int(child_masks[c])
+                if quick[c] >= best_twt:
+                    continue
+                if child_mask == full:
+                    best_twt, best_path = c_cost, (remaining[batch[c]].tolist(), path)
+                    best_batches = None
+                    history.append((time.perf_counter() - start, best_twt, min(proven, best_twt)))
+                    continue
+                front = labels.setdefault(child_mask, [])
+                if any(t <= c_time and v <= c_cost for t, v in front):
+                    continue
+                front[:] = [(t, v) for t, v in front if not (t >= c_time and v >= c_cost)]
+                front.append((c_time, c_cost))
+                heapq.heappush(heap, (float(quick[c]), next(counter), child_mask, c_time, c_cost,
+                                      (remaining[batch[c]].tolist(), path), False))
+
+    if best_batches is None:
+        best_batches = []
+        while best_path is not None:
+            batch, best_path = best_path
+            best_batches.append(batch)
+        best_batches.reverse()
+    optimal = not hit_limit
+    final_bound = best_twt if optimal else min(best_twt, max(proven, heap[0][0]))
+    if final_bound != history[-1][2]:
+        history.append((time.perf_counter() - start, best_twt, final_bound))
+    elapsed = time.perf_counter() - start
+    return ExactResult(
+        batches=[[jobs[j] for j in members] for members in best_batches],
+        twt=best_twt,
+        lower_bound=final_bound,
+        optimal=optimal,
+        nodes=nodes,
+        elapsed=elapsed,
+        nodes_per_second=nodes / elapsed if elapsed > 0 else 0.0,
+        gap_history=history,
+    )
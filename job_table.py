@@ -0,0 +1,316 @@
+import os
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ('release_time', 'processing_time', 'due_date')
+OPTIONAL_COLUMNS = ('id', 'weight', 'size', 'energy_consumption')
+
+
+# -----------------------------
+# Columnar job table
+# -----------------------------
+class JobTable:
+    """
+    Job set stored as one NumPy array per attribute.
+
+    Columns may be read-only memory-mapped views straight from disk;
+    selecting rows with :meth:`take` is the first point where data is copied.
+    `records()` turns the table back into the list-of-dicts form the
+    heuristics were written against.
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self, columns):
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"job table is missing columns {missing}")
+        lengths = {values.shape[0] for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"job table columns have different lengths {sorted(lengths)}")
+        if 'id' not in columns:
+            n = lengths.pop()
+            columns['id'] = np.array([f"J{i}" for i in range(1, n + 1)], dtype=object)
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, jobs):
+        """Build a table from a list of job dicts (the keys of the first job)."""
+        jobs = list(jobs)
+        if not jobs:
+            raise ValueError("cannot build a job table from an empty job list")
+        return cls({key: [job[key] for job in jobs] for key in jobs[0]})
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls({name: frame[name].to_numpy() for name in frame.columns})
+
+    def __len__(self):
+        return self.columns['release_time'].shape[0]
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def names(self):
+        return tuple(self.columns)
+
+    def take(self, index):
+        """New table with the rows at `index` (an integer array or slice), in that order."""
+        return JobTable({name: values[index] for name, values in self.columns.items()})
+
+    def records(self):
+        """Rows as a list of dicts with plain Python values."""
+        names = list(self.columns)
+        values = [self.columns[name].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns)
+
+
+def as_job_list(jobs):
+    """A JobTable or structured job array becomes a list of job dicts, anything else a list."""
+    if isinstance(jobs, JobTable):
+        return jobs.records()
+    if isinstance(jobs, np.ndarray):
+        return [record.to_dict() for record in job_records(as_job_array(jobs))]
+    return list(jobs)
+
+
+# -----------------------------
+# Structured job model
+# -----------------------------
+JOB_FIELDS = ('id', 'size', 'weight', 'processing_time', 'release_time', 'due_date', 'energy_consumption')
+
+# Layout of a fully specified job. as_job_array keeps only the fields a job set
+# actually has, with the dtypes of its source columns, so integer instances stay
+# integer and a job without a size does not silently get one.
+JOB_DTYPE = np.dtype([('id', 'U16'), ('size', 'f8'), ('weight', 'f8'), ('processing_time', 'f8'),
+                      ('release_time', 'f8'), ('due_date', 'f8'), ('energy_consumption', 'f8')])
+
+
+class JobRecord(Mapping):
+    """
+    Read-only view of one row of a structured job array or JobTable.
+
+    A Mapping of field name to plain Python value, so the dict access the
+    heuristics use (job['due_date'], 'size' in job, job.get('size', 1)),
+    dict(job) and pd.DataFrame(batch) all work, at the cost of two slots per
+    job instead of a dict. It cannot be assigned to and is not a dict for
+    json; use to_dict() for a mutable copy.
+    """
+    __slots__ = ("jobs", "index")
+
+    def __init__(self, jobs, index):
+        self.jobs = jobs
+        self.index = index
+
+    def __getitem__(self, key):
+        if key not in job_fields(self.jobs):
+            raise KeyError(key)
+        value = self.jobs[key][self.index]
+        # Object columns (JobTable ids) already hold Python values
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __iter__(self):
+        return iter(job_fields(self.jobs))
+
+    def __len__(self):
+        return len(job_fields(self.jobs))
+
+    def __contains__(self, key):
+        return key in job_fields(self.jobs)
+
+    def get(self, key, default=None):
+        return self[key] if key in job_fields(self.jobs) else default
+
+    def keys(self):
+        return job_fields(self.jobs)
+
+    def to_dict(self):
+        return {name: self[name] for name in job_fields(self.jobs)}
+
+    def __repr__(self):
+        return f"JobRecord({self.to_dict()})"
+
+
+def as_job_array(jobs):
+    """
+    Structured array with the JOB_FIELDS present in `jobs`.
+
+    Accepts a structured array (returned unchanged), a JobTable (copied; see
+    job_columns for the copy-free path), JobRecords viewing one array or
+    table, or a list of job dicts. Object id columns are stored as
+    fixed-width strings.
+    """
+    if isinstance(jobs, np.ndarray) and jobs.dtype.names is not None:
+        return jobs
+    if not isinstance(jobs, JobTable):
+        jobs = list(jobs)
+        if not jobs:
+            return np.empty(0, dtype=JOB_DTYPE)
+        if all(isinstance(job, JobRecord) and job.jobs is jobs[0].jobs for job in jobs):
+            source = jobs[0].jobs
+            if not isinstance(source, JobTable):
+                return source[[job.index for job in jobs]]
+            jobs = source.take([job.index for job in jobs])
+    if isinstance(jobs, JobTable):
+        columns = jobs.columns
+    else:
+        columns = {name: [job[name] for job in jobs] for name in JOB_FIELDS if name in jobs[0]}
+    columns = {name: np.asarray(columns[name]) for name in JOB_FIELDS if name in columns}
+    if 'id' in columns and columns['id'].dtype == object:
+        columns['id'] = columns['id'].astype(str)
+    n = len(next(iter(columns.values())))
+    array = np.empty(n, dtype=[(name, values.dtype) for name, values in columns.items()])
+    for name, values in columns.items():
+        array[name] = values
+    return array
+
+
+def job_columns(jobs):
+    """
+    Column source for the heuristics: job[name] gives a column, len(jobs) the rows.
+
+    A JobTable or structured array is returned as is, so a memory-mapped
+    table is sorted and sliced in place rather than copied per call; job
+    lists go through as_job_array.
+    """
+    if isinstance(jobs, JobTable) or (isinstance(jobs, np.ndarray) and jobs.dtype.names is not None):
+        return jobs
+    return as_job_array(jobs)
+
+
+def job_fields(jobs):
+    """Column names of a JobTable or structured job array."""
+    return jobs.names if isinstance(jobs, JobTable) else jobs.dtype.names
+
+
+def job_records(jobs, order=None, source=None):
+    """
+    JobRecords for the rows of a structured job array or JobTable, optionally in `order`.
+
+    When `source` is the list of job dicts `jobs` was built from, those dicts
+    are returned in `order` instead, so a heuristic hands back the caller's
+    own job objects; views are only made for array and JobTable input.
+    """
+    index = range(len(jobs)) if order is None else np.asarray(order).tolist()
+    if isinstance(source, list) and source and isinstance(source[0], dict):
+        return [source[i] for i in index]
+    return [JobRecord(jobs, i) for i in index]
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+def _rename(columns, rename):
+    if rename:
+        columns = {rename.get(name, name): values for name, values in columns.items()}
+    return columns
+
+
+def iter_csv_chunks(path, chunksize=1_000_000, columns=None, rename=None):
+    """
+    Stream a CSV export as JobTables of at most `chunksize` rows.
+
+    Args:
+        path (str): CSV file.
+        chunksize (int): rows per chunk.
+        columns (list[str] | None): source columns to read (before renaming).
+        rename (dict | None): source column name -> job key.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+        yield JobTable(_rename({name: chunk[name].to_numpy() for name in chunk.columns}, rename))
+
+
+def _concat(tables):
+    tables = list(tables)
+    if not tables:
+        raise ValueError("no rows to load")
+    if len(tables) == 1:
+        return tables[0]
+    return JobTable({name: np.concatenate([table[name] for table in tables]) for name in tables[0].names})
+
+
+def _arrow_columns(table):
+    # Single-chunk primitive columns without nulls convert without copying
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def load_jobs(path, columns=None, rename=None, mmap=True, chunksize=1_000_000):
+    """
+    Load a job table from CSV, Parquet, Feather/Arrow IPC, .npy or .npz.
+
+    Binary formats are memory-mapped when `mmap` is True: Parquet and Feather
+    through pyarrow memory maps (columns become zero-copy views where Arrow
+    allows it), .npy through np.load(mmap_mode='r') on a structured array
+    whose fields are the job columns. .npz archives hold one array per
+    column and are read lazily key by key (zip members cannot be mapped).
+    CSV files are parsed in chunks of `chunksize` rows, so the parser never
+    holds more than one chunk of text-derived objects at a time.
+
+    Args:
+        path (str): input file; the format follows the extension.
+        columns (list[str] | None): source columns to read.
+        rename (dict | None): source column name -> job key, for exports that
+            use their own headers.
+        mmap (bool): memory-map binary formats.
+        chunksize (int): CSV rows per chunk.
+
+    Returns:
+        JobTable
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".txt"):
+        return _concat(iter_csv_chunks(path, chunksize, columns, rename))
+    if extension in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        return JobTable(_rename(_arrow_columns(pq.read_table(path, columns=columns, memory_map=mmap)), rename))
+    if extension in (".feather", ".arrow"):
+        import pyarrow as pa
+        source = pa.memory_map(path) if mmap else pa.OSFile(path)
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return JobTable(_rename(_arrow_columns(table), rename))
+    if extension == ".npy":
+        array = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        if array.dtype.names is None:
+            raise ValueError(f"{path} must hold a structured array with one field per job column")
+        names = columns or array.dtype.names
+        return JobTable(_rename({name: array[name] for name in names}, rename))
+    if extension == ".npz":
+        with np.load(path, allow_pickle=False) as archive:
+            names = columns or archive.files
+            return JobTable(_rename({name: archive[name] for name in names}, rename))
+    raise ValueError(f"Unsupported job file extension {extension!r}")
+
+
+def save_jobs(jobs, path):
+    """Write a JobTable (or list of job dicts) in the format given by the extension."""
+    table = jobs if isinstance(jobs, JobTable) else JobTable.from_records(jobs)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".txt"):
+        table.to_frame().to_csv(path, index=False)
+    elif extension in (".parquet", ".pq"):
+        table.to_frame().to_parquet(path, index=False)
+    elif extension in (".feather", ".arrow"):
+        table.to_frame().to_feather(path)
+    elif extension == ".npy":
+        columns = {name: values.astype(str) if values.dtype == object else values
+                   for name, values in table.columns.items()}
+        array = np.empty(len(table), dtype=[(name, values.dtype) for name, values in columns.items()])
+        for name, values in columns.items():
+            array[name] = values
+        np.save(path, array)
+    elif extension == ".npz":
+        np.savez(path, **{name: values.astype(str) if values.dtype == object else values
+                          for name, values in table.columns.items()})
+    else:
+        raise ValueError(f"Unsupported job file extension {extension!r}")
@@ -0,0 +1,261 @@
+import math
+import random
+import time
+from bisect import insort
+
+from batch_evaluation import MODELS
+
+NEIGHBORHOODS = ("move", "swap", "split", "merge")
+
+
+# -----------------------------
+# Batch cost under each completion model
+# -----------------------------
+class _Search:
+    """
+    Mutable batch list with cached per-batch cost (and completion times for
+    the serial model) so a move only re-scores what it touches.
+
+    Batches are lists of job indices kept in sequence order. Moves replace
+    member lists instead of mutating them. Emptied batches stay in place
+    (cost 0, no oven time) until the list is compacted.
+    """
+
+    def __init__(self, jobs, batches, model, weight_key):
+        self.jobs = jobs
+        self.model = model
+        self.r = [job['release_time'] for job in jobs]
+        self.p = [job['processing_time'] for job in jobs]
+        self.d = [job['due_date'] for job in jobs]
+        self.w = [job[weight_key] for job in jobs]
+        self.batches = batches
+        self.cost = []
+        self.comp = []
+        prev = 0
+        for members in batches:
+            cost, prev = self.batch_cost(members, prev)
+            self.cost.append(cost)
+            self.comp.append(prev)
+
+    def batch_cost(self, members, prev):
+        """Weighted tardiness of one batch and the oven-free time after it."""
+        if not members:
+            return 0, prev
+        r, p, d, w = self.r, self.p, self.d, self.w
+        if self.model == "sequential":
+            completion, cost = 0, 0
+            for j in members:
+                completion = max(completion, r[j]) + p[j]
+                cost += w[j] * max(0, completion - d[j])
+            return cost, prev
+        if self.model == "batch":
+            completion = min(r[j] for j in members) + max(p[j] for j in members)
+            tardiness = max(0, completion - min(d[j] for j in members))
+            return tardiness * sum(w[j] for j in members), prev
+        completion = max(prev, max(r[j] for j in members)) + max(p[j] for j in members)
+        return sum(w[j] * max(0, completion - d[j]) for j in members if completion > d[j]), completion
+
+    def evaluate(self, lo, hi, new_batches, changed):
+        """
+        Score replacing batches[lo:hi] with `new_batches`.
+
+        `changed` holds the positions in `new_batches` that differ from the old
+        batch at the same index; the others are reused when their start time
+        is unchanged. In the serial model the new completion times are pushed
+        downstream until they match the old ones again.
+
+        Returns:
+            tuple: (delta, new costs, new completions, end of recomputed range)
+        """
+        old_cost, old_comp = self.cost, self.comp
+        new_costs, new_comps = [], []
+        serial = self.model == "serial"
+        prev = old_comp[lo - 1] if lo > 0 else 0
+        for i, members in enumerate(new_batches):
+            if i not in changed and (not serial or prev == (old_comp[lo + i - 1] if lo + i > 0 else 0)):
+                cost, prev = old_cost[lo + i], old_comp[lo + i]
+            else:
+                cost, prev = self.batch_cost(members, prev)
+            new_costs.append(cost)
+            new_comps.append(prev)
+
+        end = hi
+        if serial:
+            # Downstream batches only move if the oven frees up at a new time
+            while end < len(self.batches) and prev != old_comp[end - 1]:
+                cost, prev = self.batch_cost(self.batches[end], prev)
+                new_costs.append(cost)
+                new_comps.append(prev)
+                end += 1
+        delta = sum(new_costs) - sum(old_cost[lo:end])
+        return delta, new_costs, new_comps, end
+
+    def apply(self, lo, hi, new_batches, new_costs, new_comps, end):
+        self.batches[lo:hi] = new_batches
+        self.cost[lo:end] = new_costs
+        self.comp[lo:end] = new_comps
+
+    def compact(self):
+        """Drop empty batches (they cost nothing and do not hold the oven)."""
+        keep = [i for i, members in enumerate(self.batches) if members]
+        self.batches = [self.batches[i] for i in keep]
+        self.cost = [self.cost[i] for i in keep]
+        self.comp = [self.comp[i] for i in keep]
+
+
+# -----------------------------
+# Local search / simulated annealing
+# -----------------------------
+def improve_batches(batches, model="serial", time_limit=1.0, max_moves=None, seed=None,
+                    temperature=None, max_batch_size=None, capacity=None, size_key='size',
+                    weight_key='weight', neighborhoods=NEIGHBORHOODS):
+    """
+    Improve a batch list with move / swap / split / merge neighbourhoods.
+
+    Every move is scored incrementally: only the batches it changes are
+    re-scored, plus, in the serial model, the downstream batches whose start
+    time shifts. Moves are accepted with the Metropolis rule; the temperature
+    decays geometrically over the time budget to 0.1% of its start value.
+
+    Args:
+        batches (list[list[dict]]): batches returned by any heuristic.
+        model (str): completion model, see batch_evaluation.MODELS.
+        time_limit (float): wall-clock budget in seconds.
+        max_moves (int | None): optional cap on proposed moves.
+        seed (int | None): seed for move selection and acceptance.
+        temperature (float | None): starting temperature; None estimates it
+            from the initial schedule, 0 gives pure descent.
+        max_batch_size (int | None): maximum jobs per batch.
+        capacity (float | None): maximum summed job size per batch.
+        size_key, weight_key (str): job keys for size and weight.
+        neighborhoods (tuple[str]): subset of NEIGHBORHOODS to use.
+
+    Returns:
+        tuple: (improved batches, stats dict with initial/final/best TWT, move
+        counts and acceptance per neighbourhood, elapsed time). Without any
+        jobs there is nothing to move: ([], all-zero stats).
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    rng = random.Random(seed)
+    jobs = [job for batch in batches for job in batch]
+    if not jobs:
+        return [], {
+            "initial_twt": 0, "final_twt": 0, "best_twt": 0, "moves": 0, "elapsed": 0.0,
+            "start_temperature": 0.0,
+            "neighborhoods": {name: {"proposed": 0, "infeasible": 0, "accepted": 0, "improving": 0}
+                              for name in neighborhoods},
+        }
+    position = 0
+    index_batches = []
+    for batch in batches:
+        index_batches.append(list(range(position, position + len(batch))))
+        position += len(batch)
+    sizes = [job.get(size_key, 1) for job in jobs]
+    state = _Search(jobs, index_batches, model, weight_key)
+
+    def fits(members):
+        if max_batch_size is not None and len(members) > max_batch_size:
+            return False
+        return capacity is None or sum(sizes[j] for j in members) <= capacity
+
+    def propose(kind):
+        """Return (lo, hi, new_batches, changed) or None if the move is not possible."""
+        blist = state.batches
+        a = rng.randrange(len(blist))
+        if not blist[a]:
+            return None
+        if kind == "split":
+            if len(blist[a]) < 2:
+                return None
+            members = blist[a][:]
+            rng.shuffle(members)
+            cut = rng.randrange(1, len(members))
+            return a, a + 1, [sorted(members[:cut]), sorted(members[cut:])], {0, 1}
+        b = rng.randrange(len(blist))
+        if b == a or (kind != "move" and not blist[b]):
+            return None
+        new_a, new_b = blist[a][:], blist[b][:]
+        if kind == "move":
+            job = new_a.pop(rng.randrange(len(new_a)))
+            insort(new_b, job)
+        elif kind == "swap":
+            i, k = rng.randrange(len(new_a)), rng.randrange(len(new_b))
+            ja, jb = new_a.pop(i), new_b.pop(k)
+            insort(new_a, jb)
+            insort(new_b, ja)
+        else:  # merge b into a
+            new_a = sorted(new_a + new_b)
+            new_b = []
+        if not (fits(new_a) and fits(new_b)):
+            return None
+        lo, hi = min(a, b), max(a, b) + 1
+        new_batches = blist[lo:hi]
+        new_batches[a - lo], new_batches[b - lo] = new_a, new_b
+        return lo, hi, new_batches, {a - lo, b - lo}
+
+    initial_twt = sum(state.cost)
+    current = best = initial_twt
+    best_batches = None  # snapshot of the best state, taken only when leaving it
+    stats = {name: {"proposed": 0, "infeasible": 0, "accepted": 0, "improving": 0}
+             for name in neighborhoods}
+
+    if temperature is None:
+        # Mean uphill delta of a few random moves, so early uphill moves pass ~half the time
+        uphill = []
+        for _ in range(100):
+            move = propose(rng.choice(neighborhoods))
+            if move is not None:
+                delta = state.evaluate(*move)[0]
+                if delta > 0:
+                    uphill.append(delta)
+        temperature = (sum(uphill) / len(uphill)) / math.log(2) if uphill else 0.0
+    start_temperature = temperature
+
+    start = time.perf_counter()
+    moves = 0
+    elapsed = 0.0
+    while max_moves is None or moves < max_moves:
+        if moves % 256 == 0:
+            elapsed = time.perf_counter() - start
+            if elapsed >= time_limit:
+                break
+            temperature = start_temperature * 1e-3 ** (elapsed / time_limit)
+        if moves % 65536 == 0 and 2 * state.batches.count([]) > len(state.batches):
+            state.compact()
+        moves += 1
+        kind = rng.choice(neighborhoods)
+        counters = stats[kind]
+        counters["proposed"] += 1
+        move = propose(kind)
+        if move is None:
+            counters["infeasible"] += 1
+            continue
+        delta, new_costs, new_comps, end = state.evaluate(*move)
+        if delta <= 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+            if delta > 0 and current == best and best_batches is None:
+                # Member lists are never mutated in place, so a shallow copy is enough
+                best_batches = list(state.batches)
+            lo, hi, new_batches, _ = move
+            state.apply(lo, hi, new_batches, new_costs, new_comps, end)
+            current += delta
+            counters["accepted"] += 1
+            if delta < 0:
+                counters["improving"] += 1
+            if current < best:
+                best = current
+                best_batches = None
+
+    if best_batches is None:
+        best_batches = state.batches
+    result = [[jobs[j] for j in members] for members in best_batches if members]
+    summary = {
+        "initial_twt": initial_twt,
+        "final_twt": current,
+        "best_twt": best,
+        "moves": moves,
+        "elapsed": time.perf_counter() - start,
+        "start_temperature": start_temperature,
+        "neighborhoods": stats,
+    }
+    return result, summary
@@ -0,0 +1,211 @@
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Disabled by default: timer() hands back a shared no-op context manager and
+# count()/record() return after one flag check, so instrumented code pays a
+# function call per hook and nothing else.
+_enabled = False
+_timers = {}
+_counters = {}
+_profiler = None
+_started_tracemalloc = False
+_memory = {}
+
+_NULL_TIMER = nullcontext()
+
+
+# -----------------------------
+# Switching collection on and off
+# -----------------------------
+def enable(profile=False, trace_memory=False):
+    """
+    Start collecting stage timers and counters.
+
+    Args:
+        profile (bool): also run cProfile until disable().
+        trace_memory (bool): also track allocations with tracemalloc
+            (current and peak traced memory appear in the snapshot).
+    """
+    global _enabled, _profiler, _started_tracemalloc
+    _enabled = True
+    if profile and _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    """Stop collecting; what was collected stays available to snapshot()."""
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+    if _started_tracemalloc:
+        _memory["current_bytes"], _memory["peak_bytes"] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def reset():
+    """Drop all timers, counters, profile data and memory figures."""
+    global _profiler
+    _timers.clear()
+    _counters.clear()
+    _memory.clear()
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+        if _enabled:
+            enable(profile=True)
+    if _started_tracemalloc:
+        tracemalloc.reset_peak()
+
+
+def is_enabled():
+    return _enabled
+
+
+# -----------------------------
+# Hooks used by the schedulers
+# -----------------------------
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.stage, time.perf_counter() - self.start)
+
+
+def timer(stage):
+    """Context manager adding the wall time of its block to `stage`."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+
+def record(stage, seconds):
+    """Add one timed call of `stage` lasting `seconds` (e.g. measured in a worker process)."""
+    if not _enabled:
+        return
+    entry = _timers.get(stage)
+    if entry is None:
+        _timers[stage] = [1, seconds, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+
+
+def count(name, value=1):
+    """Increase counter `name` by `value`."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def timed(stage=None):
+    """Decorator timing every call of the function as `stage` (default: its name)."""
+    def decorate(func):
+        name = stage or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def _profile_rows(top):
+    if _profiler is None:
+        return []
+    stats = pstats.Stats(_profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return [{
+        "function": f"{filename}:{line}({name})",
+        "calls": calls,
+        "total_seconds": total,
+        "cumulative_seconds": cumulative,
+    } for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+
+def snapshot(top=25):
+    """
+    Collected metrics as a JSON-serializable dict.
+
+    Args:
+        top (int): number of cProfile entries to keep, by cumulative time.
+
+    Returns:
+        dict: 'timers' (stage -> calls, total/mean/max seconds), 'counters',
+        and 'profile' / 'memory' when that capture was enabled.
+    """
+    result = {
+        "timers": {stage: {
+            "calls": calls,
+            "total_seconds": total,
+            "mean_seconds": total / calls,
+            "max_seconds": longest,
+        } for stage, (calls, total, longest) in sorted(_timers.items())},
+        "counters": dict(sorted(_counters.items())),
+    }
+    if _profiler is not None:
+        result["profile"] = _profile_rows(top)
+    if _started_tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        result["memory"] = {"current_bytes": current, "peak_bytes": peak}
+    elif _memory:
+        result["memory"] = dict(_memory)
+    return result
+
+
+def export_json(path, top=25, **extra):
+    """Write snapshot() plus any `extra` run metadata to `path`; returns the dict."""
+    data = {**extra, **snapshot(top)}
+    with open(path, "w") as handle:
+        json.dump(data, handle, indent=2)
+    return data
+
+
+@contextmanager
+def collect(path=None, profile=False, trace_memory=False, **extra):
+    """
+    Collect metrics for the enclosed block, from a clean slate.
+
+    Usage::
+
+        with metrics.collect("run_metrics.json", profile=True):
+            simulate_burnin(p, d, w, num_runs=50)
+
+    The JSON file (if `path` is given) is written when the block exits, also
+    when it raises.
+    """
+    reset()
+    enable(profile, trace_memory)
+    try:
+        yield
+    finally:
+        disable()
+        if path is not None:
+            export_json(path, **extra)
@@ -0,0 +1,194 @@
+import heapq
+from typing import NamedTuple
+
+import numpy as np
+
+import metrics
+from batch_evaluation import batches_to_columns
+from job_table import job_columns
+
+# Order in which batches are handed to the ovens:
+#   "given":   the order the heuristic produced them in (its priority order)
+#   "release": earliest batch release time first (ties keep the given order)
+#   "edd":     earliest due date in the batch first (ties keep the given order)
+SEQUENCES = ("given", "release", "edd")
+
+
+class OvenSchedule(NamedTuple):
+    """Result of :func:`schedule_ovens` / :func:`schedule_assignment`.
+
+    Per-batch arrays follow the batch order of the input (batch b is the b-th
+    batch, or the b-th distinct label of the assignment vector).
+    """
+    machine: np.ndarray
+    start: np.ndarray
+    completion: np.ndarray
+    weighted_tardiness: np.ndarray
+    total_weighted_tardiness: float
+    makespan: float
+    job_completion_time: np.ndarray
+
+
+# -----------------------------
+# List scheduling over M ovens
+# -----------------------------
+@metrics.timed("oven_dispatch")
+def dispatch_batches(ready, length, num_machines=1, speeds=None, order=None, start_time=0):
+    """
+    Assign batches to parallel ovens, each batch to the oven that finishes it first.
+
+    Batches are taken one by one in `order`; a batch starts once its oven is
+    free and its latest job is released. Oven availability times live in a
+    heap, so each batch costs O(log M). For uniform ovens (`speeds`), ovens
+    of equal speed are interchangeable and share one heap; a batch then
+    compares the earliest oven of every speed class, O(K log M) for K
+    distinct speeds.
+
+    Args:
+        ready (array): release time of each batch (latest job release).
+        length (array): processing time of each batch at speed 1.
+        num_machines (int): number of ovens; ignored when `speeds` is given.
+        speeds (array | None): relative speed of each oven (uniform machines);
+            a batch takes length / speed on an oven.
+        order (array | None): batch indices in dispatch order; default 0..B-1.
+        start_time (float): time at which every oven becomes available.
+
+    Returns:
+        tuple: (machine, start, completion) arrays indexed by batch.
+    """
+    ready = np.asarray(ready)
+    length = np.asarray(length)
+    if speeds is not None:
+        speeds = np.asarray(speeds, dtype=float)
+        if speeds.ndim != 1 or speeds.size == 0 or np.any(speeds <= 0):
+            raise ValueError("speeds must be a non-empty vector of positive values")
+        num_machines = speeds.size
+    elif num_machines < 1:
+        raise ValueError(f"num_machines must be at least 1, got {num_machines}")
+
+    sequence = range(ready.size) if order is None else np.asarray(order).tolist()
+    r, p = ready.tolist(), length.tolist()
+    machine = [0] * ready.size
+    start = [0] * ready.size
+    completion = [0] * ready.size
+
+    if speeds is None:
+        # (available at, oven) pairs; a sorted list is already a heap
+        ovens = [(start_time, m) for m in range(num_machines)]
+        for b in sequence:
+            available, m = ovens[0]
+            s = available if available > r[b] else r[b]
+            c = s + p[b]
+            heapq.heapreplace(ovens, (c, m))
+            machine[b], start[b], completion[b] = m, s, c
+        dtype = np.result_type(ready, length, type(start_time))
+    else:
+        classes, inverse = np.unique(speeds, return_inverse=True)
+        heaps = [[(start_time, m) for m in np.flatnonzero(inverse == k).tolist()] for k in range(classes.size)]
+        rates = classes.tolist()
+        for b in sequence:
+            best = None
+            for k, heap in enumerate(heaps):
+                available, m = heap[0]
+                s = available if available > r[b] else r[b]
+                candidate = (s + p[b] / rates[k], m, k, s)
+                if best is None or candidate < best:
+                    best = candidate
+            c, m, k, s = best
+            heapq.heapreplace(heaps[k], (c, m))
+            machine[b], start[b], completion[b] = m, s, c
+        dtype = float
+
+    metrics.count("batches_dispatched", ready.size)
+    return np.array(machine, dtype=np.int64), np.array(start, dtype=dtype), np.array(completion, dtype=dtype)
+
+
+def _dispatch_order(sequence, ready, due):
+    if sequence == "given":
+        return None
+    if sequence == "release":
+        return np.argsort(ready, kind="stable")
+    if sequence == "edd":
+        return np.argsort(due, kind="stable")
+    raise ValueError(f"Unknown sequence {sequence!r}; expected one of {SEQUENCES}")
+
+
+def schedule_assignment(release_times, processing_times, due_dates, weights, assignment,
+                        num_machines=1, speeds=None, sequence="given", start_time=0):
+    """
+    Dispatch the batches of a job-to-batch assignment onto parallel ovens.
+
+    Column form of :func:`schedule_ovens` for large instances: batch release
+    and length come from segmented reductions, the dispatch is one heap pass
+    over the batches, and every job's tardiness against the completion of its
+    batch is scored in a single vectorized pass. With one oven and the given
+    sequence the result matches the "serial" model of evaluate_batches.
+
+    Args:
+        release_times, processing_times, due_dates, weights (array): job columns.
+        assignment (array): batch label per job; batches are ordered by label.
+        num_machines, speeds, start_time: see dispatch_batches.
+        sequence (str): one of SEQUENCES.
+
+    Returns:
+        OvenSchedule
+    """
+    assignment = np.asarray(assignment)
+    if assignment.size == 0:
+        raise ValueError("cannot schedule an empty job set")
+    if np.any(assignment[1:] < assignment[:-1]):
+        order = np.argsort(assignment, kind="stable")
+    else:
+        order = slice(None)
+    labels = assignment[order]
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    segment = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, labels.size]))
+
+    r = np.asarray(release_times)[order]
+    d = np.asarray(due_dates)[order]
+    ready = np.maximum.reduceat(r, starts)
+    length = np.maximum.reduceat(np.asarray(processing_times)[order], starts)
+
+    dispatch = _dispatch_order(sequence, ready, np.minimum.reduceat(d, starts) if sequence == "edd" else None)
+    machine, start, completion = dispatch_batches(ready, length, num_machines, speeds, dispatch, start_time)
+
+    job_completion = completion[segment]
+    weighted = np.maximum(job_completion - d, 0) * np.asarray(weights)[order]
+    batch_weighted = np.add.reduceat(weighted, starts)
+    job_completion_time = np.empty_like(job_completion)
+    job_completion_time[order] = job_completion
+    return OvenSchedule(machine, start, completion, batch_weighted, weighted.sum().item(),
+                        completion.max().item(), job_completion_time)
+
+
+def schedule_ovens(batches, num_machines=1, speeds=None, sequence="given", jobs=None,
+                   weight_key='weight', start_time=0):
+    """
+    Assign heuristic batches to M identical (or uniform) parallel ovens.
+
+    Args:
+        batches (list[list]): batches of job dicts/JobRecords as returned by
+            the heuristics, or of job ids (classical approach.py) with `jobs`.
+        num_machines (int): number of identical ovens.
+        speeds (array | None): per-oven speeds for uniform ovens.
+        sequence (str): dispatch order, one of SEQUENCES.
+        jobs (JobTable | array | list | None): job set the ids in `batches`
+            refer to.
+        weight_key (str): job key holding the weight ('weight' or 'size').
+        start_time (float): time at which the ovens become available.
+
+    Returns:
+        OvenSchedule: job_completion_time follows the jobs in batch order.
+    """
+    if jobs is None:
+        columns = batches_to_columns(batches, weight_key)
+        assignment = columns['assignment']
+    else:
+        jobs = job_columns(jobs)
+        rows = {job_id: row for row, job_id in enumerate(jobs['id'].tolist())}
+        index = np.array([rows[job_id] for batch in batches for job_id in batch], dtype=np.int64)
+        columns = {name: jobs[name][index] for name in ('release_time', 'processing_time', 'due_date')}
+        columns['weight'] = jobs[weight_key][index]
+        assignment = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+    return schedule_assignment(columns['release_time'], columns['processing_time'], columns['due_date'],
+                               columns['weight'], assignment, num_machines, speeds, sequence, start_time)
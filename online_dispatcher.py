@@ -0,0 +1,148 @@
+import heapq
+import itertools
+from typing import NamedTuple
+
+PRIORITIES = ("edd", "wspt", "fifo")
+
+# Event kinds, ordered so that at equal times every arrival is queued before
+# the oven is released and the dispatch decision is made.
+ARRIVAL, COMPLETION = 0, 1
+
+
+class DispatchedBatch(NamedTuple):
+    """One batch released to the oven by :class:`OnlineDispatcher`."""
+    batch_id: int
+    jobs: list
+    start: float
+    completion: float
+    load: float
+    weighted_tardiness: float
+
+
+# -----------------------------
+# Event-driven online dispatcher
+# -----------------------------
+class OnlineDispatcher:
+    """
+    Forms capacity-limited batches from a stream of jobs as they are released.
+
+    Two heaps carry all state: the event queue (job releases and the oven's
+    batch completion, keyed on time) and the queue of released jobs waiting
+    for the oven (keyed on the dispatch priority). Each job is pushed and
+    popped once on each heap, so the work per job is O(log n) in the number of
+    pending jobs and memory is bounded by the backlog, not the stream length.
+
+    Whenever the oven is free and jobs are waiting, a batch is filled from the
+    waiting queue in priority order until the next job would exceed
+    `capacity` or `max_batch_size`. The oven runs one batch at a time for the
+    batch's longest processing time (the serial model in batch_evaluation).
+
+    Usage::
+
+        dispatcher = OnlineDispatcher(capacity=20)
+        for job in stream:                      # non-decreasing release times
+            for batch in dispatcher.push(job):  # batches started before job arrives
+                ...
+        for batch in dispatcher.flush():
+            ...
+
+    push() processes its events eagerly, so the clock, the queues and the
+    stats are up to date when it returns whether or not the caller looks at
+    the batches. advance() and flush() are generators: they only process
+    events (and move the clock) as far as they are consumed.
+    """
+
+    def __init__(self, capacity, max_batch_size=None, priority="edd", size_key='size', weight_key='weight'):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+        self.capacity = capacity
+        self.max_batch_size = max_batch_size
+        self.priority = priority
+        self.size_key = size_key
+        self.weight_key = weight_key
+        self.clock = 0
+        self.oven_busy = False
+        self.events = []
+        self.waiting = []
+        self._seq = itertools.count()
+        self._batch_ids = itertools.count(1)
+        self.stats = {"jobs": 0, "batches": 0, "total_weighted_tardiness": 0, "max_waiting": 0}
+
+    def _key(self, job):
+        if self.priority == "edd":
+            return job['due_date']
+        if self.priority == "wspt":
+            weight = job[self.weight_key]
+            return job['processing_time'] / weight if weight else float("inf")
+        return job['release_time']
+
+    def push(self, job):
+        """
+        Queue a job for release and advance the clock to its release time.
+
+        Every event before the release time is processed before this returns;
+        a job released earlier than the clock is queued as arriving now.
+
+        Returns:
+            list[DispatchedBatch]: batches started strictly before the job's
+            release time.
+        """
+        if job[self.size_key] > self.capacity:
+            raise ValueError(f"job {job.get('id')!r} of size {job[self.size_key]} exceeds capacity {self.capacity}")
+        release = max(job['release_time'], self.clock)
+        heapq.heappush(self.events, (release, ARRIVAL, next(self._seq), job))
+        self.stats["jobs"] += 1
+        started = list(self.advance(release, inclusive=False))
+        self.clock = release
+        return started
+
+    def advance(self, until, inclusive=True):
+        """Process events up to time `until`, yielding each batch as it is started."""
+        events = self.events
+        while events and (events[0][0] < until or (inclusive and events[0][0] == until)):
+            now = events[0][0]
+            self.clock = now
+            # Drain everything that happens at this instant before deciding
+            while events and events[0][0] == now:
+                _, kind, _, job = heapq.heappop(events)
+                if kind == ARRIVAL:
+                    heapq.heappush(self.waiting, (self._key(job), next(self._seq), job))
+                else:
+                    self.oven_busy = False
+            self.stats["max_waiting"] = max(self.stats["max_waiting"], len(self.waiting))
+            if not self.oven_busy and self.waiting:
+                yield self._start_batch(now)
+
+    def flush(self):
+        """Process every remaining event; yields the remaining batches."""
+        return self.advance(float("inf"))
+
+    def _start_batch(self, now):
+        waiting = self.waiting
+        members, load = [], 0
+        while waiting and load + waiting[0][2][self.size_key] <= self.capacity and \
+                (self.max_batch_size is None or len(members) < self.max_batch_size):
+            job = heapq.heappop(waiting)[2]
+            members.append(job)
+            load += job[self.size_key]
+        completion = now + max(job['processing_time'] for job in members)
+        weighted = sum(job[self.weight_key] * max(0, completion - job['due_date']) for job in members)
+        heapq.heappush(self.events, (completion, COMPLETION, next(self._seq), None))
+        self.oven_busy = True
+        self.stats["batches"] += 1
+        self.stats["total_weighted_tardiness"] += weighted
+        return DispatchedBatch(next(self._batch_ids), members, now, completion, load, weighted)
+
+
+def dispatch_stream(jobs, capacity, max_batch_size=None, priority="edd", size_key='size', weight_key='weight'):
+    """
+    Generator over the batches formed online from an iterable of jobs.
+
+    Jobs must arrive in non-decreasing release-time order (a job released
+    earlier than the current clock is treated as arriving now). The iterable
+    is consumed lazily, so it may be an unbounded stream.
+    """
+    dispatcher = OnlineDispatcher(capacity, max_batch_size, priority, size_key, weight_key)
+    for job in jobs:
+        yield from dispatcher.push(job)
+    yield from dispatcher.flush()
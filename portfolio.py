@@ -0,0 +1,241 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+import numpy as np
+
+import metrics
+from batch_evaluation import evaluate_batches
+from job_table import as_job_array
+from script_loader import load_script
+
+# Portfolio members. Each one batches every job exactly once:
+#   "edd", "spt", "wspt", "hybrid": the dispatch rules of edd+spt+wspt.py
+#   "jpi_hybrid":   advanced_hybrid_scheduling (Job Priority Index order)
+#   "capacity":     capacity-limited packing in due-date order (bin_packing)
+#   "local_search": the EDD batches improved by local_search.improve_batches
+#                   for the remaining time budget (the expensive member)
+RULES = ("edd", "spt", "wspt", "hybrid", "jpi_hybrid", "capacity", "local_search")
+DEFAULT_RULES = ("edd", "spt", "wspt", "hybrid", "jpi_hybrid", "capacity")
+
+# Completion models whose score ignores the job order inside a batch, so
+# every member can be scored on the shared columns in one call
+PORTFOLIO_MODELS = ("serial", "batch")
+
+# Budget for "local_search" when the portfolio runs without one
+LOCAL_SEARCH_SECONDS = 1.0
+
+# Share of time_budget budget-aware members may use; the rest covers their
+# wrap-up and the scoring, so they finish before the hard cutoff
+SOFT_DEADLINE = 0.9
+
+
+class RuleResult(NamedTuple):
+    """Outcome of one portfolio member.
+
+    status is "done", "error" (the member raised or returned an invalid
+    batching; `error` holds the exception) or "timeout"; batches and TWT
+    are None unless it is "done".
+    """
+    status: str
+    batches: list
+    total_weighted_tardiness: float
+    elapsed: float
+    error: Exception = None
+
+
+class PortfolioResult(NamedTuple):
+    """Best member of :func:`portfolio_scheduling` plus every member's outcome."""
+    rule: str
+    batches: list
+    total_weighted_tardiness: float
+    results: dict
+    elapsed: float
+
+
+# -----------------------------
+# Members
+# -----------------------------
+def _spt_rule(name):
+    def run(jobs, options, deadline):
+        return getattr(load_script("edd+spt+wspt.py"), f"{name}_scheduling")(jobs)
+    return run
+
+
+def _jpi_hybrid(jobs, options, deadline):
+    return load_script("edd+advanced schedulingfinal.py").advanced_hybrid_scheduling(
+        jobs, coefficients=options.get('coefficients'))
+
+
+def _capacity(jobs, options, deadline):
+    from bin_packing import pack_jobs
+    capacity = options.get('capacity')
+    if capacity is None:
+        capacity = load_script("bo research1.py").BATCH_CAPACITY
+    return pack_jobs(jobs, capacity, options.get('packing', "next_fit"), options.get('window'),
+                     options.get('max_batch_size'))
+
+
+def _local_search(jobs, options, deadline):
+    from local_search import improve_batches
+    start = load_script("edd+spt+wspt.py").edd_scheduling(jobs)
+    time_limit = LOCAL_SEARCH_SECONDS if deadline is None else max(0.0, deadline - time.perf_counter())
+    return improve_batches(start, model=options['model'], time_limit=time_limit,
+                           seed=options.get('seed'), max_batch_size=options.get('max_batch_size'))[0]
+
+
+_MEMBERS = {
+    "edd": _spt_rule("edd"),
+    "spt": _spt_rule("spt"),
+    "wspt": _spt_rule("wspt"),
+    "hybrid": _spt_rule("hybrid"),
+    "jpi_hybrid": _jpi_hybrid,
+    "capacity": _capacity,
+    "local_search": _local_search,
+}
+
+
+def _run_member(rule, jobs, options, deadline):
+    """(batches, seconds, exception); a failing member must not take the others down."""
+    start = time.perf_counter()
+    try:
+        batches = _MEMBERS[rule](jobs, options, deadline)
+    except Exception as error:
+        return None, time.perf_counter() - start, error
+    return batches, time.perf_counter() - start, None
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def _assignment(jobs, batches, rule):
+    """Batch index per job row; every job must appear exactly once."""
+    assignment = np.full(len(jobs), -1, dtype=np.int64)
+    rows = np.fromiter((job.index for batch in batches for job in batch), dtype=np.int64)
+    assignment[rows] = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+    if rows.size != len(jobs) or np.any(assignment < 0):
+        raise ValueError(f"rule {rule!r} did not batch every job exactly once")
+    return assignment
+
+
+def score_schedules(jobs, schedules, model="serial"):
+    """
+    Total weighted tardiness of several batchings of the same job table.
+
+    The batchings become one (k, n) assignment stack over the shared job
+    columns, scored by a single evaluate_batches call.
+
+    Args:
+        jobs (JobTable | array): job set the batches' JobRecords view.
+        schedules (list[list[list[JobRecord]]]): batchings to score.
+        model (str): one of PORTFOLIO_MODELS.
+
+    Returns:
+        np.ndarray: TWT per batching.
+    """
+    if model not in PORTFOLIO_MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {PORTFOLIO_MODELS}")
+    jobs = as_job_array(jobs)
+    return _score_stack(jobs, [_assignment(jobs, batches, i) for i, batches in enumerate(schedules)], model)
+
+
+def _score_stack(jobs, assignments, model):
+    return evaluate_batches(jobs['release_time'], jobs['processing_time'], jobs['due_date'],
+                            jobs['weight'], np.stack(assignments), model=model).total_weighted_tardiness
+
+
+# -----------------------------
+# Portfolio
+# -----------------------------
+@metrics.timed("portfolio")
+def portfolio_scheduling(jobs, rules=DEFAULT_RULES, time_budget=None, model="serial", n_workers=None,
+                         **options):
+    """
+    Run several dispatch rules concurrently and keep the best schedule.
+
+    The members share one read-only view of the job table and run in a
+    thread pool. Once they finish, all schedules are scored together (see
+    score_schedules); ties go to the member listed first in `rules`.
+
+    A member that raises, or does not batch every job exactly once, is
+    reported as "error" and left out; the portfolio only fails when no
+    member succeeds. With `time_budget`, members still running when it
+    expires are reported as "timeout" and left out. Python threads cannot
+    be stopped, so a member that ignores the budget keeps running in the
+    background until it returns; "local_search" is handed the remaining budget as its own time
+    limit (less a margin, see SOFT_DEADLINE) and stops in time.
+
+    Args:
+        jobs (list[dict] | JobTable | array): job set.
+        rules (tuple[str]): members, a subset of RULES.
+        time_budget (float | None): wall-clock seconds for the whole portfolio.
+        model (str): completion model used for scoring, one of PORTFOLIO_MODELS.
+        n_workers (int | None): threads; default one per member.
+        **options: member settings - capacity, packing, window and
+            max_batch_size ("capacity"), coefficients ("jpi_hybrid"),
+            seed ("local_search").
+
+    Returns:
+        PortfolioResult: best rule, its batches and TWT, and a RuleResult
+        (status, batches, TWT, seconds, error) for every member.
+
+    Raises:
+        RuntimeError: every finished member failed (chained to the first error).
+        TimeoutError: no member finished within time_budget.
+    """
+    unknown = [rule for rule in rules if rule not in RULES]
+    if unknown:
+        raise ValueError(f"Unknown rules {unknown}; expected a subset of {RULES}")
+    if model not in PORTFOLIO_MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {PORTFOLIO_MODELS}")
+    if not rules:
+        raise ValueError("the portfolio needs at least one rule")
+
+    start = time.perf_counter()
+    deadline = None if time_budget is None else start + SOFT_DEADLINE * time_budget
+    # A view, so the caller's array keeps its own flags
+    shared = as_job_array(jobs).view()
+    shared.flags.writeable = False
+    options = {**options, 'model': model}
+
+    executor = ThreadPoolExecutor(max_workers=n_workers or len(rules))
+    futures = {executor.submit(_run_member, rule, shared, options, deadline): rule for rule in rules}
+    try:
+        done, _ = wait(futures, timeout=time_budget)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results, finished, assignments, failures = {}, {}, [], {}
+    for future, rule in futures.items():
+        if future not in done:
+            results[rule] = RuleResult("timeout", None, None, time.perf_counter() - start)
+            continue
+        batches, elapsed, error = future.result()
+        metrics.record(f"portfolio_{rule}", elapsed)
+        if error is None:
+            try:
+                assignments.append(_assignment(shared, batches, rule))
+                finished[rule] = batches, elapsed
+                continue
+            except ValueError as invalid:
+                error = invalid
+        failures[rule] = error
+        results[rule] = RuleResult("error", None, None, elapsed, error)
+    metrics.count("portfolio_timeouts", len(rules) - len(finished) - len(failures))
+    metrics.count("portfolio_errors", len(failures))
+
+    if not finished:
+        if failures:
+            raise RuntimeError(f"no portfolio member succeeded: {failures}") from next(iter(failures.values()))
+        raise TimeoutError(f"no portfolio member finished within {time_budget}s")
+
+    names = list(finished)
+    twt = _score_stack(shared, assignments, model).tolist()
+    for rule, value in zip(names, twt):
+        batches, elapsed = finished[rule]
+        results[rule] = RuleResult("done", batches, value, elapsed)
+    results = {rule: results[rule] for rule in rules}
+
+    best = min(names, key=lambda rule: (results[rule].total_weighted_tardiness, rules.index(rule)))
+    return PortfolioResult(best, results[best].batches, results[best].total_weighted_tardiness,
+                           results, time.perf_counter() - start)
@@ -0,0 +1,385 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+from scipy import sparse
+
+FORMULATIONS = ("surrogate", "time_indexed")
+
+
+class QuboModel(NamedTuple):
+    """QUBO coefficients with energy x^T Q x + linear . x + offset.
+
+    `quadratic` is an upper-triangular CSR matrix (i < j). For the
+    time-indexed formulation, `var_job` / `var_start` give the job and start
+    slot of each assignment variable (-1 for slack variables). `job_data`
+    holds the (processing_times, due_dates, weights) arrays.
+    """
+    linear: np.ndarray
+    quadratic: sparse.csr_matrix
+    offset: float
+    var_job: np.ndarray
+    var_start: np.ndarray
+    job_data: tuple
+    info: dict
+
+
+def _upper_csr(rows, cols, vals, size):
+    """Sum duplicate (i, j) terms into an upper-triangular CSR matrix."""
+    rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+    keep = rows != cols
+    matrix = sparse.coo_matrix((vals[keep], (rows[keep], cols[keep])), shape=(size, size))
+    return matrix.tocsr()
+
+
+def _one_hot_terms(var_ids, penalty, coefficients=None, target=1):
+    """Expand penalty * (sum_i a_i x_i - target)^2 into linear/quadratic/offset terms."""
+    a = np.ones(var_ids.size) if coefficients is None else coefficients
+    linear = penalty * (a * a - 2 * target * a)
+    i, j = np.triu_indices(var_ids.size, 1)
+    return linear, var_ids[i], var_ids[j], 2 * penalty * a[i] * a[j], penalty * target * target
+
+
+# -----------------------------
+# 1. Linear surrogate (original model)
+# -----------------------------
+def surrogate_qubo(processing_times, due_dates, weights):
+    """
+    Linear surrogate sum_i w_i * (p_i - d_i) * x_i used by the original QAOA script.
+
+    Returns:
+        QuboModel
+    """
+    start = time.perf_counter()
+    p = np.asarray(processing_times, dtype=float)
+    d = np.asarray(due_dates, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    n = p.size
+    linear = w * (p - d)
+    info = {
+        "formulation": "surrogate",
+        "num_variables": n,
+        "num_jobs": n,
+        "build_seconds": time.perf_counter() - start,
+    }
+    return QuboModel(linear, sparse.csr_matrix((n, n)), 0.0,
+                     np.arange(n), np.zeros(n, dtype=int), (p, d, w), info)
+
+
+# -----------------------------
+# 2. Time-indexed TWT formulation
+# -----------------------------
+def time_indexed_qubo(processing_times, due_dates, weights, horizon=None,
+                      batch_capacity=None, penalty=None):
+    """
+    Time-indexed QUBO whose feasible minimum is the true total weighted tardiness.
+
+    Variable x_{j,t} = 1 if job j starts in slot t (0 <= t <= horizon - p_j).
+    Its linear cost is w_j * max(0, t + p_j - d_j). Penalty terms enforce:
+      * one start slot per job: P * (sum_t x_{j,t} - 1)^2
+      * no overlapping jobs on the oven: P * x_{j,t} * x_{k,t'} for
+        overlapping intervals.
+    With `batch_capacity` c, jobs starting in the same slot form a batch and
+    may overlap. At most c jobs may start per slot, via binary slack
+    variables. A pair in the same batch also pays the extra tardiness of the
+    shorter job waiting for the longer one. That term is exact for batches of
+    two and an upper bound for larger batches.
+
+    Args:
+        processing_times, due_dates, weights (array): job data (integer times).
+        horizon (int | None): number of time slots; defaults to sum(p).
+        batch_capacity (int | None): maximum jobs per batch; None = one job at a time.
+        penalty (float | None): constraint weight; defaults to one more than an
+            upper bound on the objective, so no violation can pay off.
+
+    Returns:
+        QuboModel
+    """
+    start_clock = time.perf_counter()
+    p = np.asarray(processing_times, dtype=np.int64)
+    d = np.asarray(due_dates, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    n = p.size
+    if horizon is None:
+        horizon = int(p.sum())
+    if np.any(p > horizon):
+        raise ValueError("horizon is shorter than the longest processing time")
+    batching = batch_capacity is not None
+    capacity_limited = batching and batch_capacity < n
+    if penalty is None:
+        penalty = 1.0 + float(np.sum(w * np.maximum(0, horizon + p.max() - d)))
+
+    # Assignment variables, laid out job by job
+    slots = horizon - p + 1
+    first = np.r_[0, np.cumsum(slots)[:-1]]
+    var_job = np.repeat(np.arange(n), slots)
+    var_start = np.arange(var_job.size) - first[var_job]
+    num_job_vars = var_job.size
+
+    # Slack variables for the per-slot batch capacity (log encoding of 0..c)
+    slack_coef = np.zeros(0)
+    if capacity_limited:
+        bits = int(batch_capacity).bit_length()
+        slack_coef = 2.0 ** np.arange(bits)
+        slack_coef[-1] = batch_capacity - (2 ** (bits - 1) - 1)
+    num_vars = num_job_vars + slack_coef.size * horizon
+
+    linear = np.zeros(num_vars)
+    linear[:num_job_vars] = w[var_job] * np.maximum(0, var_start + p[var_job] - d[var_job])
+    rows, cols, vals = [], [], []
+    offset = 0.0
+
+    # One start slot per job
+    for j in range(n):
+        ids = np.arange(first[j], first[j] + slots[j])
+        lin, r, c, v, const = _one_hot_terms(ids, penalty)
+        linear[ids] += lin
+        rows.append(r)
+        cols.append(c)
+        vals.append(v)
+        offset += const
+
+    # Overlap between jobs j < k: t - p_k < t' < t + p_j
+    for j in range(n - 1):
+        t = np.arange(slots[j])
+        for k in range(j + 1, n):
+            tk = np.arange(slots[k])
+            diff = tk[None, :] - t[:, None]
+            mask = (diff > -p[k]) & (diff < p[j])
+            if batching:
+                mask &= diff != 0
+            a, b = np.nonzero(mask)
+            rows.append(first[j] + a)
+            cols.append(first[k] + b)
+            vals.append(np.full(a.size, penalty))
+
+    if batching:
+        # Extra tardiness of the shorter job in a shared batch
+        for j in range(n - 1):
+            for k in range(j + 1, n):
+                common = np.arange(min(slots[j], slots[k]))
+                short, long_ = (j, k) if p[j] <= p[k] else (k, j)
+                extra = w[short] * (np.maximum(0, common + p[long_] - d[short])
+                                    - np.maximum(0, common + p[short] - d[short]))
+                rows.append(first[j] + common)
+                cols.append(first[k] + common)
+                vals.append(extra)
+
+    if capacity_limited:
+        # At most c jobs start in each slot
+        for t in range(horizon):
+            starters = np.flatnonzero(var_start[:num_job_vars] == t)
+            slack_ids = num_job_vars + t * slack_coef.size + np.arange(slack_coef.size)
+            ids = np.r_[starters, slack_ids]
+            coef = np.r_[np.ones(starters.size), slack_coef]
+            lin, r, c, v, const = _one_hot_terms(ids, penalty, coef, target=batch_capacity)
+            linear[ids] += lin
+            rows.append(r)
+            cols.append(c)
+            vals.append(v)
+            offset += const
+
+    quadratic = _upper_csr(np.concatenate(rows), np.concatenate(cols),
+                           np.concatenate(vals), num_vars)
+
+    var_job = np.r_[var_job, np.full(num_vars - num_job_vars, -1)]
+    var_start = np.r_[var_start, np.full(num_vars - num_job_vars, -1)]
+    info = {
+        "formulation": "time_indexed",
+        "num_variables": num_vars,
+        "num_job_variables": num_job_vars,
+        "num_slack_variables": num_vars - num_job_vars,
+        "num_jobs": n,
+        "horizon": horizon,
+        "batch_capacity": batch_capacity,
+        "penalty": penalty,
+        "nnz": quadratic.nnz,
+        "build_seconds": time.perf_counter() - start_clock,
+    }
+    return QuboModel(linear, quadratic, offset, var_job, var_start, (p, d, w), info)
+
+
+def build_qubo_model(processing_times, due_dates, weights, formulation="surrogate", **options):
+    """Dispatch to the requested formulation (see FORMULATIONS)."""
+    if formulation == "surrogate":
+        return surrogate_qubo(processing_times, due_dates, weights, **options)
+    if formulation == "time_indexed":
+        return time_indexed_qubo(processing_times, due_dates, weights, **options)
+    raise ValueError(f"Unknown formulation {formulation!r}; expected one of {FORMULATIONS}")
+
+
+# -----------------------------
+# 3. Evaluation and decoding
+# -----------------------------
+def qubo_energy(model, x):
+    """Energy of one bit-vector, shape (n,), or of a stack of them, shape (k, n)."""
+    x = np.asarray(x, dtype=float)
+    coupled = np.asarray(model.quadratic @ x.T).T
+    return (coupled * x).sum(axis=-1) + x @ model.linear + model.offset
+
+
+def decode_start_times(model, x):
+    """
+    Read job start slots from a time-indexed solution and check feasibility.
+
+    Args:
+        model (QuboModel): time-indexed model.
+        x (array): bit-vector over model variables.
+
+    Returns:
+        tuple: start slot per job (-1 when no slot is set, the earliest slot
+        when several are) and whether the schedule satisfies every constraint.
+    """
+    x = np.asarray(x).astype(bool)
+    p = model.job_data[0]
+    n = p.size
+    chosen = np.flatnonzero(x & (model.var_job >= 0))
+    counts = np.bincount(model.var_job[chosen], minlength=n)
+    starts = np.full(n, -1)
+    for var in chosen[::-1]:
+        starts[model.var_job[var]] = model.var_start[var]
+    if np.any(counts != 1):
+        return starts, False
+
+    # Jobs sharing a start slot form a batch; distinct batches may not overlap
+    capacity = model.info.get("batch_capacity") or 1
+    slot_starts, slot_sizes = np.unique(starts, return_counts=True)
+    if np.any(slot_sizes > capacity):
+        return starts, False
+    if capacity == 1 and slot_starts.size != n:
+        return starts, False
+    slot_ends = np.array([starts[starts == t].max() + p[starts == t].max() for t in slot_starts])
+    feasible = bool(np.all(slot_ends[:-1] <= slot_starts[1:]))
+    return starts, feasible
+
+
+def schedule_twt(model, starts):
+    """
+    True total weighted tardiness of decoded start slots.
+
+    Jobs that share a start slot complete together, when the longest of them
+    finishes.
+    """
+    p, d, w = model.job_data
+    completion = np.empty(p.size, dtype=float)
+    for t in np.unique(starts):
+        members = starts == t
+        completion[members] = t + p[members].max()
+    return float(np.sum(w * np.maximum(0, completion - d)))
+
+
+# -----------------------------
+# 4. Classical warm-start bitstrings
+# -----------------------------
+def dispatch_order(processing_times, due_dates, weights, rule="edd"):
+    """
+    Job order of a classical dispatch rule.
+
+    "edd" sorts by due date and "wspt" by weight / processing time,
+    descending. These are the sort keys of edd_scheduling and
+    wspt_scheduling in edd+spt+wspt.py.
+    """
+    p = np.asarray(processing_times, dtype=float)
+    d = np.asarray(due_dates, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    if rule == "edd":
+        return np.argsort(d, kind="stable")
+    if rule == "wspt":
+        return np.argsort(-(w / p), kind="stable")
+    raise ValueError(f"Unknown dispatch rule {rule!r}; expected 'edd' or 'wspt'")
+
+
+def sequence_to_bitstring(model, order):
+    """
+    Encode a job sequence, run back to back from slot 0, as a feasible
+    time-indexed bit-vector (slack bits included).
+    """
+    if model.info["formulation"] != "time_indexed":
+        raise ValueError("sequence_to_bitstring needs a time-indexed model")
+    p = model.job_data[0]
+    order = np.asarray(order)
+    starts = np.empty(p.size, dtype=np.int64)
+    starts[order] = np.r_[0, np.cumsum(p[order])[:-1]]
+    if np.any(starts + p > model.info["horizon"]):
+        raise ValueError("sequence does not fit in the model horizon")
+    return starts_to_bitstring(model, starts)
+
+
+def starts_to_bitstring(model, starts):
+    """
+    Encode job start slots as a time-indexed bit-vector, with the slack bits
+    that make the per-slot capacity terms vanish.
+    """
+    if model.info["formulation"] != "time_indexed":
+        raise ValueError("starts_to_bitstring needs a time-indexed model")
+    p = model.job_data[0]
+    starts = np.asarray(starts, dtype=np.int64)
+    horizon = model.info["horizon"]
+    if np.any(starts < 0) or np.any(starts + p > horizon):
+        raise ValueError("start slots do not fit in the model horizon")
+
+    x = np.zeros(model.info["num_variables"], dtype=int)
+    first = np.searchsorted(model.var_job[:model.info["num_job_variables"]], np.arange(p.size))
+    x[first + starts] = 1
+
+    num_slack = model.info["num_slack_variables"]
+    if num_slack:
+        # Slack value per slot is capacity minus the jobs starting there,
+        # written greedily into the log-encoded slack coefficients
+        bits = num_slack // horizon
+        coef = 2 ** np.arange(bits)
+        coef[-1] = model.info["batch_capacity"] - (2 ** (bits - 1) - 1)
+        remaining = model.info["batch_capacity"] - np.bincount(starts, minlength=horizon)
+        slack = np.zeros((horizon, bits), dtype=int)
+        for b in range(bits - 1, -1, -1):
+            slack[:, b] = remaining >= coef[b]
+            remaining -= slack[:, b] * coef[b]
+        x[model.info["num_job_variables"]:] = slack.ravel()
+    return x
+
+
+def repair_bitstring(model, x):
+    """
+    Nearby feasible bit-vector for a sampled one.
+
+    Surrogate models have no constraints and are returned as they are. For
+    time-indexed models, jobs keep the order of their sampled start slots
+    (jobs without one go last, by due date); jobs that share a sampled slot
+    stay in one batch up to the batch capacity, and each batch starts at its
+    sampled slot or, if the oven is still busy, as soon as it is free.
+    Feasible samples are only re-encoded, which also corrects their slack bits.
+
+    Returns:
+        tuple: (bit-vector, whether it is feasible). The second is False only
+        when even the back-to-back schedule overruns the horizon.
+    """
+    x = np.asarray(x).astype(int)
+    if model.info["formulation"] != "time_indexed":
+        return x, True
+    starts, feasible = decode_start_times(model, x)
+    if feasible:
+        return starts_to_bitstring(model, starts), True
+
+    p, d, _ = model.job_data
+    horizon = model.info["horizon"]
+    capacity = model.info.get("batch_capacity") or 1
+    sampled = np.where(starts >= 0, starts, horizon)
+    repaired = np.empty(p.size, dtype=np.int64)
+    free = 0
+    batch_slot = batch_start = None
+    members = 0
+    for j in np.lexsort((d, sampled)).tolist():
+        if sampled[j] == batch_slot and sampled[j] < horizon and members < capacity:
+            members += 1
+        else:
+            batch_slot, members = sampled[j], 1
+            batch_start = free if sampled[j] >= horizon else max(free, int(sampled[j]))
+        repaired[j] = batch_start
+        free = max(free, batch_start + int(p[j]))
+    if free > horizon:
+        # Keep only the order: run the jobs back to back
+        try:
+            return sequence_to_bitstring(model, np.argsort(repaired, kind="stable")), True
+        except ValueError:
+            return x, False
+    return starts_to_bitstring(model, repaired), True
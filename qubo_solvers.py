@@ -0,0 +1,267 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+from scipy import sparse
+
+METHODS = ("anneal", "tabu")
+
+
+class QuboSolution(NamedTuple):
+    """Outcome of :func:`solve_qubo`.
+
+    `samples` / `energies` hold the best state seen by each replica;
+    `histogram` is (distinct energies, replica counts) over those states.
+    """
+    best_sample: np.ndarray
+    best_energy: float
+    samples: np.ndarray
+    energies: np.ndarray
+    histogram: tuple
+    elapsed: float
+    method: str
+
+
+def qubo_arrays(model):
+    """
+    Linear vector, symmetric zero-diagonal coupling matrix and offset, with
+    energy h.x + x^T J x / 2 + offset.
+
+    Accepts a qubo_model.QuboModel, a Qiskit QuadraticProgram (unconstrained)
+    or a (linear, quadratic, offset) tuple. A sparse quadratic part (the CSR
+    matrix of a QuboModel) gives a CSR coupling matrix, so memory and field
+    updates follow the nonzeros rather than n^2; dense input stays dense.
+    """
+    if hasattr(model, "objective"):
+        objective = model.objective
+        sign = 1 if objective.sense == objective.sense.MINIMIZE else -1
+        linear = sign * objective.linear.to_array()
+        quadratic = sign * objective.quadratic.to_array()
+        offset = sign * objective.constant
+    elif hasattr(model, "quadratic"):
+        linear, quadratic, offset = model.linear, model.quadratic, model.offset
+    else:
+        linear, quadratic, offset = model
+    if sparse.issparse(quadratic):
+        quadratic = sparse.csr_matrix(quadratic, dtype=float)
+        h = np.asarray(linear, dtype=float) + quadratic.diagonal()
+        coupling = (quadratic + quadratic.T).tocsr()
+        coupling = (coupling - sparse.diags(coupling.diagonal())).tocsr()
+        coupling.eliminate_zeros()
+        coupling.sort_indices()
+        return h, coupling, float(offset)
+    quadratic = np.asarray(quadratic, dtype=float)
+    h = np.asarray(linear, dtype=float) + np.diag(quadratic)
+    coupling = quadratic + quadratic.T
+    np.fill_diagonal(coupling, 0.0)
+    return h, coupling, float(offset)
+
+
+def _coupled(x, coupling):
+    """x J for every row of x (J is symmetric, dense or CSR)."""
+    return (coupling @ x.T).T if sparse.issparse(coupling) else x @ coupling
+
+
+def _energies(x, h, coupling, offset):
+    return x @ h + 0.5 * np.einsum("ri,ri->r", x, _coupled(x, coupling)) + offset
+
+
+def _add_rows(field, rows, i, scale, coupling):
+    """
+    field[rows] += scale[:, None] * J[i] for a scalar i, or row by row for
+    one i per row; sparse J only touches the nonzeros of its `indptr` slices.
+    """
+    if not sparse.issparse(coupling):
+        field[rows] += scale[:, None] * coupling[i]
+        return
+    indptr, indices, data = coupling.indptr, coupling.indices, coupling.data
+    if np.ndim(i) == 0:
+        cols = indices[indptr[i]:indptr[i + 1]]
+        field[rows[:, None], cols] += scale[:, None] * data[indptr[i]:indptr[i + 1]]
+        return
+    starts, lengths = indptr[i], indptr[i + 1] - indptr[i]
+    owner = np.repeat(np.arange(lengths.size), lengths)
+    entries = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    # CSR rows hold each column once, so the (row, column) pairs are distinct
+    field[rows[owner], indices[entries]] += scale[owner] * data[entries]
+
+
+def _temperature_range(h, coupling):
+    """
+    Hot end accepts a typical coefficient half the time; cold end accepts the
+    finest energy step 1% of the time.
+
+    The median rather than the largest flip cost keeps penalty-dominated
+    models from spending most sweeps in a random walk. Penalties are folded
+    into the coefficients, so the finest step is the smallest gap between
+    distinct magnitudes, not the smallest magnitude.
+    """
+    if sparse.issparse(coupling):
+        couplings = sparse.triu(coupling, 1).data
+    else:
+        couplings = coupling[np.triu_indices_from(coupling, 1)]
+    magnitudes = np.unique(np.abs(np.r_[h, couplings]))
+    steps = np.r_[magnitudes, np.diff(magnitudes)]
+    steps = steps[steps > 1e-9]
+    if steps.size == 0:
+        return 1.0, 0.1
+    return np.median(magnitudes[magnitudes > 0]) / np.log(2), steps.min() / np.log(100)
+
+
+# -----------------------------
+# Replica-parallel simulated annealing
+# -----------------------------
+def _anneal(h, coupling, rng, num_replicas, sweeps, t_hot, t_cold):
+    n = h.size
+    x = rng.integers(0, 2, size=(num_replicas, n)).astype(float)
+    field = h + _coupled(x, coupling)
+    energy = _energies(x, h, coupling, 0.0)
+    best_x, best_e = x.copy(), energy.copy()
+    for temperature in np.geomspace(t_hot, t_cold, sweeps):
+        # Metropolis test delta <= -T log(u), with all uniforms drawn once per sweep
+        thresholds = -temperature * np.log(rng.random((n, num_replicas)))
+        for i in rng.permutation(n):
+            sign = 1.0 - 2.0 * x[:, i]
+            delta = sign * field[:, i]
+            flip = np.flatnonzero(delta <= thresholds[i])
+            if flip.size:
+                x[flip, i] += sign[flip]
+                _add_rows(field, flip, i, sign[flip], coupling)
+                energy[flip] += delta[flip]
+        improved = energy < best_e
+        best_x[improved], best_e[improved] = x[improved], energy[improved]
+    return best_x, best_e
+
+
+# -----------------------------
+# Replica-parallel tabu search
+# -----------------------------
+def _tabu(h, coupling, rng, num_replicas, iterations, tenure):
+    n = h.size
+    x = rng.integers(0, 2, size=(num_replicas, n)).astype(float)
+    field = h + _coupled(x, coupling)
+    energy = _energies(x, h, coupling, 0.0)
+    best_x, best_e = x.copy(), energy.copy()
+    tabu_until = np.zeros((num_replicas, n), dtype=np.int64)
+    rows = np.arange(num_replicas)
+    for step in range(iterations):
+        delta = (1.0 - 2.0 * x) * field
+        # Tabu moves are allowed only if they beat the replica's best (aspiration)
+        allowed = (tabu_until <= step) | (energy[:, None] + delta < best_e[:, None])
+        masked = np.where(allowed, delta, np.inf)
+        # Random tie-breaking between equally good flips
+        masked += rng.random(masked.shape) * 1e-9
+        i = masked.argmin(axis=1)
+        sign = 1.0 - 2.0 * x[rows, i]
+        x[rows, i] += sign
+        _add_rows(field, rows, i, sign, coupling)
+        energy += delta[rows, i]
+        tabu_until[rows, i] = step + 1 + tenure
+        improved = energy < best_e
+        best_x[improved], best_e[improved] = x[improved], energy[improved]
+    return best_x, best_e
+
+
+# -----------------------------
+# Bit-flip descent from given states
+# -----------------------------
+def bit_flip_descent(model, samples, max_flips=None):
+    """
+    Steepest-descent polish of given bit-vectors.
+
+    Every row repeatedly flips the bit with the most negative energy change
+    until no single flip improves it (a 1-flip local minimum) or `max_flips`
+    is reached. Rows advance together, with the same O(n) local-field update
+    per flip as the annealer.
+
+    Args:
+        model: QuboModel, QuadraticProgram or (linear, quadratic, offset).
+        samples (array): starting bit-vectors, shape (n,) or (k, n).
+        max_flips (int | None): flip limit per row; default 2n.
+
+    Returns:
+        QuboSolution: polished rows in input order (method "descent").
+    """
+    start = time.perf_counter()
+    h, coupling, offset = qubo_arrays(model)
+    x = np.atleast_2d(np.asarray(samples, dtype=float)).copy()
+    if max_flips is None:
+        max_flips = 2 * h.size
+    field = h + _coupled(x, coupling)
+    rows = np.arange(x.shape[0])
+    active = rows
+    for _ in range(max_flips):
+        delta = (1.0 - 2.0 * x[active]) * field[active]
+        i = delta.argmin(axis=1)
+        improving = delta[np.arange(active.size), i] < -1e-12
+        if not improving.any():
+            break
+        active, i = active[improving], i[improving]
+        sign = 1.0 - 2.0 * x[active, i]
+        x[active, i] += sign
+        _add_rows(field, active, i, sign, coupling)
+
+    energies = _energies(x, h, coupling, offset)
+    best = int(np.argmin(energies))
+    values, counts = np.unique(np.round(energies, 9), return_counts=True)
+    return QuboSolution(
+        best_sample=x[best].astype(int),
+        best_energy=float(energies[best]),
+        samples=x.astype(int),
+        energies=energies,
+        histogram=(values, counts),
+        elapsed=time.perf_counter() - start,
+        method="descent",
+    )
+
+
+def solve_qubo(model, method="anneal", num_replicas=256, sweeps=500, seed=None,
+               temperature_range=None, tenure=None):
+    """
+    Classical reference solver for the QUBO models built for QAOA.
+
+    All replicas advance together as rows of one bit matrix. Local fields
+    f = h + J x are kept up to date with a row update per flip, so a flip
+    costs O(n), or O(nonzeros in the row) for a sparse QuboModel, instead
+    of a full energy evaluation.
+
+    Args:
+        model: QuboModel, QuadraticProgram or (linear, quadratic, offset).
+        method (str): "anneal" (Metropolis single-bit sweeps on a geometric
+            temperature schedule) or "tabu" (best non-tabu flip per step).
+        num_replicas (int): independent replicas run side by side.
+        sweeps (int): annealing sweeps over all bits, or tabu steps.
+        seed (int | None): random seed.
+        temperature_range (tuple | None): (hot, cold) annealing temperatures;
+            by default derived from the coefficient magnitudes.
+        tenure (int | None): tabu tenure; defaults to min(20, n // 4 + 1).
+
+    Returns:
+        QuboSolution
+    """
+    start = time.perf_counter()
+    h, coupling, offset = qubo_arrays(model)
+    rng = np.random.default_rng(seed)
+    if method == "anneal":
+        t_hot, t_cold = temperature_range or _temperature_range(h, coupling)
+        samples, energies = _anneal(h, coupling, rng, num_replicas, sweeps, t_hot, t_cold)
+    elif method == "tabu":
+        if tenure is None:
+            tenure = min(20, h.size // 4 + 1)
+        samples, energies = _tabu(h, coupling, rng, num_replicas, sweeps, tenure)
+    else:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+
+    # Re-evaluate from scratch to drop accumulated rounding in the running energies
+    energies = _energies(samples, h, coupling, offset)
+    best = int(np.argmin(energies))
+    values, counts = np.unique(np.round(energies, 9), return_counts=True)
+    return QuboSolution(
+        best_sample=samples[best].astype(int),
+        best_energy=float(energies[best]),
+        samples=samples.astype(int),
+        energies=energies,
+        histogram=(values, counts),
+        elapsed=time.perf_counter() - start,
+        method=method,
+    )
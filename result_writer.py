@@ -0,0 +1,182 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from batch_evaluation import MODELS, batches_to_columns, evaluate_batches
+
+FORMATS = ("csv", "parquet", "feather")
+
+
+def _format_from_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "arrow":
+        return "feather"
+    if extension == "pq":
+        return "parquet"
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported result extension {extension!r}; expected one of {FORMATS}")
+    return extension
+
+
+def summary_path(path):
+    """Location of the JSON sidecar holding the summary metrics for `path`."""
+    return os.path.splitext(path)[0] + ".summary.json"
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+# -----------------------------
+# Streaming result writer
+# -----------------------------
+class ResultWriter:
+    """
+    Append-only writer for per-job result rows.
+
+    Rows arrive as DataFrames (or dicts of columns) and are buffered until
+    `chunk_rows` rows are pending, then flushed: CSV chunks are appended
+    below a single header, Parquet chunks become row groups and Feather
+    chunks record batches. The column schema is fixed by the first chunk,
+    so numeric columns stay numeric. Summary metrics are kept apart and
+    written to a JSON sidecar (see summary_path) on close, together with a
+    metrics.snapshot() when run metrics are being collected.
+
+    Usage::
+
+        with ResultWriter("results.parquet") as writer:
+            for frame in chunks:
+                writer.write(frame)
+            writer.add_metrics(total_weighted_tardiness=twt)
+    """
+
+    def __init__(self, path, chunk_rows=65536, fmt=None):
+        self.path = path
+        self.format = fmt or _format_from_path(path)
+        self.chunk_rows = chunk_rows
+        self.metrics = {}
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._schema = None
+        self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, rows):
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if len(frame) == 0:
+            return
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+        if self._pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def add_metrics(self, **values):
+        self.metrics.update({name: _json_value(value) for name, value in values.items()})
+
+    def flush(self):
+        if not self._pending:
+            return
+        frame = self._pending[0] if len(self._pending) == 1 else pd.concat(self._pending, ignore_index=True)
+        self._pending, self._pending_rows = [], 0
+        if self.format == "csv":
+            frame.to_csv(self.path, mode="w" if self._schema is None else "a",
+                         header=self._schema is None, index=False)
+            self._schema = list(frame.columns)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            if self._sink is None:
+                self._schema = table.schema
+                if self.format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._sink = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._sink = pa.ipc.new_file(self.path, self._schema)
+            self._sink.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        """Flush pending rows, close the file and write the sidecar; returns the summary."""
+        self.flush()
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        summary = {"path": self.path, "format": self.format, "rows": self.rows, **self.metrics}
+        if metrics.is_enabled():
+            summary["run_metrics"] = metrics.snapshot()
+        with open(summary_path(self.path), "w") as handle:
+            json.dump(summary, handle, indent=2)
+        return summary
+
+
+def write_results(path, frame, chunk_rows=65536, **extra_metrics):
+    """
+    Write a result frame through ResultWriter in chunks of `chunk_rows` rows.
+
+    Metrics stored in frame.attrs (as create_batch_table does) go to the
+    sidecar together with any keyword metrics, which win on a name clash.
+    """
+    with ResultWriter(path, chunk_rows) as writer:
+        for start in range(0, len(frame), chunk_rows):
+            writer.write(frame.iloc[start:start + chunk_rows])
+        writer.add_metrics(**{**frame.attrs, **extra_metrics})
+    return writer.metrics
+
+
+def stream_batch_results(writer, batches, model="sequential", chunk_batches=4096, weight_key='weight'):
+    """
+    Evaluate batches and stream their per-job rows to `writer` chunk by chunk.
+
+    Batches are scored with evaluate_batches `chunk_batches` at a time, so
+    the per-job frame never exists in full. The "serial" model carries the
+    oven across batches and is scored in one pass (its rows are still
+    written in chunks).
+
+    Returns:
+        float: total weighted tardiness, also added to the writer's metrics.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    step = len(batches) if model == "serial" else chunk_batches
+    twt = 0
+    for start in range(0, len(batches), max(step, 1)):
+        chunk = batches[start:start + step]
+        columns = batches_to_columns(chunk, weight_key)
+        result = evaluate_batches(
+            columns['release_time'], columns['processing_time'], columns['due_date'],
+            columns['weight'], columns['assignment'],
+            model=model, as_frame=True, job_ids=columns['id']
+        )
+        frame = result.frame
+        frame['Batch ID'] = [f"B{b + start + 1}" for b in columns['assignment']]
+        for offset in range(0, len(frame), writer.chunk_rows):
+            writer.write(frame.iloc[offset:offset + writer.chunk_rows])
+        twt += result.total_weighted_tardiness.item()
+    writer.add_metrics(model=model, batches=len(batches), total_weighted_tardiness=twt)
+    return twt
+
+
+# -----------------------------
+# Bounded console summary
+# -----------------------------
+def print_summary(frame, approach_name, twt, max_rows=20):
+    """Print the TWT headline and at most `max_rows` rows of the result frame."""
+    print(f"\n{approach_name} Approach TWT: {twt}\n")
+    if len(frame) <= max_rows:
+        print(frame)
+    else:
+        print(frame.head(max_rows))
+        print(f"... {len(frame) - max_rows} more rows ({len(frame)} jobs)")
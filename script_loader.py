@@ -0,0 +1,35 @@
+import importlib.util
+import os
+import re
+import sys
+import threading
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_LOAD_LOCK = threading.RLock()
+
+
+# -----------------------------
+# Importing the repo's scripts
+# -----------------------------
+def load_script(filename):
+    """
+    Import one of the repo's scripts by file name ('edd+spt+wspt.py', ...).
+
+    The module is registered in sys.modules under a sanitized name so its
+    functions can be pickled for process pools. Scripts only run their demo
+    under `if __name__ == "__main__"`, so importing them has no side effects.
+    Safe to call from several threads: a half-executed module is never returned.
+    """
+    module_name = re.sub(r"\W", "_", os.path.splitext(filename)[0])
+    with _LOAD_LOCK:
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+        return module
@@ -0,0 +1,208 @@
+from typing import NamedTuple
+
+import numpy as np
+from scipy.optimize import minimize
+
+# Largest register we are willing to hold as a dense complex128 statevector
+# (2^26 amplitudes = 1 GiB).
+MAX_QUBITS = 26
+
+
+class StatevectorQAOAResult(NamedTuple):
+    """Outcome of :func:`run_statevector_qaoa`.
+
+    `optimal_point` is ordered [beta_0..beta_{p-1}, gamma_0..gamma_{p-1}],
+    the same order Qiskit's QAOA uses for its ansatz parameters.
+    """
+    optimal_point: np.ndarray
+    optimal_value: float
+    probabilities: np.ndarray
+    cost: np.ndarray
+    best_bitstring: np.ndarray
+    nfev: int
+
+
+# -----------------------------
+# 1. Diagonal cost Hamiltonian
+# -----------------------------
+def qubo_cost_vector(linear, quadratic, offset=0.0):
+    """
+    Evaluate a QUBO on all 2^n bitstrings at once.
+
+    Bit i of the bitstring index is variable i (Qiskit's little-endian order).
+    The vector is built by doubling: appending variable i concatenates the
+    current vector with itself shifted by the field of variable i over the
+    lower bits, which is itself built by doubling. Total work is O(2^n).
+
+    Args:
+        linear (array): linear coefficients c, shape (n,).
+        quadratic (array | sparse matrix): coefficients Q, shape (n, n), with
+            energy x^T Q x (any triangle; the diagonal counts as linear).
+        offset (float): constant term.
+
+    Returns:
+        np.ndarray: cost of every bitstring, shape (2^n,).
+    """
+    linear = np.asarray(linear, dtype=float)
+    n = linear.size
+    if n > MAX_QUBITS:
+        raise ValueError(f"{n} variables exceed the statevector limit of {MAX_QUBITS}")
+    quadratic = quadratic.toarray() if hasattr(quadratic, "toarray") else np.asarray(quadratic, dtype=float)
+    linear = linear + np.diag(quadratic)
+    coupling = np.triu(quadratic, 1) + np.tril(quadratic, -1).T
+
+    cost = np.array([float(offset)])
+    for i in range(n):
+        field = np.array([linear[i]])
+        for j in range(i):
+            field = np.concatenate([field, field + coupling[j, i]])
+        cost = np.concatenate([cost, cost + field])
+    return cost
+
+
+# -----------------------------
+# 2. Statevector evolution
+# -----------------------------
+def warm_start_angles(bitstring, epsilon=0.25):
+    """
+    Per-qubit rotation angles for a warm start from a classical bitstring.
+
+    Each qubit starts in RY(theta_i)|0> with theta_i = 2*arcsin(sqrt(c_i)), where
+    c_i is the bit pulled towards 1/2 by `epsilon` so the mixer can still move it.
+    """
+    bits = np.asarray(bitstring, dtype=float)
+    c = np.clip(bits, epsilon, 1 - epsilon)
+    return 2 * np.arcsin(np.sqrt(c))
+
+
+def product_state(thetas):
+    """Statevector of the product state RY(theta_0)|0> ... RY(theta_{n-1})|0>."""
+    psi = np.ones(1, dtype=complex)
+    for theta in thetas:
+        psi = np.concatenate([psi * np.cos(theta / 2), psi * np.sin(theta / 2)])
+    return psi
+
+
+def qaoa_statevector(cost, params, p, thetas=None):
+    """
+    Prepare the QAOA state for a diagonal cost Hamiltonian.
+
+    Args:
+        cost (np.ndarray): cost of each bitstring, shape (2^n,).
+        params (array): [beta_0..beta_{p-1}, gamma_0..gamma_{p-1}].
+        p (int): number of layers.
+        thetas (array | None): warm-start angles (see warm_start_angles). The
+            initial state becomes the matching product state and each qubit's
+            mixer rotates about the Bloch axis (sin theta, 0, cos theta)
+            instead of X. None gives standard QAOA (theta = pi/2).
+
+    Returns:
+        np.ndarray: complex statevector, shape (2^n,).
+    """
+    dim = cost.size
+    n = dim.bit_length() - 1
+    betas, gammas = params[:p], params[p:]
+    if thetas is None:
+        psi = np.full(dim, dim ** -0.5, dtype=complex)
+        sin_t, cos_t = np.ones(n), np.zeros(n)
+    else:
+        psi = product_state(thetas)
+        sin_t, cos_t = np.sin(thetas), np.cos(thetas)
+    for beta, gamma in zip(betas, gammas):
+        # Cost layer: exp(-i*gamma*C) is diagonal in the computational basis
+        psi *= np.exp(-1j * gamma * cost)
+        # Mixer layer: exp(-i*beta*(sin(t) X + cos(t) Z)) on each qubit, in place
+        c, s = np.cos(beta), -1j * np.sin(beta)
+        for q in range(n):
+            u00, u01, u11 = c + s * cos_t[q], s * sin_t[q], c - s * cos_t[q]
+            view = psi.reshape(-1, 2, 1 << q)
+            low = view[:, 0, :].copy()
+            view[:, 0, :] *= u00
+            view[:, 0, :] += u01 * view[:, 1, :]
+            view[:, 1, :] *= u11
+            view[:, 1, :] += u01 * low
+    return psi
+
+
+def qaoa_expectation(params, cost, p, thetas=None):
+    """Exact expectation value of the cost for the given angles."""
+    psi = qaoa_statevector(cost, params, p, thetas)
+    return float(np.dot(psi.real ** 2 + psi.imag ** 2, cost))
+
+
+# -----------------------------
+# 3. Optimization loop
+# -----------------------------
+def default_initial_point(cost, p):
+    """Small ramp of angles scaled so the first cost layer spreads phases by ~0.5 rad."""
+    scale = cost.std() or 1.0
+    layers = (np.arange(p) + 0.5) / p
+    betas = np.pi / 4 * (1 - layers)
+    gammas = 0.5 / scale * layers
+    return np.concatenate([betas, gammas])
+
+
+def interpolate_angles(point, p):
+    """
+    INTERP transfer of optimized depth-p angles to a depth-(p+1) starting point.
+
+    Each of the beta and gamma schedules is linearly resampled from p to p+1
+    layers: x'_i = (i/p) x_{i-1} + ((p-i)/p) x_i for i = 0..p, with
+    x_{-1} = x_p = 0.
+    """
+    point = np.asarray(point, dtype=float)
+    new = []
+    for schedule in (point[:p], point[p:]):
+        padded = np.r_[0.0, schedule, 0.0]
+        i = np.arange(p + 1)
+        new.append(i / p * padded[i] + (p - i) / p * padded[i + 1])
+    return np.concatenate(new)
+
+
+def run_statevector_qaoa(linear, quadratic, offset=0.0, p=1, maxiter=200, initial_point=None, cost=None,
+                         warm_start=None, epsilon=0.25):
+    """
+    Optimize QAOA angles with COBYLA on an exact NumPy statevector.
+
+    Args:
+        linear, quadratic, offset: QUBO coefficients (see qubo_cost_vector).
+        p (int): QAOA depth.
+        maxiter (int): COBYLA iteration limit.
+        initial_point (array | None): starting angles, [betas, gammas].
+        cost (np.ndarray | None): precomputed cost vector to reuse.
+        warm_start (array | None): classical bitstring to bias the initial
+            state and mixer towards (warm-start QAOA).
+        epsilon (float): regularization of the warm-start bits.
+
+    Returns:
+        StatevectorQAOAResult
+    """
+    if cost is None:
+        cost = qubo_cost_vector(linear, quadratic, offset)
+    if initial_point is None:
+        initial_point = default_initial_point(cost, p)
+
+    thetas = None if warm_start is None else warm_start_angles(warm_start, epsilon)
+
+    result = minimize(
+        qaoa_expectation,
+        np.asarray(initial_point, dtype=float),
+        args=(cost, p, thetas),
+        method="COBYLA",
+        options={"maxiter": maxiter, "disp": False}
+    )
+
+    psi = qaoa_statevector(cost, result.x, p, thetas)
+    probabilities = psi.real ** 2 + psi.imag ** 2
+    best_index = int(np.argmax(probabilities))
+    n = cost.size.bit_length() - 1
+    best_bitstring = (best_index >> np.arange(n)) & 1
+
+    return StatevectorQAOAResult(
+        optimal_point=result.x,
+        optimal_value=float(result.fun),
+        probabilities=probabilities,
+        cost=cost,
+        best_bitstring=best_bitstring,
+        nfev=int(result.nfev),
+    )
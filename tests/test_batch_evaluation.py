@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from batch_evaluation import evaluate_batches
+
+
+# -----------------------------
+# Reference totals: the per-row create_batch_table loops
+# -----------------------------
+def _batches(assignment):
+    return [np.flatnonzero(assignment == b) for b in range(assignment.max() + 1)]
+
+
+def sequential_twt(r, p, d, w, assignment):
+    """create_batch_table in edd+spt+wspt.py: jobs run back to back inside each batch."""
+    twt = 0
+    for members in _batches(assignment):
+        completion_time = 0
+        for j in members:
+            completion_time = max(completion_time, r[j]) + p[j]
+            twt += max(0, completion_time - d[j]) * w[j]
+    return twt
+
+
+def batch_twt(r, p, d, w, assignment):
+    """create_batch_table in edd+advanced schedulingfinal.py: one completion per batch."""
+    twt = 0
+    for members in _batches(assignment):
+        if members.size == 0:
+            continue
+        completion_time = r[members].min() + p[members].max()
+        tardiness = max(0, completion_time - d[members].min())
+        twt += tardiness * w[members].sum()
+    return twt
+
+
+REFERENCE = {"sequential": sequential_twt, "batch": batch_twt}
+
+
+def random_instance(rng, n, integer):
+    if integer:
+        r = rng.integers(0, 50, n)
+        p = rng.integers(1, 20, n)
+        d = r + p + rng.integers(-5, 40, n)
+        w = rng.integers(1, 10, n)
+    else:
+        r = rng.uniform(0, 50, n)
+        p = rng.uniform(1, 20, n)
+        d = r + p + rng.uniform(-5, 40, n)
+        w = rng.uniform(0.5, 10, n)
+    return r, p, d, w
+
+
+@pytest.mark.parametrize("model", sorted(REFERENCE))
+@pytest.mark.parametrize("integer", [True, False])
+def test_matches_per_row_tables(model, integer):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n = int(rng.integers(1, 30))
+        r, p, d, w = random_instance(rng, n, integer)
+        assignment = rng.integers(0, max(1, n // 3), n)
+        result = evaluate_batches(r, p, d, w, assignment, model=model)
+        assert result.total_weighted_tardiness == pytest.approx(REFERENCE[model](r, p, d, w, assignment))
+
+
+@pytest.mark.parametrize("model", sorted(REFERENCE))
+def test_candidate_stack_matches_single_rows(model):
+    rng = np.random.default_rng(1)
+    r, p, d, w = random_instance(rng, 25, integer=True)
+    stack = rng.integers(0, 6, (40, 25))
+    totals = evaluate_batches(r, p, d, w, stack, model=model, num_batches=6).total_weighted_tardiness
+    expected = [REFERENCE[model](r, p, d, w, row) for row in stack]
+    np.testing.assert_allclose(totals, expected)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from script_loader import load_script
+
+advanced = load_script("edd+advanced schedulingfinal.py")
+
+
+def random_jobs(rng, n):
+    return [
+        {
+            'id': j,
+            'release_time': int(rng.integers(0, 30)),
+            'processing_time': int(rng.integers(1, 15)),
+            'due_date': int(rng.integers(5, 60)),
+            'weight': int(rng.integers(1, 10)),
+            'size': int(rng.integers(1, 6)),
+        }
+        for j in range(n)
+    ]
+
+
+def batch_cost(batch):
+    completion = min(job['release_time'] for job in batch) + max(job['processing_time'] for job in batch)
+    tardiness = max(0, completion - min(job['due_date'] for job in batch))
+    return tardiness * sum(job['weight'] for job in batch)
+
+
+def partitions(n, sizes):
+    """Every split of range(n) into consecutive runs with lengths in `sizes`, as end positions."""
+    if n == 0:
+        yield []
+        return
+    for size in sizes:
+        if size <= n:
+            for rest in partitions(n - size, sizes):
+                yield [size] + [size + end for end in rest]
+
+
+def cost_of(jobs, ends):
+    return sum(batch_cost(jobs[start:end]) for start, end in zip([0] + ends[:-1], ends))
+
+
+def brute_force(jobs, max_batch_size, min_batch_size, capacity=None):
+    sizes = range(min_batch_size, max_batch_size + 1)
+    best = float('inf')
+    for ends in partitions(len(jobs), sizes):
+        batches = [jobs[start:end] for start, end in zip([0] + ends[:-1], ends)]
+        if capacity is not None and any(sum(job['size'] for job in b) > capacity for b in batches):
+            continue
+        best = min(best, cost_of(jobs, ends))
+    return best
+
+
+@pytest.mark.parametrize("max_batch_size,min_batch_size", [(4, 2), (3, 1), (4, 4), (5, 2)])
+def test_matches_brute_force(max_batch_size, min_batch_size):
+    rng = np.random.default_rng(0)
+    for n in range(1, 11):
+        for _ in range(10):
+            jobs = random_jobs(rng, n)
+            ends = advanced.optimal_batch_boundaries(jobs, max_batch_size, min_batch_size)
+            assert ends[-1] == n
+            # Same relaxation as the partitioner: drop the minimum when it cannot be met
+            lower = min_batch_size if -(-n // max_batch_size) * min_batch_size <= n else 1
+            assert cost_of(jobs, ends) == brute_force(jobs, max_batch_size, lower)
+
+
+def test_matches_brute_force_with_capacity():
+    rng = np.random.default_rng(1)
+    for n in range(1, 11):
+        for _ in range(10):
+            jobs = random_jobs(rng, n)
+            ends = advanced.optimal_batch_boundaries(jobs, 4, 1, capacity=8)
+            starts = [0] + ends[:-1]
+            assert all(sum(job['size'] for job in jobs[s:e]) <= 8 for s, e in zip(starts, ends))
+            assert cost_of(jobs, ends) == brute_force(jobs, 4, 1, capacity=8)
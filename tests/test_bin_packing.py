@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from bin_packing import pack_sizes
+
+
+# -----------------------------
+# Naive O(n^2) packers: scan every open batch per item
+# -----------------------------
+def naive_first_fit(sizes, capacity, max_batch_size):
+    rooms, counts, assignment = [], [], []
+    for size in sizes:
+        for batch, room in enumerate(rooms):
+            if room >= size and not (max_batch_size and counts[batch] >= max_batch_size):
+                break
+        else:
+            batch = len(rooms)
+            rooms.append(capacity)
+            counts.append(0)
+        rooms[batch] -= size
+        counts[batch] += 1
+        assignment.append(batch)
+    return assignment, len(rooms)
+
+
+def naive_best_fit(sizes, capacity, max_batch_size):
+    rooms, counts, assignment = [], [], []
+    for size in sizes:
+        open_batches = [(room, batch) for batch, room in enumerate(rooms)
+                        if room >= size and not (max_batch_size and counts[batch] >= max_batch_size)]
+        if open_batches:
+            batch = min(open_batches)[1]
+        else:
+            batch = len(rooms)
+            rooms.append(capacity)
+            counts.append(0)
+        rooms[batch] -= size
+        counts[batch] += 1
+        assignment.append(batch)
+    return assignment, len(rooms)
+
+
+NAIVE = {
+    "first_fit": naive_first_fit,
+    "best_fit": naive_best_fit,
+    "first_fit_decreasing": naive_first_fit,
+    "best_fit_decreasing": naive_best_fit,
+}
+
+
+def naive_pack(sizes, capacity, mode, windows, max_batch_size):
+    labels = np.zeros(len(sizes), dtype=int) if windows is None else np.asarray(windows)
+    assignment = np.empty(len(sizes), dtype=np.int64)
+    opened = 0
+    for label in np.unique(labels):
+        positions = np.flatnonzero(labels == label)
+        if mode.endswith("_decreasing"):
+            positions = positions[np.argsort(-sizes[positions], kind="stable")]
+        local, count = NAIVE[mode](sizes[positions].tolist(), capacity, max_batch_size)
+        assignment[positions] = np.asarray(local) + opened
+        opened += count
+    return assignment
+
+
+@pytest.mark.parametrize("mode", sorted(NAIVE))
+@pytest.mark.parametrize("max_batch_size", [None, 3])
+@pytest.mark.parametrize("use_windows", [False, True])
+@pytest.mark.parametrize("integer", [True, False])
+def test_matches_naive_packer(mode, max_batch_size, use_windows, integer):
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 200))
+        sizes = rng.integers(1, 11, n) if integer else rng.uniform(0.1, 10, n)
+        windows = np.sort(rng.integers(0, 5, n)) if use_windows else None
+        result = pack_sizes(sizes, 10, mode=mode, windows=windows, max_batch_size=max_batch_size)
+        expected = naive_pack(sizes, 10, mode, windows, max_batch_size)
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("mode", ["first_fit", "best_fit"])
+def test_matches_naive_packer_with_many_open_batches(mode):
+    # Enough open batches to span several segment tree levels and sorted-list blocks
+    rng = np.random.default_rng(1)
+    sizes = rng.uniform(0.5, 10, 3000)
+    result = pack_sizes(sizes, 10, mode=mode)
+    np.testing.assert_array_equal(result, naive_pack(sizes, 10, mode, None, None))
@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from batch_evaluation import batches_to_columns, evaluate_batches
+from exact_solver import solve_exact
+
+
+def random_jobs(rng, n):
+    return [
+        {
+            'id': j,
+            'release_time': int(rng.integers(0, 20)),
+            'processing_time': int(rng.integers(1, 10)),
+            'due_date': int(rng.integers(5, 40)),
+            'weight': int(rng.integers(1, 10)),
+            'size': int(rng.integers(1, 6)),
+        }
+        for j in range(n)
+    ]
+
+
+def serial_twt(jobs, sequence):
+    twt, free = 0, 0
+    for batch in sequence:
+        free = max(free, max(jobs[j]['release_time'] for j in batch)) + \
+            max(jobs[j]['processing_time'] for j in batch)
+        twt += sum(jobs[j]['weight'] * max(0, free - jobs[j]['due_date']) for j in batch)
+    return twt
+
+
+def batch_sequences(remaining, max_batch_size):
+    """Every ordered split of `remaining` into batches of at most max_batch_size jobs."""
+    if not remaining:
+        yield []
+        return
+    for size in range(1, min(max_batch_size, len(remaining)) + 1):
+        for batch in itertools.combinations(remaining, size):
+            rest = tuple(j for j in remaining if j not in batch)
+            for tail in batch_sequences(rest, max_batch_size):
+                yield [batch] + tail
+
+
+def enumerate_optimum(jobs, max_batch_size, capacity=None):
+    best = float('inf')
+    for sequence in batch_sequences(tuple(range(len(jobs))), max_batch_size):
+        if capacity is not None and any(sum(jobs[j]['size'] for j in b) > capacity for b in sequence):
+            continue
+        best = min(best, serial_twt(jobs, sequence))
+    return best
+
+
+@pytest.mark.parametrize("n", range(1, 8))
+@pytest.mark.parametrize("max_batch_size,capacity", [(3, None), (4, 8)])
+def test_matches_enumeration(n, max_batch_size, capacity):
+    rng = np.random.default_rng(n)
+    for _ in range(3 if n == 7 else 6):
+        jobs = random_jobs(rng, n)
+        result = solve_exact(jobs, max_batch_size=max_batch_size, capacity=capacity)
+        assert result.optimal
+        assert result.twt == pytest.approx(enumerate_optimum(jobs, max_batch_size, capacity))
+        assert result.lower_bound == pytest.approx(result.twt)
+
+        # The returned schedule is feasible and scores what the solver reports
+        assert sorted(job['id'] for batch in result.batches for job in batch) == list(range(n))
+        assert all(len(batch) <= max_batch_size for batch in result.batches)
+        if capacity is not None:
+            assert all(sum(job['size'] for job in batch) <= capacity for batch in result.batches)
+        columns = batches_to_columns(result.batches)
+        rescored = evaluate_batches(columns['release_time'], columns['processing_time'],
+                                    columns['due_date'], columns['weight'],
+                                    columns['assignment'], model="serial")
+        assert rescored.total_weighted_tardiness == pytest.approx(result.twt)
@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch_evaluation import MODELS, batches_to_columns, evaluate_batches
+from local_search import _Search, improve_batches
+
+
+def random_jobs(rng, n):
+    return [
+        {
+            'id': j,
+            'release_time': rng.randrange(0, 60),
+            'processing_time': rng.randrange(1, 15),
+            'due_date': rng.randrange(10, 90),
+            'weight': rng.randrange(1, 10),
+        }
+        for j in range(n)
+    ]
+
+
+def full_twt(jobs, batches, model):
+    """Re-score index batches from scratch with the array evaluator."""
+    batches = [members for members in batches if members]
+    if not batches:
+        return 0
+    columns = batches_to_columns([[jobs[j] for j in members] for members in batches])
+    return evaluate_batches(columns['release_time'], columns['processing_time'],
+                            columns['due_date'], columns['weight'], columns['assignment'],
+                            model=model).total_weighted_tardiness.item()
+
+
+def random_move(rng, batches):
+    """Redistribute the jobs of a random batch range, sometimes leaving a batch empty."""
+    lo = rng.randrange(len(batches))
+    hi = min(len(batches), lo + rng.randrange(1, 4))
+    pool = [j for members in batches[lo:hi] for j in members]
+    rng.shuffle(pool)
+    new_batches = [[] for _ in range(lo, hi)]
+    for j in pool:
+        new_batches[rng.randrange(len(new_batches))].append(j)
+    new_batches = [sorted(members) for members in new_batches]
+    changed = {i for i, members in enumerate(new_batches) if members != batches[lo + i]}
+    return lo, hi, new_batches, changed
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_delta_matches_full_rescoring(model):
+    rng = random.Random(0)
+    for _ in range(20):
+        jobs = random_jobs(rng, rng.randrange(2, 25))
+        order = list(range(len(jobs)))
+        rng.shuffle(order)
+        cuts = sorted(rng.sample(range(1, len(jobs)), rng.randrange(0, len(jobs) - 1)))
+        batches = [sorted(order[a:b]) for a, b in zip([0] + cuts, cuts + [len(jobs)])]
+        state = _Search(jobs, batches, model, 'weight')
+        current = full_twt(jobs, state.batches, model)
+        assert sum(state.cost) == pytest.approx(current)
+        for step in range(200):
+            move = random_move(rng, state.batches)
+            delta, new_costs, new_comps, end = state.evaluate(*move)
+            lo, hi, new_batches, _ = move
+            candidate = state.batches[:lo] + new_batches + state.batches[hi:]
+            assert current + delta == pytest.approx(full_twt(jobs, candidate, model))
+            if rng.random() < 0.7:
+                state.apply(lo, hi, new_batches, new_costs, new_comps, end)
+                current += delta
+                assert sum(state.cost) == pytest.approx(current)
+            if step % 50 == 49:
+                state.compact()
+
+
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("temperature", [0, 50.0])
+def test_reported_twt_matches_full_rescoring(model, temperature):
+    rng = random.Random(1)
+    jobs = random_jobs(rng, 40)
+    batches = [jobs[i:i + 4] for i in range(0, len(jobs), 4)]
+    improved, stats = improve_batches(batches, model=model, time_limit=60, max_moves=5000, seed=3,
+                                      temperature=temperature, max_batch_size=6)
+    def ids(batch_list):
+        return [[job['id'] for job in batch] for batch in batch_list]
+
+    assert stats["initial_twt"] == pytest.approx(full_twt(jobs, ids(batches), model))
+    # With uphill moves accepted the search ends away from its best state, which it must return
+    assert stats["best_twt"] == pytest.approx(full_twt(jobs, ids(improved), model))
+    assert stats["best_twt"] <= stats["initial_twt"]
+    assert sorted(job['id'] for batch in improved for job in batch) == list(range(len(jobs)))
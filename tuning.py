@@ -0,0 +1,496 @@
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+import metrics
+from batch_evaluation import MODELS, evaluate_batches
+from job_table import as_job_array
+from script_loader import load_script
+
+# Search strategies:
+#   "random":  uniform samples from the parameter box
+#   "grid":    the cartesian product of evenly spaced values per parameter
+#   "halving": successive halving - random samples scored on a few training
+#              instances, the best 1/eta promoted to eta times as many
+#              instances, until the survivors have seen every instance
+STRATEGIES = ("random", "grid", "halving")
+
+
+class Parameter(NamedTuple):
+    """One tunable constant: inclusive range and whether it takes integer values."""
+    name: str
+    low: float
+    high: float
+    integer: bool = False
+
+
+# Tunable heuristics: parameter box and the hand-picked values the scripts use.
+# The window ranges suit generate_instance scales; pass `space` to tune.tune
+# for other product families.
+SPACES = {
+    "edd": (Parameter("window", 0, 60, True),),
+    "spt": (Parameter("window", 0, 10, True),),
+    "wspt": (Parameter("window", 0.0, 5.0),),
+    "hybrid": (Parameter("window", 0, 60, True), Parameter("max_batch_size", 1, 8, True)),
+    "jpi": tuple(Parameter(name, -10.0, 10.0)
+                 for name in ("slack", "energy_consumption", "processing_time", "weight", "due_date")),
+}
+TARGETS = tuple(SPACES)
+
+_SPT_SCRIPT = "edd+spt+wspt.py"
+_JPI_SCRIPT = "edd+advanced schedulingfinal.py"
+# The JPI weights live in the script and are read by default_params, so
+# importing this module does not execute it
+DEFAULTS = {
+    "edd": {"window": 15},
+    "spt": {"window": 5},
+    "wspt": {"window": 1},
+    "hybrid": {"window": 20, "max_batch_size": 4},
+}
+
+
+def default_params(target):
+    """The hand-picked values the scripts use for `target`."""
+    if target == "jpi":
+        return dict(load_script(_JPI_SCRIPT).JPI_COEFFICIENTS)
+    return dict(DEFAULTS[target])
+
+
+class TuningResult(NamedTuple):
+    """Result of :func:`tune`.
+
+    `score` is the mean total weighted tardiness over all training instances
+    (`instance_twt`) under completion model `model`. `evaluations` counts (instance, parameter vector) pairs
+    actually scored, `cache_hits` those answered by the cache, and `elapsed`
+    the wall time, so the cost of finding `params` travels with it.
+    """
+    target: str
+    strategy: str
+    model: str
+    params: dict
+    score: float
+    instance_twt: np.ndarray
+    baseline_params: dict
+    baseline_score: float
+    evaluations: int
+    cache_hits: int
+    elapsed: float
+    history: list
+
+
+# -----------------------------
+# Per-instance preparation
+# -----------------------------
+# Everything that does not depend on the parameters (sorting, columns in
+# sequence order) is computed once per instance; a batch of K parameter
+# vectors then becomes a (K, n) assignment stack scored by one
+# evaluate_batches call.
+def _prepare_window(jobs, target, model):
+    if target == "edd":
+        rows = np.argsort(jobs['due_date'], kind='stable')
+        keys = jobs['due_date'][rows]
+    elif target == "spt":
+        rows = np.argsort(jobs['processing_time'], kind='stable')
+        keys = jobs['processing_time'][rows]
+    elif target == "wspt":
+        ratios = jobs['weight'] / jobs['processing_time']
+        rows = np.argsort(-ratios, kind='stable')
+        keys = -ratios[rows]
+    else:
+        rows = load_script(_SPT_SCRIPT).hybrid_order(jobs)[1]
+        keys = jobs['due_date'][rows]
+    return {
+        'model': model,
+        'columns': tuple(jobs[name][rows] for name in ('release_time', 'processing_time', 'due_date', 'weight')),
+        'keys': keys,
+    }
+
+
+def _prepare_jpi(jobs, model):
+    advanced = load_script(_JPI_SCRIPT)
+    slack = jobs['due_date'].astype(float)
+    slack -= jobs['release_time']
+    slack -= jobs['processing_time']
+    terms = {}
+    for name in ('energy_consumption', 'processing_time', 'weight', 'due_date'):
+        values = jobs[name].astype(float)
+        min_val, max_val = values.min(), values.max()
+        if min_val != max_val:
+            values -= min_val
+            values /= max_val - min_val
+            terms[name] = values
+    # create_batches chunks the JPI sequence by position only, so the batch
+    # of every sequence position is fixed for the instance
+    positions = advanced.create_batches(list(range(len(jobs))))
+    labels = np.repeat(np.arange(len(positions)), [len(batch) for batch in positions])
+    # The columns stay in input order: the serial and batch models do not
+    # depend on the job order inside a batch (tune rejects "sequential")
+    return {
+        'model': model,
+        'columns': tuple(jobs[name] for name in ('release_time', 'processing_time', 'due_date', 'weight')),
+        'slack': slack,
+        'terms': terms,
+        'labels': labels,
+    }
+
+
+def _prepare(jobs, target, model):
+    if target == "jpi":
+        return _prepare_jpi(jobs, model)
+    return _prepare_window(jobs, target, model)
+
+
+def _window_assignments(prepared, params, names):
+    window_starts = load_script(_SPT_SCRIPT).window_starts
+    keys = prepared['keys']
+    n = keys.size
+    stack = np.empty((len(params), n), dtype=np.int64)
+    for k, vector in enumerate(params):
+        values = dict(zip(names, vector))
+        starts = window_starts(keys, values['window'], values.get('max_batch_size'))
+        stack[k] = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    return stack
+
+
+def _jpi_assignments(prepared, params, names):
+    coefficients = {name: np.asarray(params)[:, i] for i, name in enumerate(names)}
+    # Same operations, in the same order, as job_priority_index so that
+    # ties break exactly as in advanced_hybrid_scheduling
+    jpi = prepared['slack'][:, None] * coefficients['slack']
+    for name, normalized in prepared['terms'].items():
+        jpi += normalized[:, None] * coefficients[name]
+    order = np.argsort(jpi, axis=0, kind='stable')
+    stack = np.empty((len(params), order.shape[0]), dtype=np.int64)
+    np.put_along_axis(stack, order.T, prepared['labels'][None, :], axis=1)
+    return stack
+
+
+def _score(prepared, target, params, names):
+    """Total weighted tardiness of every parameter vector in `params` on one instance."""
+    if target == "jpi":
+        stack = _jpi_assignments(prepared, params, names)
+    else:
+        stack = _window_assignments(prepared, params, names)
+    return evaluate_batches(*prepared['columns'], stack, model=prepared['model']).total_weighted_tardiness
+
+
+# -----------------------------
+# Evaluation with cache and worker pool
+# -----------------------------
+def instance_key(jobs):
+    """Content hash of a job set, so cached results follow the data rather than its position."""
+    jobs = as_job_array(jobs)
+    digest = hashlib.blake2b(digest_size=16)
+    for name in jobs.dtype.names:
+        digest.update(np.ascontiguousarray(jobs[name]).tobytes())
+    return digest.hexdigest()
+
+
+class TuningCache:
+    """
+    LRU memo of (target, model, instance, parameter vector) -> total weighted tardiness.
+
+    Keys use the instance content hash, so one cache can be shared by several
+    tune() calls on overlapping training sets.
+
+    Args:
+        maxsize (int | None): maximum number of entries; None keeps all.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_worker_state = {}
+
+
+def _init_worker(target, model, instances):
+    _worker_state['target'] = target
+    _worker_state['prepared'] = [_prepare(jobs, target, model) for jobs in instances]
+
+
+def _worker_score(task):
+    instance, params, names = task
+    start = time.perf_counter()
+    twt = _score(_worker_state['prepared'][instance], _worker_state['target'], params, names)
+    return twt, time.perf_counter() - start
+
+
+class _Evaluator:
+    def __init__(self, target, model, instances, names, cache, n_workers, batch_size):
+        self.target = target
+        self.model = model
+        self.names = names
+        self.cache = cache
+        self.batch_size = batch_size
+        self.keys = [instance_key(jobs) for jobs in instances]
+        self.evaluations = 0
+        self.hits = 0
+        self.executor = None
+        if n_workers is not None and n_workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                                initargs=(target, model, instances))
+        else:
+            self.prepared = [_prepare(jobs, target, model) for jobs in instances]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def scores(self, params, instances):
+        """TWT matrix of shape (len(params), len(instances))."""
+        result = np.empty((len(params), len(instances)))
+        tasks, slots = [], []
+        for column, instance in enumerate(instances):
+            missing = []
+            for row, vector in enumerate(params):
+                cached = self.cache.get((self.target, self.model, self.keys[instance], vector))
+                if cached is None:
+                    missing.append(row)
+                else:
+                    result[row, column] = cached
+            self.hits += len(params) - len(missing)
+            for start in range(0, len(missing), self.batch_size):
+                rows = missing[start:start + self.batch_size]
+                tasks.append((instance, [params[row] for row in rows], self.names))
+                slots.append((column, rows))
+
+        if self.executor is None:
+            outputs = [(_score(self.prepared[instance], self.target, chunk, names), None)
+                       for instance, chunk, names in tasks]
+        else:
+            outputs = list(self.executor.map(_worker_score, tasks))
+
+        for (twt, elapsed), (column, rows), (instance, chunk, _) in zip(outputs, slots, tasks):
+            if elapsed is not None:
+                metrics.record("tuning_batch", elapsed)
+            result[rows, column] = twt
+            for vector, value in zip(chunk, twt.tolist()):
+                self.cache.put((self.target, self.model, self.keys[instance], vector), value)
+            self.evaluations += len(rows)
+        metrics.count("tuning_evaluations", sum(len(rows) for _, rows in slots))
+        return result
+
+
+# -----------------------------
+# Candidate generation
+# -----------------------------
+def _vector(space, values):
+    """Hashable parameter vector with integer parameters rounded."""
+    return tuple(int(round(values[p.name])) if p.integer else float(values[p.name]) for p in space)
+
+
+def _random_candidates(space, n_samples, rng):
+    columns = []
+    for p in space:
+        if p.integer:
+            columns.append(rng.integers(int(p.low), int(p.high) + 1, n_samples).tolist())
+        else:
+            columns.append(rng.uniform(p.low, p.high, n_samples).tolist())
+    return list(zip(*columns))
+
+
+def _grid_candidates(space, points):
+    axes = []
+    for p in space:
+        values = np.linspace(p.low, p.high, points)
+        if p.integer:
+            axes.append(sorted(set(np.rint(values).astype(int).tolist())))
+        else:
+            axes.append(values.tolist())
+    return list(itertools.product(*axes))
+
+
+def _unique(candidates):
+    return list(dict.fromkeys(candidates))
+
+
+# -----------------------------
+# Search
+# -----------------------------
+def _ranked(scores, candidates):
+    # Lowest mean TWT first, earlier candidates (the baseline first) on ties
+    return sorted(range(len(candidates)), key=lambda i: (scores[i], i))
+
+
+@metrics.timed("tuning")
+def tune(target, instances, strategy="random", n_samples=256, grid_points=8, eta=3, min_instances=1,
+         space=None, seed=None, n_workers=None, cache=None, batch_size=256, model="serial"):
+    """
+    Tune a heuristic's constants on a set of training instances.
+
+    Parameter vectors are scored in batches: the instance-specific work is
+    done once and each batch of vectors is evaluated with one array call
+    (evaluate_batches on a stack of assignments). With `n_workers` > 1 the
+    (instance, batch) tasks run in a process pool. The baseline - the values
+    hard-coded in the scripts - is always among the candidates.
+
+    Candidates are scored on one oven ("serial", as in benchmark.py) by
+    default. The scripts' own tables use "sequential" (EDD/SPT/WSPT/hybrid)
+    and "batch" (JPI); neither carries the oven's busy time from one batch
+    to the next, so under them singleton batches always win and the search
+    drifts to degenerate windows.
+
+    Args:
+        target (str): one of TARGETS ("jpi" tunes the advanced hybrid's JPI weights).
+        instances (list): training job sets (list[dict] | JobTable | array).
+        strategy (str): one of STRATEGIES.
+        n_samples (int): random / halving: number of sampled candidates.
+        grid_points (int): grid: values per parameter.
+        eta (int): halving: reduction factor per rung.
+        min_instances (int): halving: instances seen by every candidate in the first rung.
+        space (tuple[Parameter] | None): parameter box; default SPACES[target].
+        seed (int | None): seed for the sampled candidates.
+        n_workers (int | None): worker processes; None or 1 runs serially.
+        cache (TuningCache | None): result cache, reused across calls if given.
+        batch_size (int): parameter vectors per evaluation call.
+        model (str): completion model, see batch_evaluation.MODELS; "jpi"
+            accepts "serial" and "batch" only.
+
+    Returns:
+        TuningResult
+    """
+    if target not in SPACES:
+        raise ValueError(f"Unknown target {target!r}; expected one of {TARGETS}")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {STRATEGIES}")
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    if target == "jpi" and model == "sequential":
+        raise ValueError("the JPI target is scored with the 'serial' or 'batch' model")
+    if not instances:
+        raise ValueError("need at least one training instance")
+    start = time.perf_counter()
+    space = tuple(space or SPACES[target])
+    names = tuple(p.name for p in space)
+    instances = [as_job_array(jobs) for jobs in instances]
+    baseline = _vector(space, default_params(target))
+    rng = np.random.default_rng(seed)
+    cache = cache if cache is not None else TuningCache()
+    everything = list(range(len(instances)))
+    history = []
+
+    evaluator = _Evaluator(target, model, instances, names, cache, n_workers, batch_size)
+    try:
+        if strategy == "halving":
+            candidates = _unique([baseline] + _random_candidates(space, n_samples, rng))
+            used = min(max(1, min_instances), len(instances))
+            while True:
+                scores = evaluator.scores(candidates, everything[:used]).mean(axis=1)
+                history.extend({'params': dict(zip(names, c)), 'score': s, 'instances': used}
+                               for c, s in zip(candidates, scores.tolist()))
+                if used == len(instances):
+                    break
+                keep = max(1, math.ceil(len(candidates) / eta))
+                candidates = [candidates[i] for i in sorted(_ranked(scores, candidates)[:keep])]
+                used = min(len(instances), used * eta)
+            # A baseline dropped on a subset still competes on the full set
+            candidates = _unique([baseline] + candidates)
+            twt = evaluator.scores(candidates, everything)
+        else:
+            if strategy == "random":
+                sampled = _random_candidates(space, n_samples, rng)
+            else:
+                sampled = _grid_candidates(space, grid_points)
+            candidates = _unique([baseline] + sampled)
+            twt = evaluator.scores(candidates, everything)
+            history.extend({'params': dict(zip(names, c)), 'score': s, 'instances': len(instances)}
+                           for c, s in zip(candidates, twt.mean(axis=1).tolist()))
+        # The baseline is always the first candidate
+        baseline_twt = twt[0]
+    finally:
+        evaluator.close()
+
+    scores = twt.mean(axis=1)
+    best = _ranked(scores, candidates)[0]
+    return TuningResult(
+        target=target,
+        strategy=strategy,
+        model=model,
+        params=dict(zip(names, candidates[best])),
+        score=float(scores[best]),
+        instance_twt=twt[best],
+        baseline_params=dict(zip(names, baseline)),
+        baseline_score=float(baseline_twt.mean()),
+        evaluations=evaluator.evaluations,
+        cache_hits=evaluator.hits,
+        elapsed=time.perf_counter() - start,
+        history=history,
+    )
+
+
+def training_instances(count, n, seed=0, **generator_options):
+    """`count` generated instances of `n` jobs with seeds seed, seed + 1, ..."""
+    from benchmark import generate_instance
+    return [generate_instance(n, seed + i, **generator_options) for i in range(count)]
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune heuristic constants on generated instances.")
+    parser.add_argument("--target", choices=TARGETS, default="hybrid")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="halving")
+    parser.add_argument("--model", choices=MODELS, default="serial", help="completion model used for scoring")
+    parser.add_argument("--samples", type=int, default=256, help="random/halving candidates")
+    parser.add_argument("--grid-points", type=int, default=8)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--instances", type=int, default=9, help="training instances")
+    parser.add_argument("--size", type=int, default=200, help="jobs per training instance")
+    parser.add_argument("--tightness", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write the best configuration as JSON")
+    args = parser.parse_args(argv)
+
+    instances = training_instances(args.instances, args.size, args.seed, tightness=args.tightness)
+    result = tune(args.target, instances, args.strategy, n_samples=args.samples, grid_points=args.grid_points,
+                  eta=args.eta, seed=args.seed, n_workers=args.workers, model=args.model)
+
+    print(f"Target: {result.target}  strategy: {result.strategy}  model: {result.model}")
+    print(f"Baseline {result.baseline_params}: mean TWT {result.baseline_score:g}")
+    print(f"Best     {result.params}: mean TWT {result.score:g}")
+    print(f"Cost: {result.evaluations} evaluations, {result.cache_hits} cache hits, {result.elapsed:.2f}s")
+
+    if args.output:
+        summary = {key: value for key, value in result._asdict().items() if key not in ('instance_twt', 'history')}
+        summary['instance_twt'] = result.instance_twt.tolist()
+        summary['training'] = {'instances': args.instances, 'size': args.size,
+                               'tightness': args.tightness, 'seed': args.seed}
+        with open(args.output, "w") as handle:
+            json.dump(summary, handle, indent=2)
+        print(f"\nBest configuration written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()